@@ -27,8 +27,10 @@ __all__ = [
     'Fit',
     'ValidationError',
     'DmgProfile', 'ResistProfile',
-    'JsonCacheHandler',
-    'JsonDataHandler', 'SQLiteDataHandler',
+    'BinaryCacheHandler', 'JsonCacheHandler', 'ObjectPool',
+    'SQLiteCacheHandler', 'TypeFilter',
+    'ArchiveDataHandler', 'JsonDataHandler', 'JsonStreamDataHandler',
+    'SQLiteDataHandler',
     'Booster', 'Character', 'Charge', 'Drone', 'EffectBeacon', 'FighterSquad',
     'Implant', 'ModuleHigh', 'ModuleMed', 'ModuleLow', 'Rig', 'Ship', 'Skill',
     'Stance', 'Subsystem'
@@ -43,9 +45,22 @@ from .fit.container.exception import SlotTakenError
 from .fit.fit import Fit
 from .fit.restriction.exception import ValidationError
 from .fit.helper import DmgProfile, ResistProfile
-from .data.cache_handler import JsonCacheHandler
-from .data.data_handler import JsonDataHandler, SQLiteDataHandler
 from .fit.item import (
     Booster, Character, Charge, Drone, EffectBeacon, FighterSquad,
     Implant, ModuleHigh, ModuleMed, ModuleLow, Rig, Ship, Skill,
     Stance, Subsystem)
+from .util.lazy_import import make_lazy_attrs
+
+
+# Data and cache handlers are imported only when they are requested, as only
+# few of them are used by any application
+__getattr__, __dir__ = make_lazy_attrs(globals(), {
+    'BinaryCacheHandler': '.data.cache_handler',
+    'JsonCacheHandler': '.data.cache_handler',
+    'ObjectPool': '.data.cache_handler',
+    'SQLiteCacheHandler': '.data.cache_handler',
+    'TypeFilter': '.data.cache_handler',
+    'ArchiveDataHandler': '.data.data_handler',
+    'JsonDataHandler': '.data.data_handler',
+    'JsonStreamDataHandler': '.data.data_handler',
+    'SQLiteDataHandler': '.data.data_handler'})
@@ -25,6 +25,8 @@ from abc import ABCMeta, abstractmethod
 class BaseCachable(metaclass=ABCMeta):
     """Abstract base class for all objects which can be stored in cache"""
 
+    __slots__ = ()
+
     @abstractmethod
     def compress(self):
         """Compress object into python primitive"""
@@ -20,8 +20,21 @@
 
 
 __all__ = [
-    'JsonCacheHandler'
+    'BinaryCacheHandler',
+    'JsonCacheHandler',
+    'ObjectPool',
+    'SQLiteCacheHandler',
+    'TypeFilter'
 ]
 
 
-from .json_cache_handler import JsonCacheHandler
+from eos.util.lazy_import import make_lazy_attrs
+
+
+# Handlers are imported only when they are requested
+__getattr__, __dir__ = make_lazy_attrs(globals(), {
+    'BinaryCacheHandler': '.binary_cache_handler',
+    'JsonCacheHandler': '.json_cache_handler',
+    'ObjectPool': '.object_pool',
+    'SQLiteCacheHandler': '.sqlite_cache_handler',
+    'TypeFilter': '.type_filter'})
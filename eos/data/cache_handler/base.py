@@ -20,6 +20,10 @@
 
 
 from abc import ABCMeta, abstractmethod
+from logging import getLogger
+
+
+logger = getLogger(__name__)
 
 
 class BaseCacheHandler(metaclass=ABCMeta):
@@ -29,6 +33,12 @@ class BaseCacheHandler(metaclass=ABCMeta):
     data.
     """
 
+    # Pool which shares eve objects with other cache handlers, if any
+    _object_pool = None
+    # Cache handlers which can replace part of cached data should override
+    # this and update_cache_partial()
+    supports_partial_update = False
+
     @abstractmethod
     def get_type(self, type_id):
         ...
@@ -46,12 +56,71 @@ class BaseCacheHandler(metaclass=ABCMeta):
         ...
 
     @abstractmethod
-    def update_cache(self, eve_objects, fingerprint):
+    def update_cache(self, eve_objects, fingerprint, build_snapshot=None):
         """Update cache.
 
         Args:
             eve_objects: Tuple with data to cache. Should be in form of three
                 iterables, which contain types, attributes and effects.
             fingerprint: Unique ID of data in the form of string
+            build_snapshot (optional): Compressed snapshot of data eve objects
+                were built from. Handlers which support partial updates store
+                it, others may ignore it.
         """
         ...
+
+    def preload(self):
+        """Compose all cached eve objects.
+
+        Used to get all the objects into memory before process forks, so that
+        child processes share them instead of composing their own copies. By
+        default, nothing is done.
+        """
+
+    def set_type_filter(self, type_filter):
+        """Limit item types cache handler provides.
+
+        By default, filtering is not supported and all item types are provided.
+
+        Args:
+            type_filter: Type filter instance which selects item types, or None
+                to provide all item types.
+        """
+        if type_filter is not None:
+            msg = (
+                '{} does not support type filtering, providing all item types'
+            ).format(type(self).__name__)
+            logger.warning(msg)
+
+    def get_build_snapshot(self):
+        """Get compressed snapshot of data cached eve objects were built from.
+
+        Returns:
+            Compressed snapshot, or None if cache handler does not have it.
+        """
+        return None
+
+    def update_cache_partial(
+            self, eve_objects, removed_ids, fingerprint, build_snapshot):
+        """Update part of the cache.
+
+        Args:
+            eve_objects: Tuple with data to cache. Should be in form of three
+                iterables, which contain types, attributes and effects. Cached
+                objects with the same IDs are replaced.
+            removed_ids: Tuple with 3 iterables, which contain IDs of types,
+                attributes and effects which should be removed from cache.
+            fingerprint: Unique ID of data in the form of string
+            build_snapshot: Compressed snapshot of data eve objects were built
+                from.
+        """
+        raise NotImplementedError
+
+    def _compose(self, cls, compressed):
+        """Compose eve object out of compressed data.
+
+        If cache handler has object pool, object is taken from it.
+        """
+        if self._object_pool is None:
+            return cls.decompress(self, compressed)
+        return self._object_pool.share(self, cls, compressed)
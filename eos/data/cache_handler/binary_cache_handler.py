@@ -0,0 +1,312 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import json
+import mmap
+import os
+import os.path
+import struct
+import tempfile
+from logging import getLogger
+
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.type import Type
+from eos.util.repr import make_repr_str
+from .base import BaseCacheHandler
+from .exception import AttrFetchError, EffectFetchError, TypeFetchError
+
+
+logger = getLogger(__name__)
+
+
+MAGIC = b'EOSBCACH'
+FORMAT_VERSION = 1
+
+# Header layout: magic, format version, fingerprint length in bytes, and then
+# (index offset, entry count) pairs for types, attributes and effects. Header
+# is followed by fingerprint, indices and payload
+HEADER = struct.Struct('<8sHIQIQIQI')
+# Index record layout: entity ID, payload offset, payload length. Records within
+# index are sorted by entity ID
+INDEX_RECORD = struct.Struct('<qQI')
+
+
+class BinaryCacheHandler(BaseCacheHandler):
+    """Memory-mapped binary cache storage implementation.
+
+    Persistent cache is stored as a file with fixed-size header, sorted offset
+    indices and per-object JSON payloads. The file is memory-mapped, thus
+    opening it takes constant time, and objects are decoded only when they are
+    requested for the first time. Processes which map the same file share its
+    pages via OS page cache.
+
+    Args:
+        cache_path: File path where persistent cache will be stored (.bin).
+        object_pool (optional): Pool to share eve objects with other cache
+            handlers through. By default, objects are not shared.
+    """
+
+    def __init__(self, cache_path, object_pool=None):
+        self._cache_path = os.path.abspath(cache_path)
+        self._object_pool = object_pool
+        self.__mmap = None
+        self.__fingerprint = None
+        # Format: (index offset, entry count)
+        self.__type_index = (0, 0)
+        self.__attr_index = (0, 0)
+        self.__effect_index = (0, 0)
+        # Storage for objects which have already been decoded
+        self.__type_storage = {}
+        self.__attr_storage = {}
+        self.__effect_storage = {}
+        self.__type_filter = None
+        # IDs of item types selected by type filter, calculated on first
+        # request
+        self.__selected_type_ids = None
+        self.__open_persistent_cache()
+
+    def get_type(self, type_id):
+        try:
+            type_id = int(type_id)
+        except TypeError as e:
+            raise TypeFetchError(type_id) from e
+        try:
+            return self.__type_storage[type_id]
+        except KeyError:
+            pass
+        if not self.__is_type_selected(type_id):
+            raise TypeFetchError(type_id)
+        compressed = self.__fetch_entry(self.__type_index, type_id)
+        if compressed is None:
+            raise TypeFetchError(type_id)
+        item_type = self._compose(Type, compressed)
+        self.__type_storage[type_id] = item_type
+        return item_type
+
+    def get_attr(self, attr_id):
+        try:
+            attr_id = int(attr_id)
+        except TypeError as e:
+            raise AttrFetchError(attr_id) from e
+        try:
+            return self.__attr_storage[attr_id]
+        except KeyError:
+            pass
+        compressed = self.__fetch_entry(self.__attr_index, attr_id)
+        if compressed is None:
+            raise AttrFetchError(attr_id)
+        attr = self._compose(Attribute, compressed)
+        self.__attr_storage[attr_id] = attr
+        return attr
+
+    def get_effect(self, effect_id):
+        try:
+            effect_id = int(effect_id)
+        except TypeError as e:
+            raise EffectFetchError(effect_id) from e
+        try:
+            return self.__effect_storage[effect_id]
+        except KeyError:
+            pass
+        compressed = self.__fetch_entry(self.__effect_index, effect_id)
+        if compressed is None:
+            raise EffectFetchError(effect_id)
+        effect = self._compose(Effect, compressed)
+        self.__effect_storage[effect_id] = effect
+        return effect
+
+    def preload(self):
+        for index, getter in (
+            (self.__effect_index, self.get_effect),
+            (self.__type_index, self.get_type),
+            (self.__attr_index, self.get_attr)
+        ):
+            for entry_id in self.__iter_entry_ids(index):
+                try:
+                    getter(entry_id)
+                # Item types might be filtered out
+                except TypeFetchError:
+                    pass
+
+    def set_type_filter(self, type_filter):
+        self.__type_filter = type_filter
+        self.__selected_type_ids = None
+        self.__type_storage.clear()
+
+    def get_fingerprint(self):
+        return self.__fingerprint
+
+    def update_cache(self, eve_objects, fingerprint, build_snapshot=None):
+        # Binary cache is always rewritten as a whole, thus there is no need to
+        # store build snapshot
+        types, attrs, effects = eve_objects
+        self.__write_persistent_cache(
+            [(t.id, t.compress()) for t in types],
+            [(a.id, a.compress()) for a in attrs],
+            [(e.id, e.compress()) for e in effects],
+            fingerprint)
+        self.__open_persistent_cache()
+
+    def __fetch_entry(self, index, entry_id):
+        """Find compressed entry with passed ID in persistent cache.
+
+        Returns:
+            Compressed entry, or None if it cannot be found.
+        """
+        index_offset, entry_count = index
+        data = self.__mmap
+        low = 0
+        high = entry_count - 1
+        # Binary search over sorted fixed-size index records
+        while low <= high:
+            middle = (low + high) // 2
+            record_id, payload_offset, payload_len = INDEX_RECORD.unpack_from(
+                data, index_offset + middle * INDEX_RECORD.size)
+            if record_id < entry_id:
+                low = middle + 1
+            elif record_id > entry_id:
+                high = middle - 1
+            else:
+                payload = data[payload_offset:payload_offset + payload_len]
+                return json.loads(payload.decode('utf-8'))
+        return None
+
+    def __iter_entry_ids(self, index):
+        index_offset, entry_count = index
+        for position in range(entry_count):
+            yield INDEX_RECORD.unpack_from(
+                self.__mmap, index_offset + position * INDEX_RECORD.size)[0]
+
+    def __is_type_selected(self, type_id):
+        if self.__type_filter is None:
+            return True
+        if self.__selected_type_ids is None:
+            types = {}
+            for entry_id in self.__iter_entry_ids(self.__type_index):
+                types[entry_id] = self.__fetch_entry(
+                    self.__type_index, entry_id)
+            self.__selected_type_ids = self.__type_filter.select(types)[0]
+        return type_id in self.__selected_type_ids
+
+    def __open_persistent_cache(self):
+        """Map persistent cache file into memory and read its header."""
+        self.__close_persistent_cache()
+        # If cache file doesn't exist, bail out - we have nothing to read
+        if not os.path.exists(self._cache_path):
+            return
+        try:
+            with open(self._cache_path, 'rb') as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            (
+                magic, format_version, fingerprint_len,
+                type_offset, type_count,
+                attr_offset, attr_count,
+                effect_offset, effect_count
+            ) = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or format_version != FORMAT_VERSION:
+                raise ValueError('unexpected cache file header')
+            fingerprint = data[
+                HEADER.size:HEADER.size + fingerprint_len].decode('utf-8')
+        except KeyboardInterrupt:
+            raise
+        # If file is empty, has unknown format, or anything else bad happens,
+        # leave cache empty
+        except Exception:
+            msg = 'error during reading cache'
+            logger.error(msg)
+        else:
+            self.__mmap = data
+            self.__fingerprint = fingerprint
+            self.__type_index = (type_offset, type_count)
+            self.__attr_index = (attr_offset, attr_count)
+            self.__effect_index = (effect_offset, effect_count)
+
+    def __close_persistent_cache(self):
+        """Unmap persistent cache and forget everything decoded from it."""
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
+        self.__fingerprint = None
+        self.__type_index = (0, 0)
+        self.__attr_index = (0, 0)
+        self.__effect_index = (0, 0)
+        self.__type_storage.clear()
+        self.__attr_storage.clear()
+        self.__effect_storage.clear()
+        self.__selected_type_ids = None
+
+    def __write_persistent_cache(self, types, attrs, effects, fingerprint):
+        """Write passed compressed data to persistent storage.
+
+        File is written under temporary name and then moved over old one, as
+        truncating file which is mapped into memory by other processes would
+        break them.
+        """
+        cache_folder = os.path.dirname(self._cache_path)
+        if os.path.isdir(cache_folder) is not True:
+            os.makedirs(cache_folder, mode=0o755)
+        fingerprint = fingerprint.encode('utf-8')
+        sections = []
+        for entries in (types, attrs, effects):
+            payloads = [
+                (entry_id, json.dumps(compressed).encode('utf-8'))
+                for entry_id, compressed in sorted(entries, key=lambda e: e[0])]
+            sections.append(payloads)
+        # Lay out indices right after fingerprint, and payloads after indices
+        position = HEADER.size + len(fingerprint)
+        index_offsets = []
+        for payloads in sections:
+            index_offsets.append(position)
+            position += len(payloads) * INDEX_RECORD.size
+        # Temporary file name has to be unique, as cache might be written by
+        # multiple threads or processes at once
+        fd, tmp_path = tempfile.mkstemp(
+            dir=cache_folder,
+            prefix='{}.'.format(os.path.basename(self._cache_path)),
+            suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(HEADER.pack(
+                    MAGIC, FORMAT_VERSION, len(fingerprint),
+                    index_offsets[0], len(sections[0]),
+                    index_offsets[1], len(sections[1]),
+                    index_offsets[2], len(sections[2])))
+                file.write(fingerprint)
+                payload_offset = position
+                for payloads in sections:
+                    for entry_id, payload in payloads:
+                        file.write(INDEX_RECORD.pack(
+                            entry_id, payload_offset, len(payload)))
+                        payload_offset += len(payload)
+                for payloads in sections:
+                    for _, payload in payloads:
+                        file.write(payload)
+            # Temporary files are accessible only by their owner
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self._cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def __repr__(self):
+        spec = [['cache_path', '_cache_path']]
+        return make_repr_str(self, spec)
@@ -19,45 +19,98 @@
 # ==============================================================================
 
 
-import bz2
 import json
 import os.path
+import weakref
+from collections import namedtuple
 from logging import getLogger
 
 from eos.eve_object.attribute import Attribute
 from eos.eve_object.effect import Effect
 from eos.eve_object.type import Type
+from eos.util.lru_storage import LruStorage
 from eos.util.repr import make_repr_str
 from .base import BaseCacheHandler
 from .exception import AttrFetchError, EffectFetchError, TypeFetchError
+from .stream_writer import AtomicStreamWriter, check_codec, read_payload
 
 
 logger = getLogger(__name__)
 
 
+ObjectCount = namedtuple('ObjectCount', ('types', 'attrs', 'effects'))
+
+# Version of persistent cache layout. Cache file starts with header line with
+# format version, fingerprint, payload codec and payload size in plain JSON,
+# which is followed by compressed payload
+FORMAT_VERSION = 2
+# Codec of payload of caches written before codec became configurable
+DEFAULT_CODEC = 'bz2'
+# Quantity of bytes reserved in header line for digits of payload size
+HEADER_SIZE_SLACK = 20
+
+
 class JsonCacheHandler(BaseCacheHandler):
     """JSON cache storage implementation.
 
     This cache handler implements persistent cache store in the form of
     compressed JSON. When data is loaded, eve objects are stored in memory, thus
     it provides extremely fast access, but has subpar initialization time and
-    memory consumption.
+    memory consumption. Fingerprint of data is stored separately from the
+    payload, and payload is loaded only when eve objects are requested for the
+    first time, thus rejecting outdated cache is cheap.
+
+    In lazy mode, data is kept in memory in compressed form, and eve objects
+    are composed out of it only when they are requested for the first time.
 
     Args:
         cache_path: File path where persistent cache will be stored (.json.bz2).
+        lazy (optional): Compose eve objects on demand or not. By default, all
+            objects are composed when data is loaded.
+        max_types (optional): Max quantity of item types kept composed in lazy
+            mode. When exceeded, least recently used item types are dropped.
+            Dropped item type which is still referenced elsewhere, e.g. by
+            fit item, is handed out again on next request; otherwise, it is
+            composed again. By default, item types are never dropped.
+        object_pool (optional): Pool to share eve objects with other cache
+            handlers through. By default, objects are not shared.
+        codec (optional): Name of codec payload is compressed with when cache
+            is written: 'none', 'zlib', 'lzma' or 'bz2'. Cache is read using
+            codec it was written with. By default, bz2 is used.
     """
 
-    def __init__(self, cache_path):
+    supports_partial_update = True
+
+    def __init__(
+            self, cache_path, lazy=False, max_types=None, object_pool=None,
+            codec=DEFAULT_CODEC):
+        check_codec(codec)
         self._cache_path = os.path.abspath(cache_path)
+        self._codec = codec
+        self._lazy = lazy
+        self._object_pool = object_pool
+        self.__type_filter = None
         # Initialize storage for objects
-        self.__type_storage = {}
+        if lazy:
+            self.__type_storage = LruStorage(max_types)
+        else:
+            self.__type_storage = {}
+        # Item types which are possibly evicted from storage, but still might
+        # be in use, to make sure they are not composed again
+        self.__type_refs = weakref.WeakValueDictionary()
         self.__attr_storage = {}
         self.__effect_storage = {}
-        self.__fingerprint = None
-        # Fill memory cache with data, if possible
-        self.__load_persistent_cache()
+        # Initialize storage for compressed data, used only in lazy mode
+        self.__type_data = {}
+        self.__attr_data = {}
+        self.__effect_data = {}
+        self.__fingerprint = self.__read_header()
+        # Payload is loaded into memory only when it is needed
+        self.__loaded = False
 
     def get_type(self, type_id):
+        if not self.__loaded:
+            self.__load_persistent_cache()
         try:
             type_id = int(type_id)
         except TypeError as e:
@@ -65,10 +118,22 @@ class JsonCacheHandler(BaseCacheHandler):
         try:
             item_type = self.__type_storage[type_id]
         except KeyError as e:
-            raise TypeFetchError(type_id) from e
+            if not self._lazy:
+                raise TypeFetchError(type_id) from e
+            item_type = self.__type_refs.get(type_id)
+            if item_type is None:
+                try:
+                    type_data = self.__type_data[type_id]
+                except KeyError as e:
+                    raise TypeFetchError(type_id) from e
+                item_type = self._compose(Type, type_data)
+                self.__type_refs[type_id] = item_type
+            self.__type_storage[type_id] = item_type
         return item_type
 
     def get_attr(self, attr_id):
+        if not self.__loaded:
+            self.__load_persistent_cache()
         try:
             attr_id = int(attr_id)
         except TypeError as e:
@@ -76,10 +141,19 @@ class JsonCacheHandler(BaseCacheHandler):
         try:
             attr = self.__attr_storage[attr_id]
         except KeyError as e:
-            raise AttrFetchError(attr_id) from e
+            if not self._lazy:
+                raise AttrFetchError(attr_id) from e
+            try:
+                attr_data = self.__attr_data[attr_id]
+            except KeyError as e:
+                raise AttrFetchError(attr_id) from e
+            attr = self._compose(Attribute, attr_data)
+            self.__attr_storage[attr_id] = attr
         return attr
 
     def get_effect(self, effect_id):
+        if not self.__loaded:
+            self.__load_persistent_cache()
         try:
             effect_id = int(effect_id)
         except TypeError as e:
@@ -87,20 +161,138 @@ class JsonCacheHandler(BaseCacheHandler):
         try:
             effect = self.__effect_storage[effect_id]
         except KeyError as e:
-            raise EffectFetchError(effect_id) from e
+            if not self._lazy:
+                raise EffectFetchError(effect_id) from e
+            try:
+                effect_data = self.__effect_data[effect_id]
+            except KeyError as e:
+                raise EffectFetchError(effect_id) from e
+            effect = self._compose(Effect, effect_data)
+            self.__effect_storage[effect_id] = effect
         return effect
 
+    def get_materialized_count(self):
+        """Get quantity of eve objects which are currently composed.
+
+        Returns:
+            Named tuple with quantities of item types, attributes and effects.
+        """
+        if not self.__loaded:
+            self.__load_persistent_cache()
+        return ObjectCount(
+            types=len(self.__type_storage),
+            attrs=len(self.__attr_storage),
+            effects=len(self.__effect_storage))
+
+    def preload(self):
+        if not self.__loaded:
+            self.__load_persistent_cache()
+        if self._lazy:
+            for effect_id in self.__effect_data:
+                self.get_effect(effect_id)
+            for type_id in self.__type_data:
+                self.get_type(type_id)
+            for attr_id in self.__attr_data:
+                self.get_attr(attr_id)
+            # Compressed data of objects which cannot be evicted is not needed
+            # anymore, release it
+            if self.__type_storage.capacity is None:
+                self.__type_data.clear()
+            self.__attr_data.clear()
+            self.__effect_data.clear()
+
+    def set_type_filter(self, type_filter):
+        self.__type_filter = type_filter
+        # Objects which are already in memory might be filtered out by new
+        # filter, thus data is loaded again on next request
+        if self.__loaded:
+            self.__loaded = False
+            self.__clear_memory_cache()
+
     def get_fingerprint(self):
         return self.__fingerprint
 
+    def get_build_snapshot(self):
+        # Snapshot is not kept in memory, as it is needed only when data is
+        # being rebuilt
+        cache_data = self.__read_persistent_cache()
+        if cache_data is None:
+            return None
+        return cache_data.get('build_snapshot')
+
     def __load_persistent_cache(self):
+        self.__loaded = True
+        cache_data = self.__read_persistent_cache()
+        # Load cache data into memory data cache, if everything went smooth
+        if cache_data is not None:
+            self.__update_memory_cache(cache_data)
+        # Header might be intact while payload is truncated or damaged; drop
+        # fingerprint in this case, so that data is rebuilt on next update
+        elif self.__fingerprint is not None:
+            msg = 'cache payload is unreadable, dropping fingerprint'
+            logger.warning(msg)
+            self.__fingerprint = None
+
+    def __read_header(self):
+        """Read header of persistent cache.
+
+        Returns:
+            Fingerprint of cached data, or None if it cannot be read.
+        """
         # If cache file doesn't exist, bail out - we have nothing to read
         if not os.path.exists(self._cache_path):
-            return
+            return None
         try:
-            with bz2.BZ2File(self._cache_path, 'r') as file:
-                json_cache_data = file.read().decode('utf-8')
-                cache_data = json.loads(json_cache_data)
+            with open(self._cache_path, 'rb') as file:
+                header = self.__parse_header(file)
+                payload_start = file.tell()
+        except KeyboardInterrupt:
+            raise
+        # If header cannot be parsed, or has unknown format, consider cache
+        # as absent
+        except Exception:
+            msg = 'error during reading cache'
+            logger.error(msg)
+            return None
+        # Caches written before payload size was stored in header are not
+        # checked
+        payload_size = header.get('payload_size')
+        if (
+            payload_size is not None and
+            os.path.getsize(self._cache_path) - payload_start != payload_size
+        ):
+            msg = 'cache payload size mismatch, considering cache as absent'
+            logger.error(msg)
+            return None
+        return header['fingerprint']
+
+    @staticmethod
+    def __parse_header(file):
+        """Parse header from passed binary file object.
+
+        After parsing, file position points to payload.
+        """
+        header = json.loads(file.readline().decode('utf-8'))
+        if header['format_version'] != FORMAT_VERSION:
+            raise ValueError('unexpected cache format version')
+        return header
+
+    def __read_persistent_cache(self):
+        """Read data from persistent storage.
+
+        Returns:
+            Cache data, or None if it cannot be read.
+        """
+        # If cache file doesn't exist, bail out - we have nothing to read
+        if not os.path.exists(self._cache_path):
+            return None
+        try:
+            with open(self._cache_path, 'rb') as file:
+                header = self.__parse_header(file)
+                payload = read_payload(
+                    file, header.get('codec', DEFAULT_CODEC))
+            cache_data = json.loads(payload.decode('utf-8'))
+            cache_data['fingerprint'] = header['fingerprint']
         except KeyboardInterrupt:
             raise
         # If file doesn't exist, JSON load errors occurs, or anything else bad
@@ -108,47 +300,144 @@ class JsonCacheHandler(BaseCacheHandler):
         except:
             msg = 'error during reading cache'
             logger.error(msg)
-        # Load cache data into memory data cache, if everything went smooth
-        else:
-            self.__update_memory_cache(cache_data)
+            return None
+        return cache_data
 
-    def update_cache(self, eve_objects, fingerprint):
+    def update_cache(self, eve_objects, fingerprint, build_snapshot=None):
         types, attrs, effects = eve_objects
         cache_data = {
             'types': [item_type.compress() for item_type in types],
             'attrs': [attr.compress() for attr in attrs],
             'effects': [effect.compress() for effect in effects],
             'fingerprint': fingerprint}
+        if build_snapshot is not None:
+            cache_data['build_snapshot'] = build_snapshot
         self.__update_persistent_cache(cache_data)
         self.__update_memory_cache(cache_data)
 
+    def update_cache_partial(
+            self, eve_objects, removed_ids, fingerprint, build_snapshot):
+        # Objects in memory might be customized, thus compressed data is taken
+        # from persistent storage
+        cache_data = self.__read_persistent_cache()
+        if cache_data is None:
+            cache_data = {'types': [], 'attrs': [], 'effects': []}
+        merged_data = {}
+        for key, objects, ids in zip(
+                ('types', 'attrs', 'effects'), eve_objects, removed_ids):
+            # Format: {object ID: compressed object}
+            entries = {data[0]: data for data in cache_data[key]}
+            for object_id in ids:
+                entries.pop(object_id, None)
+            for obj in objects:
+                entries[obj.id] = obj.compress()
+            merged_data[key] = list(entries.values())
+        merged_data['fingerprint'] = fingerprint
+        merged_data['build_snapshot'] = build_snapshot
+        self.__update_persistent_cache(merged_data)
+        self.__update_memory_cache(merged_data)
+
     def __update_persistent_cache(self, cache_data):
-        """Write passed data to persistent storage."""
-        cache_folder = os.path.dirname(self._cache_path)
-        if os.path.isdir(cache_folder) is not True:
-            os.makedirs(cache_folder, mode=0o755)
-        with bz2.BZ2File(self._cache_path, 'w') as file:
-            json_cache_data = json.dumps(cache_data)
-            file.write(json_cache_data.encode('utf-8'))
+        """Write passed data to persistent storage.
+
+        Payload is encoded and compressed entry by entry, to avoid keeping
+        whole encoded cache in memory. File is written under temporary name and
+        then moved over old one, to make sure that header never describes
+        payload it doesn't belong to, and that failed write doesn't damage
+        existing cache.
+        """
+        header = {
+            'format_version': FORMAT_VERSION,
+            'fingerprint': cache_data['fingerprint'],
+            'codec': self._codec,
+            'payload_size': 0}
+        payload = {k: v for k, v in cache_data.items() if k != 'fingerprint'}
+        # Size of payload is known only after it is written, thus room for
+        # header with any payload size is reserved, and header is written over
+        # it afterwards. Trailing whitespace is ignored by JSON parser
+        header_size = len(json.dumps(header)) + HEADER_SIZE_SLACK
+        with AtomicStreamWriter(self._cache_path, self._codec) as writer:
+            writer.write_raw(b' ' * header_size)
+            writer.write_raw(b'\n')
+            payload_start = writer.tell()
+            for chunk in self.__encode_payload(payload):
+                writer.write(chunk.encode('utf-8'))
+            writer.finish_payload()
+            header['payload_size'] = writer.tell() - payload_start
+            header_line = json.dumps(header).ljust(header_size)
+            writer.overwrite_raw(0, header_line.encode('utf-8'))
+
+    @staticmethod
+    def __encode_payload(payload):
+        """Encode passed payload as JSON object, piece by piece."""
+        yield '{'
+        for i, (key, value) in enumerate(payload.items()):
+            if i:
+                yield ', '
+            yield json.dumps(key)
+            yield ': '
+            # Lists of eve objects are encoded entry by entry
+            if key in ('types', 'attrs', 'effects'):
+                yield '['
+                for j, entry in enumerate(value):
+                    if j:
+                        yield ', '
+                    yield json.dumps(entry)
+                yield ']'
+            else:
+                yield json.dumps(value)
+        yield '}'
 
     def __update_memory_cache(self, cache_data):
         """Replace existing memory cache data with passed data."""
         # Clear storage to make sure objects composed from old data are gone
+        self.__clear_memory_cache()
+        if self.__type_filter is not None:
+            cache_data = self.__filter_cache_data(cache_data)
+        # In lazy mode, just keep compressed data around
+        if self._lazy:
+            for effect_data in cache_data['effects']:
+                self.__effect_data[effect_data[0]] = effect_data
+            for type_data in cache_data['types']:
+                self.__type_data[type_data[0]] = type_data
+            for attr_data in cache_data['attrs']:
+                self.__attr_data[attr_data[0]] = attr_data
+        else:
+            # Process effects first, as item types rely on effects being
+            # available
+            for effect_data in cache_data['effects']:
+                effect = self._compose(Effect, effect_data)
+                self.__effect_storage[effect.id] = effect
+            for type_data in cache_data['types']:
+                item_type = self._compose(Type, type_data)
+                self.__type_storage[item_type.id] = item_type
+            for attr_data in cache_data['attrs']:
+                attr = self._compose(Attribute, attr_data)
+                self.__attr_storage[attr.id] = attr
+        self.__fingerprint = cache_data['fingerprint']
+        self.__loaded = True
+
+    def __clear_memory_cache(self):
         self.__type_storage.clear()
+        self.__type_refs.clear()
         self.__attr_storage.clear()
         self.__effect_storage.clear()
-        # Process effects first, as item types rely on effects being available
-        for effect_data in cache_data['effects']:
-            effect = Effect.decompress(self, effect_data)
-            self.__effect_storage[effect.id] = effect
-        for type_data in cache_data['types']:
-            item_type = Type.decompress(self, type_data)
-            self.__type_storage[item_type.id] = item_type
-        for attr_data in cache_data['attrs']:
-            attr = Attribute.decompress(self, attr_data)
-            self.__attr_storage[attr.id] = attr
-        self.__fingerprint = cache_data['fingerprint']
+        self.__type_data.clear()
+        self.__attr_data.clear()
+        self.__effect_data.clear()
+
+    def __filter_cache_data(self, cache_data):
+        """Leave only data selected by type filter in passed cache data."""
+        types = {d[0]: d for d in cache_data['types']}
+        type_ids, effect_ids = self.__type_filter.select(types)
+        filtered_data = dict(cache_data)
+        filtered_data['types'] = [types[i] for i in type_ids]
+        filtered_data['effects'] = [
+            d for d in cache_data['effects'] if d[0] in effect_ids]
+        return filtered_data
 
     def __repr__(self):
-        spec = [['cache_path', '_cache_path']]
+        spec = [
+            ['cache_path', '_cache_path'], ['lazy', '_lazy'],
+            ['codec', '_codec']]
         return make_repr_str(self, spec)
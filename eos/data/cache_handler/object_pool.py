@@ -0,0 +1,207 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import hashlib
+import json
+import sys
+import weakref
+from collections import namedtuple
+from enum import Enum
+
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.type import Type
+from eos.util.repr import make_repr_str
+from .exception import CacheHandlerError
+
+
+PoolStats = namedtuple('PoolStats', ('objects', 'references', 'saved_bytes'))
+
+# Names of cache handler methods which provide eve objects of given classes
+CHILD_GETTERS = (
+    (Type, 'get_type'),
+    (Attribute, 'get_attr'),
+    (Effect, 'get_effect'))
+
+
+class ObjectPool:
+    """Storage of eve objects shared between multiple cache handlers.
+
+    Cache handlers which are given the same pool hand out the same eve object
+    for structurally identical entries, e.g. for item types which did not change
+    between Tranquility and Singularity. Objects are looked up by hash of their
+    compressed form, and shared object is handed out only when all shared
+    objects it refers to are what requesting cache handler provides as well,
+    thus item type is shared only when all its effects are shared. Eve object
+    is composed only when there is no such object in the pool. Pool does not
+    keep objects or cache handlers alive on its own - shared object is
+    forgotten as soon as no cache handler stores it.
+
+    Shared objects are used by multiple sources at once, so they must not be
+    modified.
+    """
+
+    def __init__(self):
+        # Format: {digest: [_PoolEntry]}
+        self.__entries = {}
+        # Format: {id(shared object): _PoolEntry}
+        self.__shared = {}
+
+    def share(self, cache_handler, cls, compressed):
+        """Get eve object for compressed data.
+
+        Args:
+            cache_handler: Cache handler which requests object. It is used to
+                compose object and to fetch objects it refers to.
+            cls: Class of eve object.
+            compressed: Compressed eve object.
+
+        Returns:
+            Eve object, which is shared with other cache handlers if any of them
+            has already requested identical object.
+        """
+        digest = self.__get_digest(cls, compressed)
+        for entry in self.__entries.get(digest, ()):
+            shared = entry.ref()
+            if shared is None:
+                continue
+            if self.__provides_children(cache_handler, entry.children):
+                entry.users.add(cache_handler)
+                return shared
+        eve_object = cls.decompress(cache_handler, compressed)
+        size, children = self.__inspect(eve_object)
+        ref = weakref.ref(
+            eve_object, lambda r, d=digest: self.__forget(d, r))
+        users = weakref.WeakSet((cache_handler,))
+        entry = _PoolEntry(ref, id(eve_object), children, users, size)
+        self.__entries.setdefault(digest, []).append(entry)
+        self.__shared[id(eve_object)] = entry
+        return eve_object
+
+    def get_stats(self):
+        """Get statistics of object sharing.
+
+        Returns:
+            Named tuple with quantity of shared objects, quantity of references
+            to them from cache handlers, and approximate quantity of memory in
+            bytes which would be taken by duplicate objects if they were not
+            shared.
+        """
+        objects = 0
+        references = 0
+        saved_bytes = 0
+        for entries in self.__entries.values():
+            for entry in entries:
+                objects += 1
+                users = len(entry.users)
+                references += users
+                saved_bytes += max(users - 1, 0) * entry.size
+        return PoolStats(
+            objects=objects,
+            references=references,
+            saved_bytes=saved_bytes)
+
+    def __forget(self, digest, ref):
+        entries = self.__entries.get(digest, ())
+        for entry in entries:
+            if entry.ref is ref:
+                break
+        else:
+            return
+        entries.remove(entry)
+        if not entries:
+            del self.__entries[digest]
+        del self.__shared[entry.obj_id]
+
+    @staticmethod
+    def __provides_children(cache_handler, children):
+        """Check if cache handler provides passed shared objects."""
+        for child in children:
+            for child_cls, getter_name in CHILD_GETTERS:
+                if isinstance(child, child_cls):
+                    break
+            else:
+                return False
+            try:
+                provided = getattr(cache_handler, getter_name)(child.id)
+            except CacheHandlerError:
+                return False
+            if provided is not child:
+                return False
+        return True
+
+    def __inspect(self, eve_object):
+        """Walk over eve object's data.
+
+        Returns:
+            Tuple with approximate size of the object in bytes, and tuple with
+            shared objects it refers to. Referred shared objects are not
+            included into the size.
+        """
+        size = 0
+        children = []
+        seen = set()
+        stack = [eve_object]
+        while stack:
+            obj = stack.pop()
+            obj_id = id(obj)
+            if obj_id in seen:
+                continue
+            seen.add(obj_id)
+            if obj is not eve_object and obj_id in self.__shared:
+                children.append(obj)
+                continue
+            if obj is None or isinstance(obj, (bool, Enum, type)):
+                continue
+            size += sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (tuple, list, set, frozenset)):
+                stack.extend(obj)
+            elif type(obj).__module__.startswith('eos.'):
+                obj_dict = getattr(obj, '__dict__', None)
+                if obj_dict is not None:
+                    stack.append(obj_dict)
+        return size, tuple(children)
+
+    @staticmethod
+    def __get_digest(cls, compressed):
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(cls.__qualname__.encode('utf-8'))
+        hasher.update(json.dumps(
+            compressed, separators=(',', ':')).encode('utf-8'))
+        return hasher.digest()
+
+    def __repr__(self):
+        return make_repr_str(self)
+
+
+class _PoolEntry:
+
+    def __init__(self, ref, obj_id, children, users, size):
+        self.ref = ref
+        self.obj_id = obj_id
+        # Shared objects which shared object refers to
+        self.children = children
+        # Format: WeakSet({cache handler})
+        self.users = users
+        self.size = size
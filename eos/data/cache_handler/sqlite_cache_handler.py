@@ -0,0 +1,313 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import json
+import os
+import os.path
+import threading
+from logging import getLogger
+
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.type import Type
+from eos.util.lru_storage import LruStorage
+from eos.util.repr import make_repr_str
+from .base import BaseCacheHandler
+from .exception import AttrFetchError, EffectFetchError, TypeFetchError
+
+
+logger = getLogger(__name__)
+
+
+# Statements are kept constant, which lets sqlite3 module reuse prepared
+# statements from its statement cache
+SELECT_TYPE = 'SELECT data FROM types WHERE type_id = ?'
+SELECT_TYPES = 'SELECT data FROM types'
+SELECT_ATTR = 'SELECT data FROM attrs WHERE attr_id = ?'
+SELECT_EFFECT = 'SELECT data FROM effects WHERE effect_id = ?'
+SELECT_METADATA = 'SELECT field_value FROM metadata WHERE field_name = ?'
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS metadata ('
+    'field_name TEXT PRIMARY KEY, field_value TEXT)',
+    'CREATE TABLE IF NOT EXISTS types ('
+    'type_id INTEGER PRIMARY KEY, data TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS attrs ('
+    'attr_id INTEGER PRIMARY KEY, data TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS effects ('
+    'effect_id INTEGER PRIMARY KEY, data TEXT NOT NULL)')
+
+
+class SQLiteCacheHandler(BaseCacheHandler):
+    """SQLite cache storage implementation.
+
+    Compressed eve objects are stored in SQLite database, one row per object,
+    and are composed only when requested. Composed objects are kept in bounded
+    in-process storage. Single database file can serve multiple processes,
+    each of them keeping only small amount of data in memory.
+
+    Args:
+        cache_path: File path where persistent cache will be stored (.db).
+        lru_size (optional): Max quantity of composed objects of each kind
+            (item types, attributes, effects) kept in memory. When exceeded,
+            least recently used objects are dropped. None means no limit.
+        object_pool (optional): Pool to share eve objects with other cache
+            handlers through. By default, objects are not shared.
+    """
+
+    supports_partial_update = True
+
+    def __init__(self, cache_path, lru_size=5000, object_pool=None):
+        self._cache_path = os.path.abspath(cache_path)
+        self._object_pool = object_pool
+        # Each thread uses its own connection, to keep transactions of
+        # threads which update and read cache at once apart. PID of process
+        # which opened connection is stored along with it, as connection
+        # cannot be shared with forked processes
+        self.__local = threading.local()
+        self.__type_storage = LruStorage(lru_size)
+        self.__attr_storage = LruStorage(lru_size)
+        self.__effect_storage = LruStorage(lru_size)
+        self.__type_filter = None
+        # IDs of item types selected by type filter, calculated on first
+        # request
+        self.__selected_type_ids = None
+
+    def get_type(self, type_id):
+        try:
+            type_id = int(type_id)
+        except TypeError as e:
+            raise TypeFetchError(type_id) from e
+        try:
+            return self.__type_storage[type_id]
+        except KeyError:
+            pass
+        if not self.__is_type_selected(type_id):
+            raise TypeFetchError(type_id)
+        type_data = self.__fetch_entry(SELECT_TYPE, type_id)
+        if type_data is None:
+            raise TypeFetchError(type_id)
+        item_type = self._compose(Type, type_data)
+        self.__type_storage[type_id] = item_type
+        return item_type
+
+    def get_attr(self, attr_id):
+        try:
+            attr_id = int(attr_id)
+        except TypeError as e:
+            raise AttrFetchError(attr_id) from e
+        try:
+            return self.__attr_storage[attr_id]
+        except KeyError:
+            pass
+        attr_data = self.__fetch_entry(SELECT_ATTR, attr_id)
+        if attr_data is None:
+            raise AttrFetchError(attr_id)
+        attr = self._compose(Attribute, attr_data)
+        self.__attr_storage[attr_id] = attr
+        return attr
+
+    def get_effect(self, effect_id):
+        try:
+            effect_id = int(effect_id)
+        except TypeError as e:
+            raise EffectFetchError(effect_id) from e
+        try:
+            return self.__effect_storage[effect_id]
+        except KeyError:
+            pass
+        effect_data = self.__fetch_entry(SELECT_EFFECT, effect_id)
+        if effect_data is None:
+            raise EffectFetchError(effect_id)
+        effect = self._compose(Effect, effect_data)
+        self.__effect_storage[effect_id] = effect
+        return effect
+
+    def set_type_filter(self, type_filter):
+        self.__type_filter = type_filter
+        self.__clear_memory_cache()
+
+    def get_fingerprint(self):
+        return self.__fetch_metadata('fingerprint')
+
+    def get_build_snapshot(self):
+        build_snapshot = self.__fetch_metadata('build_snapshot')
+        if build_snapshot is None:
+            return None
+        return json.loads(build_snapshot)
+
+    def update_cache(self, eve_objects, fingerprint, build_snapshot=None):
+        conn = self.__get_connection(create=True)
+        with conn:
+            for table_name in ('types', 'attrs', 'effects'):
+                conn.execute('DELETE FROM {}'.format(table_name))
+            conn.execute(
+                'DELETE FROM metadata WHERE field_name = ?',
+                ('build_snapshot',))
+            self.__write_entries(
+                conn, eve_objects, fingerprint, build_snapshot)
+        self.__clear_memory_cache()
+
+    def update_cache_partial(
+            self, eve_objects, removed_ids, fingerprint, build_snapshot):
+        type_ids, attr_ids, effect_ids = removed_ids
+        conn = self.__get_connection(create=True)
+        with conn:
+            conn.executemany(
+                'DELETE FROM types WHERE type_id = ?',
+                ((i,) for i in type_ids))
+            conn.executemany(
+                'DELETE FROM attrs WHERE attr_id = ?',
+                ((i,) for i in attr_ids))
+            conn.executemany(
+                'DELETE FROM effects WHERE effect_id = ?',
+                ((i,) for i in effect_ids))
+            self.__write_entries(
+                conn, eve_objects, fingerprint, build_snapshot)
+        self.__clear_memory_cache()
+
+    def __write_entries(self, conn, eve_objects, fingerprint, build_snapshot):
+        """Write passed eve objects and metadata using passed connection."""
+        types, attrs, effects = eve_objects
+        conn.executemany(
+            'INSERT OR REPLACE INTO types (type_id, data) VALUES (?, ?)',
+            ((t.id, json.dumps(t.compress())) for t in types))
+        conn.executemany(
+            'INSERT OR REPLACE INTO attrs (attr_id, data) VALUES (?, ?)',
+            ((a.id, json.dumps(a.compress())) for a in attrs))
+        conn.executemany(
+            'INSERT OR REPLACE INTO effects (effect_id, data) VALUES (?, ?)',
+            ((e.id, json.dumps(e.compress())) for e in effects))
+        metadata = [('fingerprint', fingerprint)]
+        if build_snapshot is not None:
+            metadata.append(('build_snapshot', json.dumps(build_snapshot)))
+        conn.executemany(
+            'INSERT OR REPLACE INTO metadata (field_name, field_value) '
+            'VALUES (?, ?)', metadata)
+
+    def __clear_memory_cache(self):
+        """Make sure objects composed from old data are gone."""
+        self.__type_storage.clear()
+        self.__attr_storage.clear()
+        self.__effect_storage.clear()
+        self.__selected_type_ids = None
+
+    def __is_type_selected(self, type_id):
+        if self.__type_filter is None:
+            return True
+        if self.__selected_type_ids is None:
+            self.__selected_type_ids = self.__select_types()
+        return type_id in self.__selected_type_ids
+
+    def __select_types(self):
+        """Get IDs of item types selected by type filter."""
+        import sqlite3
+        conn = self.__get_connection()
+        if conn is None:
+            return set()
+        try:
+            rows = conn.execute(SELECT_TYPES).fetchall()
+        except sqlite3.DatabaseError:
+            msg = 'error during reading cache'
+            logger.error(msg)
+            return set()
+        types = {}
+        for (type_data,) in rows:
+            type_data = json.loads(type_data)
+            types[type_data[0]] = type_data
+        return self.__type_filter.select(types)[0]
+
+    def __fetch_entry(self, statement, entry_id):
+        """Fetch compressed entry using passed statement.
+
+        Returns:
+            Compressed entry, or None if it cannot be found.
+        """
+        import sqlite3
+        conn = self.__get_connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(statement, (entry_id,)).fetchone()
+        except sqlite3.DatabaseError:
+            msg = 'error during reading cache'
+            logger.error(msg)
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def __fetch_metadata(self, field_name):
+        import sqlite3
+        conn = self.__get_connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(SELECT_METADATA, (field_name,)).fetchone()
+        except sqlite3.DatabaseError:
+            msg = 'error during reading cache'
+            logger.error(msg)
+            return None
+        if row is None:
+            return None
+        return row[0]
+
+    def __get_connection(self, create=False):
+        """Get connection to cache database.
+
+        Args:
+            create (optional): If True, database and its schema are created if
+                they do not exist yet.
+
+        Returns:
+            Connection object, or None if database doesn't exist and it wasn't
+            requested to be created.
+        """
+        # SQLite module is imported only when cache is accessed, to keep
+        # import of eos cheap
+        import sqlite3
+        local = self.__local
+        pid = os.getpid()
+        conn = getattr(local, 'conn', None)
+        # Connection inherited from parent process cannot be used, open new
+        # one instead
+        if conn is not None and local.pid != pid:
+            conn = None
+        if conn is None:
+            if not create and not os.path.exists(self._cache_path):
+                return None
+            cache_folder = os.path.dirname(self._cache_path)
+            if os.path.isdir(cache_folder) is not True:
+                os.makedirs(cache_folder, mode=0o755)
+            conn = local.conn = sqlite3.connect(self._cache_path)
+            local.pid = pid
+        if create:
+            # Let readers in other threads and processes keep working while
+            # cache is being updated
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+        return conn
+
+    def __repr__(self):
+        spec = [['cache_path', '_cache_path']]
+        return make_repr_str(self, spec)
@@ -0,0 +1,216 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import importlib
+import os
+import os.path
+import tempfile
+
+
+# Format: {codec name: name of stdlib module which implements it}
+CODEC_MODULES = {
+    'none': None,
+    'zlib': 'zlib',
+    'lzma': 'lzma',
+    'bz2': 'bz2'}
+
+# Size of chunks compressed data is read in
+READ_CHUNK_SIZE = 1024 * 1024
+# Size of chunks data is compressed in; small pieces of data are accumulated
+# until chunk of this size is collected, as compressing each piece separately
+# is slow
+WRITE_CHUNK_SIZE = 256 * 1024
+
+
+def _get_codec_module(codec):
+    try:
+        module_name = CODEC_MODULES[codec]
+    except KeyError:
+        raise ValueError('unknown codec "{}"'.format(codec))
+    if module_name is None:
+        return None
+    # Codec modules are imported only when they are used, as some of them are
+    # expensive to import
+    return importlib.import_module(module_name)
+
+
+def check_codec(codec):
+    """Raise ValueError if passed codec is not supported."""
+    _get_codec_module(codec)
+
+
+def make_compressor(codec):
+    """Make incremental compressor for passed codec.
+
+    Returns:
+        Compressor object with compress() and flush() methods, or None if data
+        should be written as-is.
+    """
+    module = _get_codec_module(codec)
+    if module is None:
+        return None
+    if codec == 'zlib':
+        return module.compressobj()
+    if codec == 'lzma':
+        return module.LZMACompressor()
+    return module.BZ2Compressor()
+
+
+def make_decompressor(codec):
+    """Make incremental decompressor for passed codec.
+
+    Returns:
+        Decompressor object with decompress() method, or None if data was
+        written as-is.
+    """
+    module = _get_codec_module(codec)
+    if module is None:
+        return None
+    if codec == 'zlib':
+        return module.decompressobj()
+    if codec == 'lzma':
+        return module.LZMADecompressor()
+    return module.BZ2Decompressor()
+
+
+def read_payload(file, codec):
+    """Read the rest of passed binary file and decompress it.
+
+    Returns:
+        Decompressed payload as bytes.
+    """
+    decompressor = make_decompressor(codec)
+    if decompressor is None:
+        return file.read()
+    chunks = []
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        chunks.append(decompressor.decompress(chunk))
+    return b''.join(chunks)
+
+
+class AtomicStreamWriter:
+    """Write file in chunks, replacing target file only when writing succeeds.
+
+    Data is written to temporary file in the same folder, which is moved over
+    target file once writer is closed without errors; thus, crash in the middle
+    of writing leaves old file intact. Should be used as context manager.
+
+    Args:
+        path: Path to target file.
+        codec (optional): Name of codec which is used to compress data written
+            via write() method.
+    """
+
+    def __init__(self, path, codec='none'):
+        self.path = path
+        self.__compressor = make_compressor(codec)
+        self.__tmp_path = None
+        self.__file = None
+        self.__buffer = []
+        self.__buffer_size = 0
+        self.__finished = False
+
+    def __enter__(self):
+        folder = os.path.dirname(self.path)
+        if os.path.isdir(folder) is not True:
+            os.makedirs(folder, mode=0o755)
+        # Temporary file name has to be unique, as the same file might be
+        # written by multiple threads or processes at once
+        fd, self.__tmp_path = tempfile.mkstemp(
+            dir=folder, prefix='{}.'.format(os.path.basename(self.path)),
+            suffix='.tmp')
+        self.__file = os.fdopen(fd, 'wb')
+        return self
+
+    def write_raw(self, data):
+        """Write passed bytes as-is, without compressing them."""
+        self.__flush_buffer()
+        self.__file.write(data)
+
+    def write(self, data):
+        """Compress passed bytes and write them."""
+        if self.__finished:
+            raise ValueError('payload is already finished')
+        self.__buffer.append(data)
+        self.__buffer_size += len(data)
+        if self.__buffer_size >= WRITE_CHUNK_SIZE:
+            self.__flush_buffer()
+
+    def tell(self):
+        """Get quantity of bytes written to file so far.
+
+        Data which was passed to write() method, but not compressed yet, is not
+        accounted for; use finish_payload() to make sure it is written.
+        """
+        return self.__file.tell()
+
+    def finish_payload(self):
+        """Compress and write all data passed to write() method.
+
+        Compressed stream is finalized, thus write() cannot be used afterwards.
+        """
+        self.__flush_buffer()
+        if self.__compressor is not None:
+            self.__file.write(self.__compressor.flush())
+        self.__compressor = None
+        self.__finished = True
+
+    def overwrite_raw(self, offset, data):
+        """Write passed bytes as-is over data at passed offset."""
+        position = self.__file.tell()
+        self.__file.seek(offset)
+        self.__file.write(data)
+        self.__file.seek(position)
+
+    def __flush_buffer(self):
+        if not self.__buffer:
+            return
+        data = b''.join(self.__buffer)
+        self.__buffer = []
+        self.__buffer_size = 0
+        if self.__compressor is not None:
+            data = self.__compressor.compress(data)
+        self.__file.write(data)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        file = self.__file
+        succeeded = False
+        try:
+            if exc_type is None:
+                if not self.__finished:
+                    self.finish_payload()
+                file.flush()
+                # Make sure data is on disk before it replaces old file
+                os.fsync(file.fileno())
+                succeeded = True
+        finally:
+            self.__file = None
+            file.close()
+            if succeeded:
+                # Temporary files are accessible only by their owner
+                os.chmod(self.__tmp_path, 0o644)
+                os.replace(self.__tmp_path, self.path)
+            else:
+                os.remove(self.__tmp_path)
+        return False
@@ -0,0 +1,97 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.const.eve import AttrId, TypeGroupId
+from eos.eve_object.type.type import SKILLRQ_ATTRS
+from eos.util.repr import make_repr_str
+
+
+class TypeFilter:
+    """Policy which selects item types cache handler should provide.
+
+    Item type is selected if it matches any of passed categories, groups or
+    type IDs. Item types from character group are always selected, as fits
+    cannot work without character. Besides selected item types, cache handler
+    provides their effects, item types of ammo they have loaded by default and
+    item types of skills they require.
+    Attributes are never filtered out, as fit services request their metadata
+    regardless of item types.
+
+    Args:
+        category_ids (optional): Iterable with IDs of categories of item types
+            to select.
+        group_ids (optional): Iterable with IDs of groups of item types to
+            select.
+        type_ids (optional): Iterable with IDs of item types to select.
+    """
+
+    def __init__(self, category_ids=(), group_ids=(), type_ids=()):
+        self.category_ids = frozenset(category_ids)
+        self.group_ids = frozenset(group_ids).union((TypeGroupId.character,))
+        self.type_ids = frozenset(type_ids)
+
+    def matches(self, type_id, group_id, category_id):
+        """Check if item type is selected by the policy itself."""
+        return (
+            type_id in self.type_ids or
+            group_id in self.group_ids or
+            category_id in self.category_ids)
+
+    def select(self, types):
+        """Find out which item types and effects should be provided.
+
+        Args:
+            types: Map with all compressed item types in {type ID: compressed
+                item type} format.
+
+        Returns:
+            Tuple with 2 sets, which contain IDs of selected item types and
+            effects.
+        """
+        type_ids = set()
+        effect_ids = set()
+        type_worklist = [
+            type_id for type_id, type_data in types.items()
+            if self.matches(type_id, type_data[1], type_data[2])]
+        while type_worklist:
+            type_id = type_worklist.pop()
+            if type_id in type_ids:
+                continue
+            type_data = types.get(type_id)
+            if type_data is None:
+                continue
+            type_ids.add(type_id)
+            for attr_id, value in type_data[3]:
+                # Ammo loaded by default has to be available along with item
+                # type which loads it
+                if attr_id == AttrId.ammo_loaded:
+                    type_worklist.append(int(value))
+                # Skill requirements are checked against skill item types
+                elif attr_id in SKILLRQ_ATTRS:
+                    type_worklist.append(int(value))
+            effect_ids.update(type_data[4])
+            if type_data[5] is not None:
+                effect_ids.add(type_data[5])
+        return type_ids, effect_ids
+
+    def __repr__(self):
+        spec = ['category_ids', 'group_ids', 'type_ids']
+        return make_repr_str(self, spec)
@@ -20,10 +20,19 @@
 
 
 __all__ = [
+    'ArchiveDataHandler',
     'JsonDataHandler',
+    'JsonStreamDataHandler',
     'SQLiteDataHandler'
 ]
 
 
-from .json_data_handler import JsonDataHandler
-from .sqlite_data_handler import SQLiteDataHandler
+from eos.util.lazy_import import make_lazy_attrs
+
+
+# Handlers are imported only when they are requested
+__getattr__, __dir__ = make_lazy_attrs(globals(), {
+    'ArchiveDataHandler': '.archive_data_handler',
+    'JsonDataHandler': '.json_data_handler',
+    'JsonStreamDataHandler': '.json_stream_data_handler',
+    'SQLiteDataHandler': '.sqlite_data_handler'})
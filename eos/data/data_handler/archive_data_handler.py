@@ -0,0 +1,118 @@
+# ==============================================================================
+# Copyright (C) 2013-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import codecs
+import io
+import os.path
+from contextlib import contextmanager
+
+from eos.util.repr import make_repr_str
+from .json_stream_data_handler import JsonStreamDataHandler
+
+
+# Text decoder for binary files of archive members, which do not need to be
+# seekable unlike with io.TextIOWrapper
+_utf8_reader = codecs.getreader('utf8')
+
+# Names of files data handler reads
+MEMBER_NAMES = frozenset('{}.json'.format(filename) for filename in (
+    'evetypes',
+    'evegroups',
+    'dgmattribs',
+    'dgmtypeattribs',
+    'dgmeffects',
+    'dgmtypeeffects',
+    'dgmexpressions',
+    'fighterabilitiesbytype',
+    'phbmetadata'))
+
+
+class ArchiveDataHandler(JsonStreamDataHandler):
+    """Archive data handler implementation.
+
+    Loads raw data from JSON files produced by Phobos script, which are packed
+    into zip or tar archive (tar can be compressed with any codec tarfile
+    module supports, e.g. xz). Files are decompressed and parsed on the fly,
+    without extracting them to disk; like with streaming JSON data handler,
+    rows are yielded one by one. Files are looked up by their names, thus they
+    may be placed in any folder within the archive.
+
+    Args:
+        archive_path: Path to archive file.
+        chunk_size (optional): Quantity of characters read from file at once.
+    """
+
+    def __init__(self, archive_path, chunk_size=65536):
+        self.archive_path = os.path.abspath(archive_path)
+        self.chunk_size = chunk_size
+        # Contents of files read from tar archive
+        # Format: {member name: bytes}
+        self.__tar_members = None
+
+    @contextmanager
+    def _open_file(self, filename):
+        member_name = '{}.json'.format(filename)
+        # Archive modules are imported only when they are used
+        import zipfile
+        if zipfile.is_zipfile(self.archive_path):
+            with zipfile.ZipFile(self.archive_path) as archive:
+                for info in archive.infolist():
+                    if os.path.basename(info.filename) == member_name:
+                        with archive.open(info) as file:
+                            yield _utf8_reader(file)
+                        return
+        else:
+            if self.__tar_members is None:
+                self.__tar_members = self.__read_tar()
+            member_data = self.__tar_members.get(member_name)
+            if member_data is not None:
+                with io.BytesIO(member_data) as file:
+                    yield _utf8_reader(file)
+                return
+        raise FileNotFoundError('archive has no file {}'.format(member_name))
+
+    def __read_tar(self):
+        """Read files needed by data handler from tar archive.
+
+        Compressed tar archives do not support seeking without decompressing
+        them from the start, thus all needed files are read into memory in
+        one pass over the archive, which is read in stream mode.
+
+        Returns:
+            Map in {member name: bytes} format.
+        """
+        import tarfile
+        members = {}
+        with tarfile.open(self.archive_path, mode='r|*') as archive:
+            for info in archive:
+                member_name = os.path.basename(info.name)
+                if (
+                    not info.isfile() or
+                    member_name not in MEMBER_NAMES or
+                    member_name in members
+                ):
+                    continue
+                with archive.extractfile(info) as file:
+                    members[member_name] = file.read()
+        return members
+
+    def __repr__(self):
+        spec = ['archive_path']
+        return make_repr_str(self, spec)
@@ -0,0 +1,106 @@
+# ==============================================================================
+# Copyright (C) 2013-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import os.path
+from collections.abc import Mapping
+
+from eos.util.json_stream import iter_json_container
+from eos.util.repr import make_repr_str
+from .base import BaseDataHandler
+
+
+class JsonStreamDataHandler(BaseDataHandler):
+    """Streaming JSON data handler implementation.
+
+    Loads raw data from the same JSON files produced by Phobos script as
+    JsonDataHandler does, but instead of loading whole file into memory, parses
+    it incrementally and yields rows one by one. Peak memory consumption does
+    not depend on size of files this way.
+
+    Args:
+        basepath: Path to folder with JSON files.
+        chunk_size (optional): Quantity of characters read from file at once.
+    """
+
+    def __init__(self, basepath, chunk_size=65536):
+        self.basepath = os.path.abspath(basepath)
+        self.chunk_size = chunk_size
+
+    def get_evetypes(self):
+        return self.__iter_file('evetypes', values_only=True)
+
+    def get_evegroups(self):
+        return self.__iter_file('evegroups', values_only=True)
+
+    def get_dgmattribs(self):
+        return self.__iter_file('dgmattribs')
+
+    def get_dgmtypeattribs(self):
+        return self.__iter_file('dgmtypeattribs')
+
+    def get_dgmeffects(self):
+        return self.__iter_file('dgmeffects')
+
+    def get_dgmtypeeffects(self):
+        return self.__iter_file('dgmtypeeffects')
+
+    def get_dgmexpressions(self):
+        return self.__iter_file('dgmexpressions')
+
+    def get_typefighterabils(self):
+        fighter_abils = self.__iter_file('fighterabilitiesbytype')
+        for type_id, type_abilities in fighter_abils:
+            type_id = int(type_id)
+            for ability_data in type_abilities.values():
+                ability_row = {'typeID': type_id}
+                self.__collapse_dict(ability_data, ability_row)
+                yield ability_row
+
+    def _open_file(self, filename):
+        """Open JSON file with passed name as text file object."""
+        filepath = os.path.join(self.basepath, '{}.json'.format(filename))
+        return open(filepath, mode='r', encoding='utf8')
+
+    def __iter_file(self, filename, values_only=False):
+        with self._open_file(filename) as file:
+            for element in iter_json_container(file, self.chunk_size):
+                if values_only:
+                    yield element[1]
+                else:
+                    yield element
+
+    def __collapse_dict(self, src, tgt):
+        """Convert multi-level dictionary to single-level one."""
+        for k, v in src.items():
+            if isinstance(v, Mapping):
+                self.__collapse_dict(v, tgt)
+            elif k not in tgt:
+                tgt[k] = v
+
+    def get_version(self):
+        for row in self.__iter_file('phbmetadata'):
+            if row['field_name'] == 'client_build':
+                return row['field_value']
+        else:
+            return None
+
+    def __repr__(self):
+        spec = ['basepath']
+        return make_repr_str(self, spec)
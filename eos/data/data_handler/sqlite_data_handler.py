@@ -18,32 +18,70 @@
 # ==============================================================================
 
 
-import sqlite3
-
 from eos.util.repr import make_repr_str
 from .base import BaseDataHandler
 
 
+# Columns eve object builder consumes, other columns are not fetched
+# Format: {table name: (column names)}
+TABLE_COLUMNS = {
+    'evetypes': (
+        'typeID', 'groupID', 'radius', 'mass', 'volume', 'capacity'),
+    'evegroups': ('groupID', 'categoryID'),
+    'dgmattribs': (
+        'attributeID', 'maxAttributeID', 'defaultValue', 'highIsGood',
+        'stackable'),
+    'dgmtypeattribs': ('typeID', 'attributeID', 'value'),
+    'dgmeffects': (
+        'effectID', 'effectCategory', 'isOffensive', 'isAssistance',
+        'durationAttributeID', 'dischargeAttributeID', 'rangeAttributeID',
+        'falloffAttributeID', 'trackingSpeedAttributeID',
+        'fittingUsageChanceAttributeID', 'preExpression', 'postExpression',
+        'modifierInfo'),
+    'dgmtypeeffects': ('typeID', 'effectID', 'isDefault'),
+    'dgmexpressions': (
+        'expressionID', 'operandID', 'arg1', 'arg2', 'expressionValue',
+        'expressionTypeID', 'expressionGroupID', 'expressionAttributeID'),
+    'fighterabilitiesbytype': (
+        'typeID', 'abilityID', 'cooldownSeconds', 'chargeCount',
+        'rearmTimeSeconds')}
+
+
 class SQLiteDataHandler(BaseDataHandler):
     """
     SQLite data handler implementation.
 
     Handler for loading data from SQLite database. Data should be in Phobos-like
-    format, for details on it refer to JSON data handler doc string.
+    format, for details on it refer to JSON data handler doc string. Fighter
+    abilities are expected to be in fighterabilitiesbytype table, with one
+    flattened row per ability. Only columns eve object builder uses are
+    fetched, and rows are yielded in batches straight from database cursor.
 
     Args:
         db_path: Path to database file.
+        batch_size (optional): Quantity of rows fetched from database at once.
+        prefilter (optional): If True, item types which do not belong to
+            categories and groups eve object builder always keeps are skipped
+            by database, along with their attributes, effects and abilities.
+            Builder would drop most of them anyway, but item types referenced
+            only by other entities are lost this way too. By default, all item
+            types are fetched.
     """
 
-    def __init__(self, db_path):
+    def __init__(self, db_path, batch_size=1000, prefilter=False):
+        # SQLite module is imported only when handler is used, to keep import
+        # of eos cheap
+        import sqlite3
         # SQLite stores bools as 0 or 1, convert them to python bool
         sqlite3.register_converter('BOOLEAN', lambda v: int(v) == 1)
-        conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        conn.row_factory = sqlite3.Row
-        self.cursor = conn.cursor()
+        self.conn = sqlite3.connect(
+            db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.cursor = self.conn.cursor()
+        self.batch_size = batch_size
+        self.prefilter = prefilter
 
     def get_evetypes(self):
-        return self.__fetch_table('evetypes')
+        return self.__fetch_table('evetypes', self.__get_type_condition())
 
     def get_evegroups(self):
         return self.__fetch_table('evegroups')
@@ -52,20 +90,97 @@ class SQLiteDataHandler(BaseDataHandler):
         return self.__fetch_table('dgmattribs')
 
     def get_dgmtypeattribs(self):
-        return self.__fetch_table('dgmtypeattribs')
+        return self.__fetch_table(
+            'dgmtypeattribs', self.__get_aux_condition())
 
     def get_dgmeffects(self):
         return self.__fetch_table('dgmeffects')
 
     def get_dgmtypeeffects(self):
-        return self.__fetch_table('dgmtypeeffects')
+        return self.__fetch_table(
+            'dgmtypeeffects', self.__get_aux_condition())
 
     def get_dgmexpressions(self):
         return self.__fetch_table('dgmexpressions')
 
-    def __fetch_table(self, tablename):
-        self.cursor.execute('SELECT * FROM {}'.format(tablename))
-        return [dict(row) for row in self.cursor]
+    def get_typefighterabils(self):
+        # Older exports have no fighter abilities
+        if not self.__get_column_names('fighterabilitiesbytype'):
+            return iter(())
+        return self.__fetch_table(
+            'fighterabilitiesbytype', self.__get_aux_condition())
+
+    def __fetch_table(self, table_name, condition=None):
+        """Fetch rows of a table, yielding them one by one.
+
+        Args:
+            table_name: Name of table to fetch rows from.
+            condition (optional): Tuple with SQL condition and its parameters,
+                rows which do not satisfy it are not fetched.
+        """
+        # Some of columns might be absent in older exports
+        existing_columns = self.__get_column_names(table_name)
+        column_names = [
+            c for c in TABLE_COLUMNS[table_name] if c in existing_columns]
+        statement = 'SELECT {} FROM {}'.format(
+            ', '.join(column_names), table_name)
+        params = ()
+        if condition is not None:
+            statement = '{} WHERE {}'.format(statement, condition[0])
+            params = condition[1]
+        return self.__iter_rows(statement, params, column_names)
+
+    def __iter_rows(self, statement, params, column_names):
+        # Each table gets its own cursor, thus tables can be read concurrently
+        cursor = self.conn.execute(statement, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(column_names, row))
+        finally:
+            cursor.close()
+
+    def __get_column_names(self, table_name):
+        cursor = self.conn.execute('PRAGMA table_info({})'.format(table_name))
+        return {row[1] for row in cursor}
+
+    def __get_type_condition(self):
+        """Compose SQL condition which selects rows of strong item types.
+
+        Returns:
+            Tuple with condition over groupID column and its parameters, or
+            None if pre-filtering is disabled.
+        """
+        if not self.prefilter:
+            return None
+        # Builder is imported only when pre-filtering is requested
+        from eos.data.eve_obj_builder.cleaner import (
+            STRONG_CATEGORY_IDS, STRONG_GROUP_IDS)
+        condition = (
+            'groupID IN (SELECT groupID FROM evegroups '
+            'WHERE categoryID IN ({})) OR groupID IN ({})'
+        ).format(
+            ', '.join('?' * len(STRONG_CATEGORY_IDS)),
+            ', '.join('?' * len(STRONG_GROUP_IDS)))
+        params = tuple(int(i) for i in STRONG_CATEGORY_IDS + STRONG_GROUP_IDS)
+        return condition, params
+
+    def __get_aux_condition(self):
+        """Compose SQL condition which selects rows of auxiliary tables.
+
+        Returns:
+            Tuple with condition over typeID column and its parameters, or None
+            if pre-filtering is disabled.
+        """
+        type_condition = self.__get_type_condition()
+        if type_condition is None:
+            return None
+        condition = 'typeID IN (SELECT typeID FROM evetypes WHERE {})'.format(
+            type_condition[0])
+        return condition, type_condition[1]
 
     def get_version(self):
         self.cursor.execute(
@@ -77,4 +192,5 @@ class SQLiteDataHandler(BaseDataHandler):
             return None
 
     def __repr__(self):
-        return make_repr_str(self)
+        spec = ['batch_size', 'prefilter']
+        return make_repr_str(self, spec)
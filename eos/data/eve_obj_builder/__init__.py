@@ -20,3 +20,4 @@
 
 
 from .builder import EveObjBuilder
+from .snapshot import BuildSnapshot
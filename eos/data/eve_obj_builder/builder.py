@@ -19,10 +19,12 @@
 # ==============================================================================
 
 
-from eos.util.frozendict import frozendict
 from .cleaner import Cleaner
 from .converter import Converter
+from .mod_builder import ModInfoCache
 from .normalizer import Normalizer
+from .snapshot import BuildSnapshot
+from .table import Table
 from .validator_preclean import ValidatorPreClean
 from .validator_preconv import ValidatorPreConv
 
@@ -31,7 +33,7 @@ class EveObjBuilder:
     """Builds Eos-specific eve objects from passed data."""
 
     @staticmethod
-    def run(data_handler):
+    def run(data_handler, processes=None, mod_info_memo_path=None):
         """Run eve object building process.
 
         Use data provided by passed cache handler to compose various objects
@@ -40,15 +42,100 @@ class EveObjBuilder:
         Args:
             data_handler: Data handler instance, which should provide access to
                 raw eve data.
+            processes (optional): Quantity of processes which should be used to
+                build modifiers for effects, which is the most expensive part of
+                the process. Results do not depend on it. By default, all the
+                work is done in current process.
+            mod_info_memo_path (optional): Path to file where parsed modifier
+                info is stored between builds. By default, it is not stored.
 
         Returns:
             3 iterables, which contain types, attributes and effects.
         """
-        # Put all the data we need into single dictionary Format, as usual,
-        # {table name: table}, where table is set of rows, which are
-        # represented by frozendicts {fieldName: fieldValue}. Combination of
-        # sets and frozendicts is used to speed up several stages of the
-        # builder.
+        mod_info_cache = ModInfoCache(mod_info_memo_path)
+        data = EveObjBuilder._load_data(data_handler)
+        EveObjBuilder._prepare_data(data, mod_info_cache)
+        # Convert data into Eos-specific objects
+        types, attrs, effects = Converter.run(
+            data, processes=processes, mod_info_cache=mod_info_cache)
+        mod_info_cache.save()
+        return types, attrs, effects
+
+    @staticmethod
+    def run_incremental(
+            data_handler, prev_snapshot, processes=None,
+            mod_info_memo_path=None):
+        """Run eve object building process for changed data only.
+
+        Data is compared against snapshot of data which was used to build
+        previous version of eve objects, and only eve objects which are
+        affected by changes are converted.
+
+        Args:
+            data_handler: Data handler instance, which should provide access to
+                raw eve data.
+            prev_snapshot: Snapshot of data previous version of eve objects was
+                built from. If None, all eve objects are built.
+            processes (optional): Quantity of processes which should be used to
+                build modifiers for effects.
+            mod_info_memo_path (optional): Path to file where parsed modifier
+                info is stored between builds.
+
+        Returns:
+            Tuple with 3 elements: 3 iterables with built types, attributes and
+            effects; 3 iterables with IDs of types, attributes and effects which
+            are not available anymore; snapshot of current data.
+        """
+        mod_info_cache = ModInfoCache(mod_info_memo_path)
+        data = EveObjBuilder._load_data(data_handler)
+        snapshot = BuildSnapshot.from_data(data)
+        # Cleanup removes references to removed attributes and effects, thus
+        # record which item types refer them before it happens
+        # Format: {attribute ID: {type IDs}}
+        attr_users = {}
+        for _, type_id, attr_id in data['dgmtypeattribs'].iter_values(
+                'typeID', 'attributeID'):
+            attr_users.setdefault(attr_id, set()).add(type_id)
+        # Format: {effect ID: {type IDs}}
+        effect_users = {}
+        for _, type_id, effect_id in data['dgmtypeeffects'].iter_values(
+                'typeID', 'effectID'):
+            effect_users.setdefault(effect_id, set()).add(type_id)
+        EveObjBuilder._prepare_data(data, mod_info_cache)
+        snapshot.type_ids = {
+            v for _, v in data['evetypes'].iter_values('typeID')}
+        snapshot.attr_ids = {
+            v for _, v in data['dgmattribs'].iter_values('attributeID')}
+        snapshot.effect_ids = {
+            v for _, v in data['dgmeffects'].iter_values('effectID')}
+        if prev_snapshot is None:
+            eve_objects = Converter.run(
+                data, processes=processes, mod_info_cache=mod_info_cache)
+            mod_info_cache.save()
+            return eve_objects, ((), (), ()), snapshot
+        affected_ids = EveObjBuilder._get_affected_ids(
+            data, snapshot.get_changed_entities(prev_snapshot), prev_snapshot,
+            snapshot, attr_users, effect_users)
+        eve_objects = Converter.run(
+            data, processes=processes, ids=affected_ids,
+            mod_info_cache=mod_info_cache)
+        mod_info_cache.save()
+        removed_ids = (
+            prev_snapshot.type_ids.difference(snapshot.type_ids),
+            prev_snapshot.attr_ids.difference(snapshot.attr_ids),
+            prev_snapshot.effect_ids.difference(snapshot.effect_ids))
+        return eve_objects, removed_ids, snapshot
+
+    @staticmethod
+    def _load_data(data_handler):
+        """Fetch all the data we need from data handler.
+
+        Returns:
+            Dictionary in {table name: table} format.
+        """
+        # Put all the data we need into single dictionary. Tables store data
+        # column-wise and refer rows by their IDs, which makes it cheap for
+        # builder stages to scan, filter and look rows up
         data = {}
         getter_map = {
             'evetypes': data_handler.get_evetypes,
@@ -61,18 +148,27 @@ class EveObjBuilder:
             'typefighterabils': data_handler.get_typefighterabils}
 
         for table_name, getter in getter_map.items():
-            table_pos = 0
-            table = set()
+            table = Table()
+            # Rows are consumed one by one, thus when data handler yields them
+            # lazily, raw row is dropped as soon as it is stored in the table
             for row in getter():
                 # During further builder stages. some of rows may fall in risk
                 # groups, where all rows but one need to be removed. To
                 # deterministically remove rows based on position in original
                 # data, write position to each row
-                row['table_pos'] = table_pos
-                table_pos += 1
-                table.add(frozendict(row))
+                row_id = table.add_row(row)
+                table.set(row_id, 'table_pos', row_id)
             data[table_name] = table
+        return data
 
+    @staticmethod
+    def _prepare_data(data, mod_info_cache):
+        """Get data ready for conversion.
+
+        Args:
+            data: Dictionary in {table name: table} format.
+            mod_info_cache: Cache of parsed modifier info.
+        """
         # Run pre-cleanup checks, as cleanup stage and further stages rely on
         # some assumptions about the data
         ValidatorPreClean.run(data)
@@ -82,12 +178,80 @@ class EveObjBuilder:
         Normalizer.run(data)
 
         # Remove unwanted data
-        Cleaner().clean(data)
+        Cleaner(mod_info_cache).clean(data)
 
         # Verify that our data is ready for conversion
         ValidatorPreConv.run(data)
 
-        # Convert data into Eos-specific objects
-        types, attrs, effects = Converter.run(data)
+    @staticmethod
+    def _get_affected_ids(
+            data, changes, prev_snapshot, snapshot, attr_users, effect_users):
+        """Find out which eve objects are affected by data changes.
 
-        return types, attrs, effects
+        Args:
+            data: Dictionary in {table name: table} format, with data
+                ready for conversion.
+            changes: Map in {table name: {changed entity IDs}} format.
+            prev_snapshot: Snapshot of data previous eve objects were built
+                from.
+            snapshot: Snapshot of current data.
+            attr_users: Map in {attribute ID: {type IDs}} format, composed out
+                of data before cleanup.
+            effect_users: Map in {effect ID: {type IDs}} format, composed out
+                of data before cleanup.
+
+        Returns:
+            Tuple with sets of IDs of item types, attributes and effects which
+            have to be converted.
+        """
+        # Entities which appeared or disappeared after cleanup
+        toggled_type_ids = snapshot.type_ids.symmetric_difference(
+            prev_snapshot.type_ids)
+        toggled_attr_ids = snapshot.attr_ids.symmetric_difference(
+            prev_snapshot.attr_ids)
+        toggled_effect_ids = snapshot.effect_ids.symmetric_difference(
+            prev_snapshot.effect_ids)
+        # Attributes are defined by their own rows only
+        attr_ids = changes['dgmattribs'].union(toggled_attr_ids)
+        # Effects are defined by their rows and expression trees they refer
+        effect_ids = changes['dgmeffects'].union(toggled_effect_ids)
+        changed_exp_ids = changes['dgmexpressions']
+        if changed_exp_ids:
+            # Format: {expression ID: (arg1, arg2)}
+            exp_args = {
+                exp_id: (arg1, arg2)
+                for _, exp_id, arg1, arg2 in data['dgmexpressions'].iter_values(
+                    'expressionID', 'arg1', 'arg2')}
+            for _, effect_id, pre_exp_id, post_exp_id in (
+                data['dgmeffects'].iter_values(
+                    'effectID', 'preExpression', 'postExpression')
+            ):
+                exp_ids = {pre_exp_id, post_exp_id}
+                to_visit = set(exp_ids)
+                while to_visit:
+                    for arg in exp_args.get(to_visit.pop(), ()):
+                        if arg is not None and arg not in exp_ids:
+                            exp_ids.add(arg)
+                            to_visit.add(arg)
+                if not changed_exp_ids.isdisjoint(exp_ids):
+                    effect_ids.add(effect_id)
+        # Item types are defined by their rows, rows of tables which complement
+        # them, their groups and set of effects they have
+        type_ids = toggled_type_ids.union(
+            changes['evetypes'], changes['dgmtypeattribs'],
+            changes['dgmtypeeffects'], changes['typefighterabils'])
+        changed_group_ids = changes['evegroups']
+        for _, type_id, group_id in data['evetypes'].iter_values(
+                'typeID', 'groupID'):
+            if group_id in changed_group_ids:
+                type_ids.add(type_id)
+        for attr_id in toggled_attr_ids:
+            type_ids.update(attr_users.get(attr_id, ()))
+        # Item types carry data derived from their effects, e.g. max state,
+        # thus they have to be rebuilt when any of their effects changes
+        for effect_id in effect_ids:
+            type_ids.update(effect_users.get(effect_id, ()))
+        return (
+            type_ids.intersection(snapshot.type_ids),
+            attr_ids.intersection(snapshot.attr_ids),
+            effect_ids.intersection(snapshot.effect_ids))
@@ -19,20 +19,76 @@
 # ==============================================================================
 
 
-import yaml
 from collections.abc import Iterable
-from itertools import chain
 from logging import getLogger
 
 from eos.const.eve import AttrId, TypeCategoryId, TypeGroupId
-from eos.util.cached_property import cached_property
+from .mod_builder import ModInfoCache
+from .mod_builder.exception import YamlParsingError
+from .table import ROW_LIVE, ROW_TRASHED
 
 
 logger = getLogger(__name__)
 
 
+# Format: {source table: {source column: (target table, target column)}}
+FOREIGN_KEYS = {
+    'dgmattribs': {
+        'maxAttributeID': ('dgmattribs', 'attributeID')},
+    'dgmeffects': {
+        'preExpression': ('dgmexpressions', 'expressionID'),
+        'postExpression': ('dgmexpressions', 'expressionID'),
+        'durationAttributeID': ('dgmattribs', 'attributeID'),
+        'trackingSpeedAttributeID': ('dgmattribs', 'attributeID'),
+        'dischargeAttributeID': ('dgmattribs', 'attributeID'),
+        'rangeAttributeID': ('dgmattribs', 'attributeID'),
+        'falloffAttributeID': ('dgmattribs', 'attributeID'),
+        'fittingUsageChanceAttributeID': ('dgmattribs', 'attributeID')},
+    'dgmexpressions': {
+        'arg1': ('dgmexpressions', 'expressionID'),
+        'arg2': ('dgmexpressions', 'expressionID'),
+        'expressionTypeID': ('evetypes', 'typeID'),
+        'expressionGroupID': ('evegroups', 'groupID'),
+        'expressionAttributeID': ('dgmattribs', 'attributeID')},
+    'dgmtypeattribs': {
+        'typeID': ('evetypes', 'typeID'),
+        'attributeID': ('dgmattribs', 'attributeID')},
+    'dgmtypeeffects': {
+        'typeID': ('evetypes', 'typeID'),
+        'effectID': ('dgmeffects', 'effectID')},
+    'evetypes': {
+        'groupID': ('evegroups', 'groupID')},
+    'typefighterabils': {
+        'typeID': ('evetypes', 'typeID')}}
+
+# Tables which complement item types with data or map them to other entities
+AUX_TABLES = ('dgmtypeattribs', 'dgmtypeeffects', 'typefighterabils')
+
+# Categories and groups of item types which are always kept
+STRONG_CATEGORY_IDS = (
+    TypeCategoryId.charge,
+    TypeCategoryId.drone,
+    TypeCategoryId.fighter,
+    TypeCategoryId.implant,
+    TypeCategoryId.module,
+    TypeCategoryId.ship,
+    TypeCategoryId.skill,
+    TypeCategoryId.subsystem)
+STRONG_GROUP_IDS = (TypeGroupId.character, TypeGroupId.effect_beacon)
+
+
 class Cleaner:
-    """Removes unnecessary data."""
+    """Removes unnecessary data.
+
+    Args:
+        mod_info_cache (optional): Cache of parsed modifier info, which may be
+            shared with other builder stages. By default, new one is created.
+    """
+
+    def __init__(self, mod_info_cache=None):
+        if mod_info_cache is None:
+            mod_info_cache = ModInfoCache()
+        self.mod_info_cache = mod_info_cache
 
     def clean(self, data):
         """Remove unnecessary data.
@@ -41,202 +97,134 @@ class Cleaner:
         relationships hardcoded in class' methods.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
         """
         self.data = data
         # Container to store signs of so-called strong data, such rows are
-        # immune to removal. Dictionary structure is the same as structure of
-        # general data container
+        # immune to removal
+        # Format: {table name: {row IDs}}
         self.strong_data = {}
         # Move some rows to strong data container
         self._pump_evetypes()
-        # Also contains data in the very same format, but tables/rows in this
-        # table are considered as pending for removal
-        self.trashed_data = {}
+        # Rows which are pending for removal are marked as trashed in their
+        # tables
         self._autocleanup()
         self._report_results()
 
     def _pump_evetypes(self):
         """Mark some hardcoded item types as strong."""
-        # Tuple with category IDs of item types we want to keep
-        strong_category_ids = (
-            TypeCategoryId.charge,
-            TypeCategoryId.drone,
-            TypeCategoryId.fighter,
-            TypeCategoryId.implant,
-            TypeCategoryId.module,
-            TypeCategoryId.ship,
-            TypeCategoryId.skill,
-            TypeCategoryId.subsystem)
         # Set with group IDs of item types we want to keep
-        strong_group_ids = {TypeGroupId.character, TypeGroupId.effect_beacon}
+        strong_group_ids = set(STRONG_GROUP_IDS)
         # Go through table data, filling valid groups set according to valid
         # categories
-        for datarow in self.data['evegroups']:
-            if datarow.get('categoryID') in strong_category_ids:
-                strong_group_ids.add(datarow['groupID'])
+        for _, group_id, category_id in self.data['evegroups'].iter_values(
+                'groupID', 'categoryID'):
+            if category_id in STRONG_CATEGORY_IDS:
+                strong_group_ids.add(group_id)
         rows_to_pump = set()
-        for datarow in self.data['evetypes']:
-            if datarow.get('groupID') in strong_group_ids:
-                rows_to_pump.add(datarow)
+        for row_id, group_id in self.data['evetypes'].iter_values('groupID'):
+            if group_id in strong_group_ids:
+                rows_to_pump.add(row_id)
         self._pump_data('evetypes', rows_to_pump)
 
     def _autocleanup(self):
         """Run auto-cleanup"""
         self._kill_weak()
-        self._changed = True
-        # Cycle as long as we have changes during previous iteration. We need
-        # this because contents of even evetypes may change, which, in turn,
-        # will need to pull additional data into other tables
-        while self._changed is True:
-            self._changed = False
-            self._reanimate_auxiliary_friends()
-            self._reestablish_broken_relationships()
+        # Worklist with rows whose references have not been followed yet
+        # Format: {table name: [row IDs]}
+        worklist = {
+            table_name: table.ids() for table_name, table in self.data.items()}
+        # References which have already been followed. As rows only get
+        # restored, and never get trashed again during this stage, following
+        # each reference once is enough
+        # Format: {(target table name, target column name, value)}
+        followed_refs = set()
+        while worklist:
+            table_name, row_ids = worklist.popitem()
+            for tgt_table_name, tgt_column_name, values in self._get_refs(
+                    table_name, row_ids):
+                tgt_table = self.data[tgt_table_name]
+                for value in values:
+                    # If there's no such field in a row or it is None, this is
+                    # not a valid reference
+                    if value is None:
+                        continue
+                    ref = (tgt_table_name, tgt_column_name, value)
+                    if ref in followed_refs:
+                        continue
+                    followed_refs.add(ref)
+                    to_restore = tgt_table.lookup(
+                        tgt_column_name, value, ROW_TRASHED)
+                    if to_restore:
+                        self._restore_data(tgt_table_name, to_restore)
+                        worklist.setdefault(tgt_table_name, []).extend(
+                            to_restore)
 
     def _kill_weak(self):
         """Trash all data which isn't marked as strong."""
         for table_name, table in self.data.items():
-            to_trash = set()
             strong_rows = self.strong_data.get(table_name, set())
-            to_trash.update(table.difference(strong_rows))
+            to_trash = [
+                row_id for row_id in table.ids() if row_id not in strong_rows]
             self._trash_data(table_name, to_trash)
 
-    def _reanimate_auxiliary_friends(self):
-        """Move auxiliary rows from trash into actual data.
-
-        Restore rows in tables, which complement evetypes or serve as m:n
-        mapping between evetypes and other tables.
-        """
-        # As we filter whole database using evetypes table, gather type IDs we
-        # currently have in there
-        type_ids = {row['typeID'] for row in self.data['evetypes']}
-        # Auxiliary tables are those which do not define any entities, they just
-        # map one entities to others or complement entities with additional data
-        aux_tables = ('dgmtypeattribs', 'dgmtypeeffects', 'typefighterabils')
-        for table_name in aux_tables:
-            to_restore = set()
-            # Restore rows which map other entities to types
-            for row in self.trashed_data[table_name]:
-                if row['typeID'] in type_ids:
-                    to_restore.add(row)
-            if to_restore:
-                self._changed = True
-                self._restore_data(table_name, to_restore)
-
-    def _reestablish_broken_relationships(self):
-        """Restore all trashed rows which are referenced from actual data."""
-        # Container for 'target data', matches with which are going to be
-        # restored
-        # Format: {(target table name, target column name): {values to have}}}
-        tgt_data = {}
-        self._get_tgts_relational(tgt_data)
-        self._get_tgts_yaml(tgt_data)
-        self._get_tgts_default_ammo(tgt_data)
-        # Now, when we have all the target data values, we may look for rows,
-        # which have matching values, and restore them
-        for tgt_spec, tgt_values in tgt_data.items():
-            tgt_table_name, tgt_column_name = tgt_spec
-            to_restore = set()
-            for row in self.trashed_data[tgt_table_name]:
-                if row.get(tgt_column_name) in tgt_values:
-                    to_restore.add(row)
-            if to_restore:
-                self._changed = True
-                self._restore_data(tgt_table_name, to_restore)
-
-    def _get_tgts_relational(self, tgt_data):
-        """Find out which data relationally is referenced from actual data.
-
-        In this method, we get only references defined in 'relational' format,
-        that is, references defined as foreign keys. Foreign keys scheme is
-        hardcoded in this method and needs to be updated if it changes.
+    def _get_refs(self, table_name, row_ids):
+        """Find out which data is referenced by rows.
 
         Args:
-            tgt_data: Dictionary which will be filled during the process. Its
-                contents should specify target field and which values this field
-                should have.
+            table_name: Name of table which contains the rows.
+            row_ids: IDs of the rows.
+
+        Yields:
+            Tuples in (target table name, target column name, values) format,
+            which specify data which should be kept along with the rows.
         """
-        # Format: {source table: {source column: (target table, target column)}}
-        foreign_keys = {
-            'dgmattribs': {
-                'maxAttributeID': ('dgmattribs', 'attributeID')},
-            'dgmeffects': {
-                'preExpression': ('dgmexpressions', 'expressionID'),
-                'postExpression': ('dgmexpressions', 'expressionID'),
-                'durationAttributeID': ('dgmattribs', 'attributeID'),
-                'trackingSpeedAttributeID': ('dgmattribs', 'attributeID'),
-                'dischargeAttributeID': ('dgmattribs', 'attributeID'),
-                'rangeAttributeID': ('dgmattribs', 'attributeID'),
-                'falloffAttributeID': ('dgmattribs', 'attributeID'),
-                'fittingUsageChanceAttributeID': ('dgmattribs', 'attributeID')},
-            'dgmexpressions': {
-                'arg1': ('dgmexpressions', 'expressionID'),
-                'arg2': ('dgmexpressions', 'expressionID'),
-                'expressionTypeID': ('evetypes', 'typeID'),
-                'expressionGroupID': ('evegroups', 'groupID'),
-                'expressionAttributeID': ('dgmattribs', 'attributeID')},
-            'dgmtypeattribs': {
-                'typeID': ('evetypes', 'typeID'),
-                'attributeID': ('dgmattribs', 'attributeID')},
-            'dgmtypeeffects': {
-                'typeID': ('evetypes', 'typeID'),
-                'effectID': ('dgmeffects', 'effectID')},
-            'evetypes': {
-                'groupID': ('evegroups', 'groupID')},
-            'typefighterabils': {
-                'typeID': ('evetypes', 'typeID')}}
-        for src_table_name, table_fks in foreign_keys.items():
-            for src_column_name, fk_tgt in table_fks.items():
-                tgt_table_name, tgt_column_name = fk_tgt
-                for row in self.data[src_table_name]:
-                    fk_value = row.get(src_column_name)
-                    # If there's no such field in a row or it is None, this is
-                    # not a valid FK reference
-                    if fk_value is None:
-                        continue
-                    tgt_spec = (tgt_table_name, tgt_column_name)
-                    tgt_data.setdefault(tgt_spec, set()).add(fk_value)
+        table = self.data[table_name]
+        # Relational references, which are defined as foreign keys
+        for src_column_name, tgt_spec in FOREIGN_KEYS.get(
+                table_name, {}).items():
+            yield tgt_spec + (table.get_values(row_ids, src_column_name),)
+        if table_name == 'evetypes':
+            # Auxiliary tables are those which do not define any entities, they
+            # just map one entities to others or complement entities with
+            # additional data. Keep rows which map other entities to types
+            type_ids = table.get_values(row_ids, 'typeID')
+            for aux_table_name in AUX_TABLES:
+                yield (aux_table_name, 'typeID', type_ids)
+        elif table_name == 'dgmeffects':
+            for effect_id, mod_infos_yaml in zip(
+                table.get_values(row_ids, 'effectID'),
+                table.get_values(row_ids, 'modifierInfo')
+            ):
+                yield from self._get_refs_yaml(effect_id, mod_infos_yaml)
+        elif table_name == 'dgmtypeattribs':
+            yield self._get_refs_default_ammo(table, row_ids)
 
-    def _get_tgts_yaml(self, tgt_data):
-        """Find out which data is referenced from YAML in actual data.
+    def _get_refs_yaml(self, effect_id, mod_infos_yaml):
+        """Find out which data is referenced from YAML of an effect.
 
         Method knows where to look for YAML data and which references it
         contains. If YAML data format is somehow changed, this method also needs
         to be updated.
 
         Args:
-            tgt_data: Dictionary which will be filled during the process. Its
-                contents should specify target field and which values this field
-                should have.
-        """
-        for effect_row in self.data['dgmeffects']:
-            effect_id = effect_row['effectID']
-            try:
-                relations = self._yaml_modinfo_relations[effect_id]
-            except KeyError:
-                continue
-            type_ids, group_ids, attr_ids = relations
-            for references, tgt_table_name, tgt_column_name in (
-                (type_ids, 'evetypes', 'typeID'),
-                (group_ids, 'evegroups', 'groupID'),
-                (attr_ids, 'dgmattribs', 'attributeID')
-            ):
-                # If there're any references for given entity, add them to
-                # dictionary
-                if references:
-                    tgt_spec = (tgt_table_name, tgt_column_name)
-                    tgt_data.setdefault(tgt_spec, set()).update(references)
-
-    @cached_property
-    def _yaml_modinfo_relations(self):
-        """Helper method for YAML reference getter.
-
-        Generates auxiliary map to avoid re-parsing YAML on each cleanup cycle.
+            effect_id: ID of effect whose references should be returned.
+            mod_infos_yaml: String with YAML modifier data of the effect.
 
-        Returns:
-            Dictionary in {effect ID: ({type IDs}, {group IDs}, {attribute
-            IDs})} format.
+        Yields:
+            Tuples in (target table name, target column name, values) format.
         """
+        # We do not need anything here if modifier info is empty
+        if mod_infos_yaml is None:
+            return
+        # Skip row in case of any YAML parsing errors
+        try:
+            mod_infos = self.mod_info_cache.get(effect_id, mod_infos_yaml)
+        except YamlParsingError:
+            return
+        # Modifier infos should be basic python iterable
+        if not isinstance(mod_infos, Iterable):
+            return
 
         # Helper function to fetch actual attribute values from modinfo dicts
         def add_entity(mod_info, attr_name, entities):
@@ -247,73 +235,52 @@ class Cleaner:
             else:
                 entities.add(entity_id)
 
-        # Format: {effect ID: ({type IDs}, {group IDs}, {attribute IDs})}
-        relations = {}
-        # Cycle through both data and trashed data, to make sure all rows are
-        # processed regardless of stage during which this property is accessed
-        for effect_row in chain(
-            self.data['dgmeffects'],
-            self.trashed_data['dgmeffects']
-        ):
-            # We do not need anything here if modifier info is empty
-            mod_infos_yaml = effect_row.get('modifierInfo')
-            if mod_infos_yaml is None:
-                continue
-            # Skip row in case of any YAML parsing errors
-            try:
-                mod_infos = yaml.safe_load(mod_infos_yaml)
-            except KeyboardInterrupt:
-                raise
-            except:
-                continue
-            # Modifier infos should be basic python iterable
-            if not isinstance(mod_infos, Iterable):
-                continue
-            type_ids = set()
-            group_ids = set()
-            attr_ids = set()
-            # Fill in sets with IDs from each modifier info dict
-            for mod_info in mod_infos:
-                add_entity(mod_info, 'skillTypeID', type_ids)
-                add_entity(mod_info, 'groupID', group_ids)
-                add_entity(mod_info, 'modifyingAttributeID', attr_ids)
-                add_entity(mod_info, 'modifiedAttributeID', attr_ids)
-            # If all of the sets are empty, do not add anything to primary
-            # container
-            if not type_ids and not group_ids and not attr_ids:
-                continue
-            # Otherwise, add all the data we've gathered for current effect to
-            # container
-            relations[effect_row['effectID']] = (type_ids, group_ids, attr_ids)
-        return relations
-
-    def _get_tgts_default_ammo(self, tgt_data):
+        type_ids = set()
+        group_ids = set()
+        attr_ids = set()
+        # Fill in sets with IDs from each modifier info dict
+        for mod_info in mod_infos:
+            add_entity(mod_info, 'skillTypeID', type_ids)
+            add_entity(mod_info, 'groupID', group_ids)
+            add_entity(mod_info, 'modifyingAttributeID', attr_ids)
+            add_entity(mod_info, 'modifiedAttributeID', attr_ids)
+        yield ('evetypes', 'typeID', type_ids)
+        yield ('evegroups', 'groupID', group_ids)
+        yield ('dgmattribs', 'attributeID', attr_ids)
+
+    @staticmethod
+    def _get_refs_default_ammo(table, row_ids):
         """Find out which types are referred via 'ammo loaded' attribute.
 
         Some item types specify which ammo is loaded into them by default, and
         here we ensure these ammo types are kept.
 
         Args:
-            tgt_data: Dictionary which will be filled during the process. Its
-                contents should specify target field and which values this field
-                should have.
+            table: Table with dgmtypeattribs data.
+            row_ids: IDs of rows in the table.
+
+        Returns:
+            Tuple in (target table name, target column name, values) format.
         """
-        for row in self.data['dgmtypeattribs']:
-            if row.get('attributeID') != AttrId.ammo_loaded:
+        ammo_type_ids = set()
+        for attr_id, value in zip(
+            table.get_values(row_ids, 'attributeID'),
+            table.get_values(row_ids, 'value')
+        ):
+            if attr_id != AttrId.ammo_loaded:
                 continue
             try:
-                ammo_type_id = int(row.get('value'))
+                ammo_type_ids.add(int(value))
             except TypeError:
                 continue
-            tgt_spec = ('evetypes', 'typeID')
-            tgt_data.setdefault(tgt_spec, set()).add(ammo_type_id)
+        return ('evetypes', 'typeID', ammo_type_ids)
 
     def _report_results(self):
         """Log cleanup results."""
         table_msgs = []
         for table_name in sorted(self.data):
-            data_len = len(self.data[table_name])
-            trashed_len = len(self.trashed_data[table_name])
+            data_len = self.data[table_name].count(ROW_LIVE)
+            trashed_len = self.data[table_name].count(ROW_TRASHED)
             try:
                 ratio = trashed_len / (data_len + trashed_len)
             # Skip results if table was empty
@@ -324,39 +291,33 @@ class Cleaner:
             msg = 'cleaned: {}'.format(', '.join(table_msgs))
             logger.info(msg)
 
-    def _pump_data(self, table_name, rows):
+    def _pump_data(self, table_name, row_ids):
         """Mark data rows as strong.
 
         Rows marked as strong are immune to removal.
 
         Args:
             table_name: Name of a table where data for marking resides.
-            rows: iterable with data rows from the table.
+            row_ids: Iterable with IDs of data rows from the table.
         """
-        self.strong_data.setdefault(table_name, set()).update(rows)
+        self.strong_data.setdefault(table_name, set()).update(row_ids)
 
-    def _trash_data(self, table_name, rows):
+    def _trash_data(self, table_name, row_ids):
         """Move data rows into trash.
 
         Data is moved into trash with ability to be restored later, if needed.
 
         Args:
             table_name: Name of a table where data for marking resides.
-            rows: iterable with data rows from the table.
+            row_ids: Iterable with IDs of data rows from the table.
         """
-        data_table = self.data[table_name]
-        trash_table = self.trashed_data.setdefault(table_name, set())
-        trash_table.update(rows)
-        data_table.difference_update(rows)
+        self.data[table_name].set_state(row_ids, ROW_TRASHED)
 
-    def _restore_data(self, table_name, rows):
+    def _restore_data(self, table_name, row_ids):
         """Restore data rows from trash into actual data.
 
         Args:
             table_name: Name of a table where data for marking resides.
-            rows: iterable with data rows from the table.
+            row_ids: Iterable with IDs of data rows from the table.
         """
-        data_table = self.data[table_name]
-        trash_table = self.trashed_data[table_name]
-        data_table.update(rows)
-        trash_table.difference_update(rows)
+        self.data[table_name].set_state(row_ids, ROW_LIVE)
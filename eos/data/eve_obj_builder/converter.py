@@ -19,20 +19,31 @@
 # ==============================================================================
 
 
+from collections import namedtuple
+
 from eos.eve_object.attribute import Attribute
 from eos.eve_object.effect import Effect
-from eos.eve_object.type import Type
-from .mod_builder import ModBuilder
+from eos.eve_object.type import Type, TypeDerivedData
+from eos.eve_object.type.type import get_max_state, get_required_skills
+from .mod_builder import ModBuilder, build_parallel
 
 
 class Converter:
 
     @staticmethod
-    def run(data):
+    def run(data, processes=None, ids=None, mod_info_cache=None):
         """Convert data into eve objects.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
+            processes (optional): Quantity of processes which should be used to
+                build modifiers. By default, modifiers are built in current
+                process.
+            ids (optional): Tuple with 3 iterables, which contain IDs of types,
+                attributes and effects which should be converted. By default,
+                everything is converted.
+            mod_info_cache (optional): Cache of parsed modifier info, shared
+                with other builder stages.
 
         Returns:
             3 iterables, which contain types, attributes and effects.
@@ -40,35 +51,52 @@ class Converter:
         # Before actually instantiating anything, we need to collect some data
         # in convenient form
         # Format: {group ID: group row}
-        groups_keyed = {}
-        for row in data['evegroups']:
-            groups_keyed[row['groupID']] = row
+        # Format: {group ID: category ID}
+        groups_categories = {}
+        for _, group_id, category_id in data['evegroups'].iter_values(
+                'groupID', 'categoryID'):
+            groups_categories[group_id] = category_id
         # Format: {type ID: default effect ID}
         types_defeff_map = {}
-        for row in data['dgmtypeeffects']:
-            if row.get('isDefault') is True:
-                types_defeff_map[row['typeID']] = row['effectID']
         # Format: {type ID: {effect IDs}}
         types_effects = {}
-        for row in data['dgmtypeeffects']:
-            types_effects.setdefault(row['typeID'], set()).add(row['effectID'])
+        for _, type_id, effect_id, is_default in (
+            data['dgmtypeeffects'].iter_values(
+                'typeID', 'effectID', 'isDefault')
+        ):
+            if is_default is True:
+                types_defeff_map[type_id] = effect_id
+            types_effects.setdefault(type_id, set()).add(effect_id)
         # Format: {type ID: {attribute ID: value}}
         types_attrs = {}
-        for row in data['dgmtypeattribs']:
-            type_attrs = types_attrs.setdefault(row['typeID'], {})
-            type_attrs[row['attributeID']] = row['value']
+        for _, type_id, attr_id, value in data['dgmtypeattribs'].iter_values(
+                'typeID', 'attributeID', 'value'):
+            types_attrs.setdefault(type_id, {})[attr_id] = value
         # Format: {type ID: {ability ID: ability data}}
         typeabils_reformat = {}
-        for row in data['typefighterabils']:
-            type_abils = typeabils_reformat.setdefault(row['typeID'], {})
-            type_abils[row['abilityID']] = {
-                'cooldown_time': row.get('cooldownSeconds'),
-                'charge_quantity': row.get('chargeCount'),
-                'charge_rearm_time': row.get('rearmTimeSeconds')}
+        for (
+            _, type_id, ability_id, cooldown_time, charge_quantity,
+            charge_rearm_time
+        ) in data['typefighterabils'].iter_values(
+            'typeID', 'abilityID', 'cooldownSeconds', 'chargeCount',
+            'rearmTimeSeconds'
+        ):
+            type_abils = typeabils_reformat.setdefault(type_id, {})
+            type_abils[ability_id] = {
+                'cooldown_time': cooldown_time,
+                'charge_quantity': charge_quantity,
+                'charge_rearm_time': charge_rearm_time}
+
+        if ids is None:
+            type_ids = attr_ids = effect_ids = None
+        else:
+            type_ids, attr_ids, effect_ids = (set(i) for i in ids)
 
         # Convert attributes
         attrs = []
-        for row in data['dgmattribs']:
+        for row in data['dgmattribs'].rows():
+            if attr_ids is not None and row['attributeID'] not in attr_ids:
+                continue
             attrs.append(Attribute(
                 attr_id=row['attributeID'],
                 max_attr_id=row.get('maxAttributeID'),
@@ -78,9 +106,18 @@ class Converter:
 
         # Convert effects
         effects = []
-        mod_builder = ModBuilder(data['dgmexpressions'])
-        for row in data['dgmeffects']:
-            modifiers, build_status = mod_builder.build(row)
+        effect_rows = [
+            row for row in data['dgmeffects'].rows()
+            if effect_ids is None or row['effectID'] in effect_ids]
+        exp_rows = list(data['dgmexpressions'].rows())
+        if processes is None:
+            mod_builder = ModBuilder(exp_rows, mod_info_cache)
+            build_results = [mod_builder.build(row) for row in effect_rows]
+        else:
+            build_results = build_parallel(
+                exp_rows, effect_rows, processes, mod_info_cache)
+        for row, build_result in zip(effect_rows, build_results):
+            modifiers, build_status = build_result
             effects.append(Effect(
                 effect_id=row['effectID'],
                 category_id=row.get('effectCategory'),
@@ -100,19 +137,107 @@ class Converter:
         # Convert types
         types = []
         effect_map = {e.id: e for e in effects}
-        for row in data['evetypes']:
-            type_id = row['typeID']
-            type_group = row.get('groupID')
+        # When only subset of effects is converted, types still need to refer
+        # all their effects. As types store only IDs of effects, stubs are
+        # sufficient for this
+        if effect_ids is not None:
+            for _, effect_id, category_id in data['dgmeffects'].iter_values(
+                    'effectID', 'effectCategory'):
+                if effect_id not in effect_map:
+                    effect_map[effect_id] = Effect(
+                        effect_id=effect_id, category_id=category_id,
+                        customize=False)
+        effect_states = Converter._get_effect_states(effect_map.values())
+        for _, type_id, type_group in data['evetypes'].iter_values(
+                'typeID', 'groupID'):
+            if type_ids is not None and type_id not in type_ids:
+                continue
             type_effect_ids = types_effects.get(type_id, set())
             type_effect_ids.intersection_update(effect_map)
+            type_category = groups_categories.get(type_group)
+            type_attrs = types_attrs.get(type_id, {})
+            derived = Converter._derive_type_data(
+                _TypeData(
+                    group_id=type_group,
+                    category_id=type_category,
+                    attrs=type_attrs,
+                    effects=type_effect_ids),
+                effect_states)
             types.append(Type(
                 type_id=type_id,
                 group_id=type_group,
-                category_id=groups_keyed.get(type_group, {}).get('categoryID'),
-                attrs=types_attrs.get(type_id, {}),
+                category_id=type_category,
+                attrs=type_attrs,
                 effects=tuple(effect_map[eid] for eid in type_effect_ids),
                 default_effect=effect_map.get(types_defeff_map.get(type_id)),
                 fighter_abilities=typeabils_reformat.get(type_id, {}),
+                derived=derived,
                 customize=False))
 
         return types, attrs, effects
+
+    @staticmethod
+    def _get_effect_states(effects):
+        """Get states effects will have when they are loaded from cache.
+
+        Effects are cached as-is and customized only when loaded, while some
+        customizations change effect category. Here, customized copy of each
+        effect is used to get the state.
+
+        Returns:
+            Dictionary in {effect ID: state} format. State is None when it
+            cannot be determined.
+        """
+        effect_states = {}
+        for effect in effects:
+            customized = Effect(
+                effect_id=effect.id, category_id=effect.category_id)
+            try:
+                effect_states[effect.id] = customized._state
+            except KeyError:
+                effect_states[effect.id] = None
+        return effect_states
+
+    @staticmethod
+    def _derive_type_data(type_data, effect_states):
+        """Calculate facts which are used by fits to check item types."""
+        # Restrictions depend on fit item classes, which cannot be imported
+        # before eos is fully imported
+        from eos.fit.restriction.restriction.item_class import (
+            CLASS_VALIDATORS)
+        from eos.fit.restriction.restriction.ship_type_group import (
+            ALLOWED_GROUP_ATTR_IDS, ALLOWED_TYPE_ATTR_IDS)
+        states = [effect_states[eid] for eid in type_data.effects]
+        if None in states:
+            max_state = None
+        else:
+            max_state = get_max_state(states)
+        attrs = type_data.attrs
+        return TypeDerivedData(
+            required_skills=get_required_skills(attrs),
+            max_state=max_state,
+            item_class_names=tuple(
+                item_class.__name__
+                for item_class, validator in CLASS_VALIDATORS.items()
+                if validator(type_data) is True),
+            fit_ship_type_ids=Converter.__get_allowed_ids(
+                attrs, ALLOWED_TYPE_ATTR_IDS),
+            fit_ship_group_ids=Converter.__get_allowed_ids(
+                attrs, ALLOWED_GROUP_ATTR_IDS))
+
+    @staticmethod
+    def __get_allowed_ids(attrs, attr_ids):
+        allowed_ids = []
+        for attr_id in attr_ids:
+            try:
+                allowed_id = attrs[attr_id]
+            except KeyError:
+                continue
+            if allowed_id not in allowed_ids:
+                allowed_ids.append(allowed_id)
+        return tuple(allowed_ids)
+
+
+# Item type data, in the form which is sufficient to derive facts about it
+_TypeData = namedtuple(
+    '_TypeData', ('group_id', 'category_id', 'attrs', 'effects'))
@@ -26,3 +26,5 @@ to work with raw data.
 
 
 from .builder import ModBuilder
+from .mod_info_cache import ModInfoCache
+from .parallel import build_parallel
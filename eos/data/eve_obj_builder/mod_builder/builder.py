@@ -24,6 +24,7 @@ from logging import getLogger
 from eos.const.eos import EffectBuildStatus
 from .converter import ExpressionTreeConverter, ModInfoconverter
 from .exception import UnknownEtreeRootOperandError, YamlParsingError
+from .mod_info_cache import ModInfoCache
 
 
 logger = getLogger(__name__)
@@ -37,10 +38,15 @@ class ModBuilder:
 
     Args:
         exp_rows: Iterable with expression rows.
+        mod_info_cache (optional): Cache of parsed modifier info, which may be
+            shared with other builder stages. By default, new one is created.
     """
 
-    def __init__(self, exp_rows):
+    def __init__(self, exp_rows, mod_info_cache=None):
         self._etree = ExpressionTreeConverter(exp_rows)
+        if mod_info_cache is None:
+            mod_info_cache = ModInfoCache()
+        self._mod_info_cache = mod_info_cache
 
     def build(self, effect_row):
         """Generate modifiers using passed data.
@@ -58,13 +64,15 @@ class ModBuilder:
         # Modifier info has priority
         if mod_info:
             try:
-                mods, fails = ModInfoconverter.convert(mod_info)
+                mod_info = self._mod_info_cache.get(
+                    effect_row['effectID'], mod_info)
             except YamlParsingError as e:
                 effect_id = effect_row['effectID']
                 msg = 'failed to build modifiers for effect {}: {}'.format(
                     effect_id, e.args[0])
                 logger.error(msg)
                 return (), EffectBuildStatus.error
+            mods, fails = ModInfoconverter.convert(mod_info)
         # When no modifierInfo specified, use expression trees
         elif pre_exp_id:
             try:
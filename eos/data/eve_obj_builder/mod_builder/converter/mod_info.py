@@ -18,37 +18,24 @@
 # ==============================================================================
 
 
-import yaml
-
 from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
 from eos.eve_object.modifier import DogmaModifier
-from ..exception import YamlParsingError
 
 
 class ModInfoconverter:
     """Parses modifierInfos into modifiers."""
 
     @classmethod
-    def convert(cls, mod_infos_yaml):
-        """Generate modifiers out of YAML data.
+    def convert(cls, mod_infos):
+        """Generate modifiers out of modifier info data.
 
         Args:
-            mod_infos_yaml: String with YAML modifier data.
+            mod_infos: Modifier info data, parsed out of YAML.
 
         Returns:
             Tuple with iterable which contains modifiers, and quantity of
             modifier build failures we recorded.
-
-        Raises:
-            YamlParsingError: If YAML parses fails.
         """
-        try:
-            mod_infos = yaml.safe_load(mod_infos_yaml)
-        except KeyboardInterrupt:
-            raise
-        # We cannot recover any data in case of YAML parsing failure
-        except Exception as e:
-            raise YamlParsingError('failed to parse YAML') from e
         mods = []
         fails = 0
         # Get handler according to function specified in info
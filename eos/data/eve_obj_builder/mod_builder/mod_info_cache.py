@@ -0,0 +1,163 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import bz2
+import json
+import os.path
+from hashlib import blake2b
+from logging import getLogger
+
+import yaml
+
+from .exception import YamlParsingError
+
+
+logger = getLogger(__name__)
+
+
+# Use libyaml-based loader when it is available, as it is much faster than
+# pure-python one
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class ModInfoCache:
+    """Parses modifierInfo YAML of effects and keeps results.
+
+    Single instance is meant to be shared by all builder stages which need
+    parsed modifier info, so that YAML of each effect is parsed only once per
+    build.
+
+    Args:
+        memo_path (optional): Path to file where parsed results are stored
+            between builds, keyed by hash of YAML contents. By default, results
+            are not stored.
+    """
+
+    def __init__(self, memo_path=None):
+        self.memo_path = memo_path
+        # Format: {effect ID: (YAML contents, parsed data or None)}
+        self.__parsed = {}
+        # Format: {content hash: parsed data}
+        self.__memo = None
+        self.__memo_changed = False
+
+    def get(self, effect_id, mod_infos_yaml):
+        """Get parsed modifier info of an effect.
+
+        Args:
+            effect_id: ID of effect modifier info belongs to.
+            mod_infos_yaml: String with YAML modifier data.
+
+        Returns:
+            Parsed modifier info data.
+
+        Raises:
+            YamlParsingError: If YAML parsing fails.
+        """
+        try:
+            cached_yaml, mod_infos = self.__parsed[effect_id]
+        except KeyError:
+            pass
+        else:
+            if cached_yaml == mod_infos_yaml:
+                if mod_infos is None:
+                    raise YamlParsingError('failed to parse YAML')
+                return mod_infos
+        try:
+            mod_infos = self.__parse(mod_infos_yaml)
+        except YamlParsingError:
+            self.__parsed[effect_id] = (mod_infos_yaml, None)
+            raise
+        self.__parsed[effect_id] = (mod_infos_yaml, mod_infos)
+        return mod_infos
+
+    def save(self):
+        """Write memo of parsed results to disk, if it has been changed."""
+        if self.memo_path is None or not self.__memo_changed:
+            return
+        memo_folder = os.path.dirname(os.path.abspath(self.memo_path))
+        if os.path.isdir(memo_folder) is not True:
+            os.makedirs(memo_folder, mode=0o755)
+        with bz2.BZ2File(self.memo_path, 'w') as file:
+            file.write(json.dumps(self.__memo).encode('utf-8'))
+        self.__memo_changed = False
+
+    def __parse(self, mod_infos_yaml):
+        memo = self.__get_memo()
+        if memo is None:
+            return self.__load_yaml(mod_infos_yaml)
+        content_hash = blake2b(
+            mod_infos_yaml.encode('utf-8'), digest_size=16).hexdigest()
+        try:
+            return memo[content_hash]
+        except KeyError:
+            pass
+        mod_infos = self.__load_yaml(mod_infos_yaml)
+        # Store only results which survive serialization unchanged
+        try:
+            if json.loads(json.dumps(mod_infos)) == mod_infos:
+                memo[content_hash] = mod_infos
+                self.__memo_changed = True
+        except (TypeError, ValueError):
+            pass
+        return mod_infos
+
+    @staticmethod
+    def __load_yaml(mod_infos_yaml):
+        try:
+            return yaml.load(mod_infos_yaml, Loader=YamlLoader)
+        except KeyboardInterrupt:
+            raise
+        # We cannot recover any data in case of YAML parsing failure
+        except Exception as e:
+            raise YamlParsingError('failed to parse YAML') from e
+
+    def __get_memo(self):
+        """Get memo of parsed results, loading it from disk if needed.
+
+        Returns:
+            Memo dictionary, or None if memo is disabled.
+        """
+        if self.memo_path is None:
+            return None
+        if self.__memo is None:
+            self.__memo = {}
+            if os.path.exists(self.memo_path):
+                try:
+                    with bz2.BZ2File(self.memo_path, 'r') as file:
+                        self.__memo = json.loads(file.read().decode('utf-8'))
+                except KeyboardInterrupt:
+                    raise
+                # Memo is just an optimization, if it cannot be read, start
+                # over with empty one
+                except Exception:
+                    msg = 'error during reading modifier info memo'
+                    logger.warning(msg)
+        return self.__memo
+
+    def __getstate__(self):
+        # Memo is needed only by instance which parses data for the first
+        # time, copies passed to other processes use just parsed data
+        return {
+            'memo_path': None,
+            '_ModInfoCache__parsed': self.__parsed,
+            '_ModInfoCache__memo': None,
+            '_ModInfoCache__memo_changed': False}
@@ -0,0 +1,106 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from logging import getLogger
+from logging.handlers import BufferingHandler
+from multiprocessing import Pool
+
+from .builder import ModBuilder
+
+
+# All log records of modifier builder are emitted by loggers which are children
+# of this one
+LOGGER_NAME = 'eos.data.eve_obj_builder.mod_builder'
+
+# Modifier builder instance of worker process
+_mod_builder = None
+# Handler which collects log records in worker process
+_log_handler = None
+
+
+class _RecordingHandler(BufferingHandler):
+    """Collects log records to pass them to parent process."""
+
+    def __init__(self):
+        BufferingHandler.__init__(self, 0)
+
+    def shouldFlush(self, *args):
+        return False
+
+
+def build_parallel(exp_rows, effect_rows, processes, mod_info_cache=None):
+    """Generate modifiers for multiple effects using pool of processes.
+
+    Log records produced by workers are re-emitted in parent process, in the
+    same order as serial modifier builder would produce them.
+
+    Args:
+        exp_rows: Iterable with expression rows.
+        effect_rows: Sequence with effect rows.
+        processes: Quantity of worker processes to use.
+        mod_info_cache (optional): Cache of parsed modifier info. Workers get
+            copy of data it has parsed so far.
+
+    Returns:
+        List with results of modifier building, in (modifiers, build status)
+        format, in the same order as effect rows.
+    """
+    exp_rows = list(exp_rows)
+    # Split work into several chunks per process to even out load
+    chunk_size = max(1, len(effect_rows) // (processes * 4))
+    chunks = [
+        effect_rows[pos:pos + chunk_size]
+        for pos in range(0, len(effect_rows), chunk_size)]
+    log_level = getLogger(LOGGER_NAME).getEffectiveLevel()
+    with Pool(
+        processes, _init_worker, (exp_rows, mod_info_cache, log_level)
+    ) as pool:
+        chunk_results = pool.map(_build_chunk, chunks)
+    results = []
+    for chunk_result, log_records in chunk_results:
+        results.extend(chunk_result)
+        for record in log_records:
+            getLogger(record.name).handle(record)
+    return results
+
+
+def _init_worker(exp_rows, mod_info_cache, log_level):
+    global _mod_builder, _log_handler
+    _mod_builder = ModBuilder(exp_rows, mod_info_cache)
+    # Do not let records reach handlers inherited from parent process, parent
+    # process will handle them on its own
+    _log_handler = _RecordingHandler()
+    logger = getLogger(LOGGER_NAME)
+    logger.setLevel(log_level)
+    logger.propagate = False
+    logger.addHandler(_log_handler)
+
+
+def _build_chunk(effect_rows):
+    results = [_mod_builder.build(row) for row in effect_rows]
+    log_records = _log_handler.buffer
+    _log_handler.buffer = []
+    # Records should be picklable, thus format their messages in advance
+    for record in log_records:
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+    return results, log_records
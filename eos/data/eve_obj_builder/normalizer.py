@@ -22,7 +22,6 @@
 from logging import getLogger
 
 from eos.const.eve import AttrId, TypeGroupId, OperandId
-from eos.util.frozendict import frozendict
 
 
 logger = getLogger(__name__)
@@ -39,7 +38,7 @@ class Normalizer:
         data for easier and hack-free code in other parts of Eos.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
         """
         Normalizer._move_attrs(data)
         Normalizer._convert_expression_symbolic_references(data)
@@ -53,7 +52,7 @@ class Normalizer:
         dgmtypeattribs table, where the rest of attributes are defined.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
         """
         attr_map = {
             'radius': AttrId.radius,
@@ -65,29 +64,29 @@ class Normalizer:
         # dgmtypeattribs
         defined_pairs = set()
         dgmtypeattribs = data['dgmtypeattribs']
-        for row in dgmtypeattribs:
-            if row['attributeID'] not in attr_ids:
-                continue
-            defined_pairs.add((row['typeID'], row['attributeID']))
+        for attr_id in attr_ids:
+            for row_id in dgmtypeattribs.lookup('attributeID', attr_id):
+                type_id = dgmtypeattribs.get(row_id, 'typeID')
+                defined_pairs.add((type_id, attr_id))
         attrs_skipped = 0
-        for row in data['evetypes']:
-            type_id = row['typeID']
-            for field, value in row.items():
-                if field in attr_map:
-                    # If row didn't have such attribute defined, skip it
-                    if value is None:
-                        continue
-                    # If such attribute already exists in dgmtypeattribs, do not
-                    # modify it - values from dgmtypeattribs table have priority
-                    attr_id = attr_map[field]
-                    if (type_id, attr_id) in defined_pairs:
-                        attrs_skipped += 1
-                        continue
-                    # Generate row and add it to proper attribute table
-                    dgmtypeattribs.add(frozendict({
-                        'typeID': type_id,
-                        'attributeID': attr_id,
-                        'value': value}))
+        fields = tuple(attr_map)
+        for _, type_id, *values in data['evetypes'].iter_values(
+                'typeID', *fields):
+            for field, value in zip(fields, values):
+                # If row didn't have such attribute defined, skip it
+                if value is None:
+                    continue
+                # If such attribute already exists in dgmtypeattribs, do not
+                # modify it - values from dgmtypeattribs table have priority
+                attr_id = attr_map[field]
+                if (type_id, attr_id) in defined_pairs:
+                    attrs_skipped += 1
+                    continue
+                # Generate row and add it to proper attribute table
+                dgmtypeattribs.add_row({
+                    'typeID': type_id,
+                    'attributeID': attr_id,
+                    'value': value})
         if attrs_skipped:
             msg = (
                 '{} built-in attributes already have had value '
@@ -104,7 +103,7 @@ class Normalizer:
         their code, thus we have to hardcode it too.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
         """
         dgmexps = data['dgmexpressions']
         # Replacement specification
@@ -142,28 +141,20 @@ class Normalizer:
             used_repls = set()
             unknown_names = set()
             # We're modifying only rows with specific operands
-            for exp_row in dgmexps:
-                if exp_row['operandID'] != operand:
-                    continue
-                exp_entity_id = exp_row[id_col_name]
+            for row_id in dgmexps.lookup('operandID', operand):
+                exp_entity_id = dgmexps.get(row_id, id_col_name)
                 # If entity is already referenced via ID, nothing to do here
                 if exp_entity_id is not None:
                     continue
-                symbolic_entity_name = exp_row['expressionValue']
+                symbolic_entity_name = dgmexps.get(row_id, 'expressionValue')
                 # Skip names we've set to ignore explicitly
                 if symbolic_entity_name in ignored_names:
                     continue
                 # Do replacements if they're known to us
                 if symbolic_entity_name in repls:
-                    # As rows are frozen dicts, we compose new mutable dict,
-                    # update data there, freeze it, and do actual replacement
-                    new_exp_row = {}
-                    new_exp_row.update(exp_row)
-                    new_exp_row['expressionValue'] = None
-                    new_exp_row[id_col_name] = repls[symbolic_entity_name]
-                    new_exp_row = frozendict(new_exp_row)
-                    dgmexps.remove(exp_row)
-                    dgmexps.add(new_exp_row)
+                    dgmexps.set(row_id, 'expressionValue', None)
+                    dgmexps.set(
+                        row_id, id_col_name, repls[symbolic_entity_name])
                     used_repls.add(symbolic_entity_name)
                     continue
                 # If we do not know it, add to special container which we will
@@ -0,0 +1,122 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from hashlib import blake2b
+
+
+# Format: {table name: column which defines entity table row belongs to}
+ENTITY_COLUMNS = {
+    'evetypes': 'typeID',
+    'evegroups': 'groupID',
+    'dgmattribs': 'attributeID',
+    'dgmtypeattribs': 'typeID',
+    'dgmeffects': 'effectID',
+    'dgmtypeeffects': 'typeID',
+    'dgmexpressions': 'expressionID',
+    'typefighterabils': 'typeID'}
+
+
+class BuildSnapshot:
+    """Describes data which eve objects were built from.
+
+    Rows of each table are grouped by entity they belong to (e.g. all
+    dgmtypeattribs rows of an item type), and each group is represented by
+    its digest. Comparing digests lets find out which entities have changed
+    between two versions of data.
+
+    Args:
+        digests: Map in {table name: {entity ID: digest}} format.
+        type_ids (optional): Iterable with IDs of built item types.
+        attr_ids (optional): Iterable with IDs of built attributes.
+        effect_ids (optional): Iterable with IDs of built effects.
+    """
+
+    def __init__(self, digests, type_ids=(), attr_ids=(), effect_ids=()):
+        self.digests = digests
+        self.type_ids = set(type_ids)
+        self.attr_ids = set(attr_ids)
+        self.effect_ids = set(effect_ids)
+
+    @classmethod
+    def from_data(cls, data):
+        """Make snapshot out of raw data.
+
+        Args:
+            data: Dictionary in {table name: table} format.
+        """
+        digests = {}
+        for table_name, column_name in ENTITY_COLUMNS.items():
+            # Format: {entity ID: [row representations]}
+            entity_rows = {}
+            for row in data[table_name].rows():
+                # Position of a row doesn't describe any data
+                row_repr = repr(sorted(
+                    (k, v) for k, v in row.items() if k != 'table_pos'))
+                entity_rows.setdefault(
+                    row.get(column_name), []).append(row_repr)
+            table_digests = {}
+            for entity_id, row_reprs in entity_rows.items():
+                row_reprs.sort()
+                table_digests[entity_id] = blake2b(
+                    '\n'.join(row_reprs).encode('utf-8'),
+                    digest_size=8).hexdigest()
+            digests[table_name] = table_digests
+        return cls(digests)
+
+    def get_changed_entities(self, other):
+        """Find out which entities differ between two snapshots.
+
+        Args:
+            other: Snapshot to compare with.
+
+        Returns:
+            Map in {table name: {entity IDs}} format. Entities which are
+            present just in one of snapshots are considered as changed too.
+        """
+        changes = {}
+        for table_name in ENTITY_COLUMNS:
+            digests = self.digests.get(table_name, {})
+            other_digests = other.digests.get(table_name, {})
+            changes[table_name] = {
+                entity_id
+                for entity_id in set(digests).union(other_digests)
+                if digests.get(entity_id) != other_digests.get(entity_id)}
+        return changes
+
+    # Cache-related methods
+    def compress(self):
+        return {
+            'digests': {
+                table_name: list(table_digests.items())
+                for table_name, table_digests in self.digests.items()},
+            'type_ids': sorted(self.type_ids),
+            'attr_ids': sorted(self.attr_ids),
+            'effect_ids': sorted(self.effect_ids)}
+
+    @classmethod
+    def decompress(cls, compressed):
+        return cls(
+            digests={
+                table_name: {k: v for k, v in table_digests}
+                for table_name, table_digests in compressed['digests'].items()},
+            type_ids=compressed['type_ids'],
+            attr_ids=compressed['attr_ids'],
+            effect_ids=compressed['effect_ids'])
@@ -0,0 +1,212 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+# Row states
+ROW_REMOVED = 0
+ROW_LIVE = 1
+ROW_TRASHED = 2
+
+# Marks cells of columns which are absent in a row
+_missing = object()
+
+
+class Table:
+    """Columnar storage for rows of single data table.
+
+    Each row is identified by its ID, which is position of the row in the
+    table; values of each column are stored in separate list, and state of
+    each row is tracked in a bytearray. Rows are never physically deleted,
+    only their state is changed: removed rows are gone for good, while trashed
+    rows can be made live again. Hash indexes over columns are built on first
+    lookup and are kept up to date afterwards.
+    """
+
+    def __init__(self):
+        # Format: {column name: [values]}
+        self.__columns = {}
+        self.__states = bytearray()
+        # Format: {column name: {value: [row IDs]}}
+        self.__indexes = {}
+
+    def add_row(self, row):
+        """Add row to the table as live row.
+
+        Args:
+            row: Mapping in {column name: value} format.
+
+        Returns:
+            ID of added row.
+        """
+        row_id = len(self.__states)
+        columns = self.__columns
+        for column_name, value in row.items():
+            try:
+                column = columns[column_name]
+            except KeyError:
+                column = columns[column_name] = [_missing] * row_id
+            column.append(value)
+            index = self.__indexes.get(column_name)
+            if index is not None:
+                index.setdefault(value, []).append(row_id)
+        for column in columns.values():
+            if len(column) == row_id:
+                column.append(_missing)
+        self.__states.append(ROW_LIVE)
+        return row_id
+
+    def ids(self, *states):
+        """Get IDs of rows in passed states, in order they were added.
+
+        Args:
+            states (optional): States rows should be in. By default, only live
+                rows are returned.
+        """
+        if not states:
+            states = (ROW_LIVE,)
+        return [
+            row_id for row_id, state in enumerate(self.__states)
+            if state in states]
+
+    def count(self, state=ROW_LIVE):
+        """Get quantity of rows in passed state."""
+        return self.__states.count(state)
+
+    def __len__(self):
+        return self.count(ROW_LIVE)
+
+    def get_state(self, row_id):
+        return self.__states[row_id]
+
+    def set_state(self, row_ids, state):
+        states = self.__states
+        for row_id in row_ids:
+            states[row_id] = state
+
+    def get(self, row_id, column_name, default=None):
+        """Get value of a cell.
+
+        Returns:
+            Cell value, or default value if row doesn't have such column.
+        """
+        try:
+            value = self.__columns[column_name][row_id]
+        except KeyError:
+            return default
+        if value is _missing:
+            return default
+        return value
+
+    def get_values(self, row_ids, column_name):
+        """Get values of a column for multiple rows.
+
+        Returns:
+            List with values, in the same order as row IDs. Absent values are
+            replaced with None.
+        """
+        column = self.__columns.get(column_name)
+        if column is None:
+            return [None] * len(row_ids)
+        values = [column[row_id] for row_id in row_ids]
+        return [None if v is _missing else v for v in values]
+
+    def has(self, row_id, column_name):
+        """Check if row has value in passed column."""
+        try:
+            return self.__columns[column_name][row_id] is not _missing
+        except KeyError:
+            return False
+
+    def set(self, row_id, column_name, value):
+        """Set value of a cell."""
+        try:
+            column = self.__columns[column_name]
+        except KeyError:
+            column = self.__columns[column_name] = (
+                [_missing] * len(self.__states))
+        index = self.__indexes.get(column_name)
+        if index is not None:
+            old_value = column[row_id]
+            if old_value is not _missing:
+                index[old_value].remove(row_id)
+            index.setdefault(value, []).append(row_id)
+        column[row_id] = value
+
+    def lookup(self, column_name, value, state=ROW_LIVE):
+        """Find rows which have passed value in passed column.
+
+        Returns:
+            List with IDs of rows in passed state.
+        """
+        try:
+            index = self.__indexes[column_name]
+        except KeyError:
+            index = self.__build_index(column_name)
+        states = self.__states
+        return [
+            row_id for row_id in index.get(value, ())
+            if states[row_id] == state]
+
+    def iter_values(self, *column_names, state=ROW_LIVE):
+        """Iterate over values of passed columns.
+
+        Args:
+            *column_names: Names of columns to fetch values from.
+            state (optional): State rows should be in.
+
+        Yields:
+            Tuples with row ID and values of requested columns. Absent values
+            are replaced with None.
+        """
+        columns = []
+        for column_name in column_names:
+            column = self.__columns.get(column_name)
+            if column is None:
+                column = [None] * len(self.__states)
+            columns.append(column)
+        for row_id, state_ in enumerate(self.__states):
+            if state_ != state:
+                continue
+            yield (row_id,) + tuple(
+                None if column[row_id] is _missing else column[row_id]
+                for column in columns)
+
+    def row(self, row_id):
+        """Compose dictionary out of row data."""
+        return {
+            column_name: column[row_id]
+            for column_name, column in self.__columns.items()
+            if column[row_id] is not _missing}
+
+    def rows(self, state=ROW_LIVE):
+        """Iterate over rows in passed state, composing dictionary for each."""
+        for row_id in self.ids(state):
+            yield self.row(row_id)
+
+    def __build_index(self, column_name):
+        index = {}
+        for row_id, value in enumerate(
+            self.__columns.get(column_name, [_missing] * len(self.__states))
+        ):
+            if value is _missing:
+                continue
+            index.setdefault(value, []).append(row_id)
+        self.__indexes[column_name] = index
+        return index
@@ -22,6 +22,8 @@
 from logging import getLogger
 from numbers import Integral
 
+from .table import ROW_REMOVED
+
 
 logger = getLogger(__name__)
 
@@ -37,7 +39,7 @@ class ValidatorPreClean:
         will be removed after cleanup.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
         """
         # Format: {table name: (primary, keys)}
         pk_spec = {
@@ -53,30 +55,32 @@ class ValidatorPreClean:
             ValidatorPreClean._table_pk(pks, data[table_name], table_name)
 
     @staticmethod
-    def _table_pk(pks, rows, table_name):
+    def _table_pk(pks, table, table_name):
         """Check if all primary keys in table are integers.
 
         Args:
             pks: Iterable with PK names.
-            rows: Iterable with table data rows.
+            table: Table with data rows.
             table_name: Table name, used just for logging.
         """
         # Contains primary keys used in current table
         seen_pks = set()
-        # Storage for rows which should be removed
-        invalid_rows = set()
-        for row in sorted(rows, key=lambda row: row['table_pos']):
-            ValidatorPreClean._row_pk(pks, row, seen_pks, invalid_rows)
+        # Storage for IDs of rows which should be removed
+        invalid_row_ids = []
+        # Row IDs follow order of rows in original data
+        for row_id in table.ids():
+            ValidatorPreClean._row_pk(
+                pks, table, row_id, seen_pks, invalid_row_ids)
         # If any invalid rows were detected, remove them and write corresponding
         # message to log
-        if invalid_rows:
+        if invalid_row_ids:
             msg = '{} rows in table {} have invalid PKs, removing them'.format(
-                len(invalid_rows), table_name)
+                len(invalid_row_ids), table_name)
             logger.warning(msg)
-            rows.difference_update(invalid_rows)
+            table.set_state(invalid_row_ids, ROW_REMOVED)
 
     @staticmethod
-    def _row_pk(pks, row, seen_pks, invalid_rows):
+    def _row_pk(pks, table, row_id, seen_pks, invalid_row_ids):
         """Check row PK for validity.
 
         If PK is invalid, that is, has already been seen before, add row to
@@ -84,25 +88,25 @@ class ValidatorPreClean:
 
         Args:
             pks: Iterable with PK names.
-            row: Data row which we should check.
+            table: Table which contains the row.
+            row_id: ID of data row which we should check.
             seen_pks: Iterable with PKs which we already seen when iterating
                 over current table.
-            invalid_rows: Container for invalid rows.
+            invalid_row_ids: Container for IDs of invalid rows.
         """
         row_pk = []
         for pk_name in pks:
-            try:
-                pk_value = row[pk_name]
             # Invalidate row if it doesn't have any component of primary key
-            except KeyError:
-                invalid_rows.add(row)
+            if not table.has(row_id, pk_name):
+                invalid_row_ids.append(row_id)
                 return
+            pk_value = table.get(row_id, pk_name)
             if not isinstance(pk_value, Integral):
-                invalid_rows.add(row)
+                invalid_row_ids.append(row_id)
                 return
             row_pk.append(pk_value)
         row_pk = tuple(row_pk)
         if row_pk in seen_pks:
-            invalid_rows.add(row)
+            invalid_row_ids.append(row_id)
             return
         seen_pks.add(row_pk)
@@ -23,7 +23,7 @@ from logging import getLogger
 from numbers import Real
 
 from eos.const.eve import EffectId
-from eos.util.frozendict import frozendict
+from .table import ROW_REMOVED
 
 
 logger = getLogger(__name__)
@@ -40,68 +40,64 @@ class ValidatorPreConv:
         are correct.
 
         Args:
-            data: Dictionary in {table name: {table, rows}} format.
+            data: Dictionary in {table name: table} format.
         """
         ValidatorPreConv._attr_value_type(data['dgmtypeattribs'])
         ValidatorPreConv._multiple_default_effects(data['dgmtypeeffects'])
         ValidatorPreConv._colliding_module_racks(data['dgmtypeeffects'])
 
     @staticmethod
-    def _attr_value_type(dta_rows):
+    def _attr_value_type(dta_table):
         """Make sure that all attributes have numeric values.
 
         Args:
-            dta_rows: Iterable with data rows from dgmtypeattribs table.
+            dta_table: Table with data rows from dgmtypeattribs table.
         """
-        invalid_rows = set()
-        for row in dta_rows:
-            if not isinstance(row.get('value'), Real):
-                invalid_rows.add(row)
-        if invalid_rows:
+        invalid_row_ids = []
+        for row_id, value in dta_table.iter_values('value'):
+            if not isinstance(value, Real):
+                invalid_row_ids.append(row_id)
+        if invalid_row_ids:
             msg = (
                 '{} attribute rows have non-numeric value, removing them'
-            ).format(len(invalid_rows))
+            ).format(len(invalid_row_ids))
             logger.warning(msg)
-            dta_rows.difference_update(invalid_rows)
+            dta_table.set_state(invalid_row_ids, ROW_REMOVED)
 
     @staticmethod
-    def _multiple_default_effects(dte_rows):
+    def _multiple_default_effects(dte_table):
         """Check that each type has one default effect maximum.
 
         Args:
-            dte_rows: Iterable with data rows from dgmtypeeffects table.
+            dte_table: Table with data rows from dgmtypeeffects table.
         """
         # Set with IDs of item types, which have default effect
         defeff_type_ids = set()
-        invalid_rows = set()
-        for row in sorted(dte_rows, key=lambda r: r['table_pos']):
-            is_default = row.get('isDefault')
+        invalid_row_ids = []
+        # Row IDs follow order of rows in original data
+        for row_id, type_id, is_default in dte_table.iter_values(
+                'typeID', 'isDefault'):
             # We're interested only in default effects
             if not is_default:
                 continue
-            type_id = row['typeID']
             # If we already saw default effect for given type ID, invalidate
             # current row
             if type_id in defeff_type_ids:
-                invalid_rows.add(row)
+                invalid_row_ids.append(row_id)
             else:
                 defeff_type_ids.add(type_id)
-        if invalid_rows:
+        if invalid_row_ids:
             msg = (
                 'data contains {} excessive default effects, '
                 'marking them as non-default'
-            ).format(len(invalid_rows))
+            ).format(len(invalid_row_ids))
             logger.warning(msg)
             # Replace isDefault field value with False for invalid rows
-            dte_rows.difference_update(invalid_rows)
-            for invalid_row in invalid_rows:
-                new_row = {}
-                for field, value in invalid_row.items():
-                    new_row[field] = False if field == 'isDefault' else value
-                dte_rows.add(frozendict(new_row))
+            for row_id in invalid_row_ids:
+                dte_table.set(row_id, 'isDefault', False)
 
     @staticmethod
-    def _colliding_module_racks(dte_rows):
+    def _colliding_module_racks(dte_table):
         """Check that items can be assigned into one module rack maximum.
 
         Type of slot into which module is placed is detected using module's
@@ -112,25 +108,25 @@ class ValidatorPreConv:
         entries.
 
         Args:
-            dte_rows: Iterable with data rows from dgmtypeeffects table.
+            dte_table: Table with data rows from dgmtypeeffects table.
         """
         rack_effect_ids = (
             EffectId.hi_power, EffectId.med_power, EffectId.lo_power)
         racked_type_ids = set()
-        invalid_rows = set()
-        for row in sorted(dte_rows, key=lambda r: r['table_pos']):
-            effect_id = row['effectID']
+        invalid_row_ids = []
+        # Row IDs follow order of rows in original data
+        for row_id, type_id, effect_id in dte_table.iter_values(
+                'typeID', 'effectID'):
             # We're not interested in anything besides rack effects
             if effect_id not in rack_effect_ids:
                 continue
-            type_id = row['typeID']
             if type_id in racked_type_ids:
-                invalid_rows.add(row)
+                invalid_row_ids.append(row_id)
             else:
                 racked_type_ids.add(type_id)
-        if invalid_rows:
+        if invalid_row_ids:
             msg = (
                 '{} rows contain colliding module racks, removing them'
-            ).format(len(invalid_rows))
+            ).format(len(invalid_row_ids))
             logger.warning(msg)
-            dte_rows.difference_update(invalid_rows)
+            dte_table.set_state(invalid_row_ids, ROW_REMOVED)
@@ -19,19 +19,33 @@
 # ==============================================================================
 
 
+import gc
+import threading
 from logging import getLogger
 from collections import namedtuple
 
 from eos import __version__ as eos_version
 from eos.util.repr import make_repr_str
-from .eve_obj_builder import EveObjBuilder
 from .exception import ExistingSourceError, UnknownSourceError
 
 
 logger = getLogger(__name__)
 
 
-Source = namedtuple('Source', ('alias', 'cache_handler'))
+class Source(namedtuple('Source', ('alias', 'cache_handler'))):
+    """Data source, which is used by fits to get eve objects.
+
+    Besides cache handler, source keeps metadata of attributes which is used
+    in attribute calculations, to share it between all fits which use the
+    source. Metadata is reset whenever cached data is updated.
+    """
+
+    def __new__(cls, alias, cache_handler):
+        source = super().__new__(cls, alias, cache_handler)
+        # Format: {attribute ID: (max attribute ID, default value, high is
+        # good, stackable)}
+        source.attr_metadata = {}
+        return source
 
 
 class SourceManager:
@@ -45,11 +59,20 @@ class SourceManager:
     # Format: {literal alias: Source}
     _sources = {}
 
+    # Aliases of sources which are being added in background
+    _pending = set()
+
+    # Guards source registration, as sources can be added from worker threads
+    _lock = threading.RLock()
+
     # Default source, will be used implicitly when instantiating fit
     default = None
 
     @classmethod
-    def add(cls, alias, data_handler, cache_handler, make_default=False):
+    def add(
+            cls, alias, data_handler, cache_handler, make_default=False,
+            build_processes=None, incremental=False, mod_info_memo_path=None,
+            type_filter=None):
         """Add source to source manager.
 
         Adding includes initializing all facilities hidden behind name 'source'.
@@ -62,37 +85,109 @@ class SourceManager:
             make_default (optional): Do we need to mark passed source as default
                 or not. Default source will be used for instantiating new fits,
                 if no other source is specified.
+            build_processes (optional): Quantity of processes used to build eve
+                objects if cache needs to be updated. By default, everything is
+                built in current process.
+            incremental (optional): If True and cache handler stores snapshot
+                of data its eve objects were built from, only eve objects
+                affected by data changes are rebuilt and updated in cache.
+            mod_info_memo_path (optional): Path to file where parsed modifier
+                info of effects is stored, to skip parsing unchanged modifier
+                info during next cache updates.
+            type_filter (optional): Type filter instance. If passed, source
+                provides only item types selected by it. By default, all item
+                types are provided.
         """
         logger.info('adding source with alias "{}"'.format(alias))
-        if alias in cls._sources:
-            raise ExistingSourceError(alias)
+        with cls._lock:
+            cls.__check_alias(alias)
+        cls.__update_cache(
+            data_handler, cache_handler, build_processes, incremental,
+            mod_info_memo_path, type_filter)
+        with cls._lock:
+            cls.__check_alias(alias)
+            return cls.__register(alias, cache_handler, make_default)
 
-        # Compare fingerprints from data and cache
-        cache_fp = cache_handler.get_fingerprint()
-        data_version = data_handler.get_version()
-        current_fp = cls.__format_fingerprint(data_version)
+    @classmethod
+    def add_in_background(
+            cls, alias, data_handler, cache_handler, make_default=False,
+            build_processes=None, incremental=False, mod_info_memo_path=None,
+            type_filter=None):
+        """Add source to source manager in worker thread.
 
-        # If data version is corrupt or fingerprints mismatch, update cache
-        if data_version is None or cache_fp != current_fp:
-            if data_version is None:
-                logger.info('data version is None, updating cache')
-            else:
-                msg = (
-                    'fingerprint mismatch: cache "{}", data "{}", '
-                    'updating cache'
-                ).format(cache_fp, current_fp)
-                logger.info(msg)
+        Cache is checked and updated in worker thread, while sources which have
+        already been added stay available. Source is registered only when it is
+        ready, and if it is requested to be made default, default source is
+        replaced at the same moment. Fits which use old default source keep
+        using it. Arguments are the same as for add().
 
-            # Generate eve objects and cache them, as generation takes
-            # significant amount of time
-            eve_objects = EveObjBuilder.run(data_handler)
-            cache_handler.update_cache(eve_objects, current_fp)
+        Returns:
+            Future, which is resolved to added source. If adding fails, future
+            holds exception.
+        """
+        logger.info('adding source with alias "{}" in background'.format(alias))
+        with cls._lock:
+            cls.__check_alias(alias)
+            cls._pending.add(alias)
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(
+                cls.__add_pending, alias, data_handler, cache_handler,
+                make_default, build_processes, incremental, mod_info_memo_path,
+                type_filter)
+        except BaseException:
+            with cls._lock:
+                cls._pending.discard(alias)
+            raise
+        finally:
+            # Thread exits as soon as source is added
+            executor.shutdown(wait=False)
+        return future
 
-        # Finally, add record to list of sources
-        source = Source(alias=alias, cache_handler=cache_handler)
-        cls._sources[alias] = source
-        if make_default is True:
-            cls.default = source
+    @classmethod
+    async def add_async(
+            cls, alias, data_handler, cache_handler, make_default=False,
+            build_processes=None, incremental=False, mod_info_memo_path=None,
+            type_filter=None):
+        """Add source to source manager without blocking event loop.
+
+        Works like add_in_background(), but can be awaited in coroutine.
+
+        Returns:
+            Added source.
+        """
+        import asyncio
+        future = cls.add_in_background(
+            alias, data_handler, cache_handler, make_default=make_default,
+            build_processes=build_processes, incremental=incremental,
+            mod_info_memo_path=mod_info_memo_path, type_filter=type_filter)
+        return await asyncio.wrap_future(future)
+
+    @classmethod
+    def prefork(cls):
+        """Prepare added sources for forking of worker processes.
+
+        Child processes share memory pages with parent until they write to
+        them. To keep as many pages shared as possible, all eve objects of all
+        sources are composed in parent process, garbage left after loading is
+        collected, and all objects which are alive at this point are moved out
+        of garbage collector's reach, so that collections in child processes do
+        not touch them. Should be called after all sources are added, right
+        before forking.
+
+        Garbage collector runs in parent process before this call may still
+        dirty pages; to avoid it, collector can be disabled at startup with
+        gc.disable(), and enabled in child processes after fork.
+        """
+        logger.info('preparing sources for forking')
+        for source in cls._sources.values():
+            source.cache_handler.preload()
+        gc.collect()
+        # Freezing is available only since python 3.7
+        freeze = getattr(gc, 'freeze', None)
+        if freeze is not None:
+            freeze()
 
     @classmethod
     def get(cls, alias):
@@ -117,15 +212,130 @@ class SourceManager:
             alias: Alias of source to remove.
         """
         logger.info('removing source with alias "{}"'.format(alias))
-        try:
-            del cls._sources[alias]
-        except KeyError:
-            raise UnknownSourceError(alias)
+        with cls._lock:
+            try:
+                del cls._sources[alias]
+            except KeyError:
+                raise UnknownSourceError(alias)
 
     @classmethod
     def list(cls):
         return list(cls._sources.keys())
 
+    @classmethod
+    def __add_pending(
+            cls, alias, data_handler, cache_handler, make_default,
+            build_processes, incremental, mod_info_memo_path, type_filter):
+        try:
+            cls.__update_cache(
+                data_handler, cache_handler, build_processes, incremental,
+                mod_info_memo_path, type_filter)
+            with cls._lock:
+                return cls.__register(alias, cache_handler, make_default)
+        finally:
+            with cls._lock:
+                cls._pending.discard(alias)
+
+    @classmethod
+    def __check_alias(cls, alias):
+        if alias in cls._sources or alias in cls._pending:
+            raise ExistingSourceError(alias)
+
+    @classmethod
+    def __register(cls, alias, cache_handler, make_default):
+        source = Source(alias=alias, cache_handler=cache_handler)
+        cls._sources[alias] = source
+        if make_default is True:
+            cls.default = source
+        return source
+
+    @classmethod
+    def __update_cache(
+            cls, data_handler, cache_handler, build_processes, incremental,
+            mod_info_memo_path, type_filter):
+        """Make sure cache handler has eve objects for current data."""
+        # Filter is set before cache is loaded, to avoid composing objects
+        # which would be filtered out anyway
+        if type_filter is not None:
+            cache_handler.set_type_filter(type_filter)
+        # Compare fingerprints from data and cache
+        cache_fp = cache_handler.get_fingerprint()
+        data_version = data_handler.get_version()
+        current_fp = cls.__format_fingerprint(data_version)
+
+        # If data version is corrupt or fingerprints mismatch, update cache
+        if data_version is None or cache_fp != current_fp:
+            if data_version is None:
+                logger.info('data version is None, updating cache')
+            else:
+                msg = (
+                    'fingerprint mismatch: cache "{}", data "{}", '
+                    'updating cache'
+                ).format(cache_fp, current_fp)
+                logger.info(msg)
+
+            # Generate eve objects and cache them, as generation takes
+            # significant amount of time. Builder is imported only when it is
+            # needed, as it is heavy to import
+            from .eve_obj_builder import EveObjBuilder
+            if incremental:
+                cls.__update_cache_incremental(
+                    data_handler, cache_handler, cache_fp, current_fp,
+                    build_processes, mod_info_memo_path)
+            else:
+                eve_objects = EveObjBuilder.run(
+                    data_handler, processes=build_processes,
+                    mod_info_memo_path=mod_info_memo_path)
+                cache_handler.update_cache(eve_objects, current_fp)
+            # Attribute metadata of sources which already use the cache
+            # handler might be outdated now
+            cls.__reset_attr_metadata(cache_handler)
+
+    @classmethod
+    def __reset_attr_metadata(cls, cache_handler):
+        with cls._lock:
+            sources = list(cls._sources.values())
+            if cls.default is not None:
+                sources.append(cls.default)
+        for source in sources:
+            if source.cache_handler is cache_handler:
+                source.attr_metadata.clear()
+
+    @staticmethod
+    def __update_cache_incremental(
+            data_handler, cache_handler, cache_fp, current_fp,
+            build_processes, mod_info_memo_path):
+        from .eve_obj_builder import BuildSnapshot, EveObjBuilder
+        prev_snapshot = None
+        # Cache handlers which cannot update part of their data get everything
+        # rebuilt
+        if not cache_handler.supports_partial_update:
+            msg = (
+                'cache handler does not support partial updates, '
+                'rebuilding everything')
+            logger.info(msg)
+        # Objects built by other version of eos cannot be reused, as building
+        # logic might have changed
+        elif cache_fp is not None and cache_fp.endswith(
+                '_{}'.format(eos_version)):
+            compressed_snapshot = cache_handler.get_build_snapshot()
+            if compressed_snapshot is not None:
+                prev_snapshot = BuildSnapshot.decompress(compressed_snapshot)
+        eve_objects, removed_ids, snapshot = EveObjBuilder.run_incremental(
+            data_handler, prev_snapshot, processes=build_processes,
+            mod_info_memo_path=mod_info_memo_path)
+        if prev_snapshot is None:
+            logger.info('no build snapshot in cache, rebuilding everything')
+            cache_handler.update_cache(
+                eve_objects, current_fp, build_snapshot=snapshot.compress())
+        else:
+            msg = (
+                'rebuilt {} types, {} attributes and {} effects incrementally'
+            ).format(*(len(objects) for objects in eve_objects))
+            logger.info(msg)
+            cache_handler.update_cache_partial(
+                eve_objects, removed_ids, current_fp, snapshot.compress())
+
     @staticmethod
     def __format_fingerprint(data_version):
         return '{}_{}'.format(data_version, eos_version)
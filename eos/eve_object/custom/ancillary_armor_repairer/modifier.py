@@ -21,7 +21,7 @@
 
 from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
 from eos.const.eve import AttrId, TypeId
-from eos.fit.message import AttrValueChanged, ItemAdded, ItemRemoved
+from eos.fit.message import ItemAdded, ItemRemoved
 from ...modifier.exception import ModificationCalculationError
 from ...modifier.python import BasePythonModifier
 
@@ -46,6 +46,10 @@ class AncillaryRepAmountModifier(BasePythonModifier):
             value = 1
         return ModOperator.post_mul_immune, value
 
+    def get_src_attrs(self, carrier_item, _):
+        # Changes of armor rep multiplier are revised by calculator
+        return ((carrier_item, AttrId.charged_armor_dmg_multiplier),)
+
     def __revise_on_item_added_removed(self, msg, carrier_item, _):
         # If added/removed item is charge of effect carrying item and charge is
         # paste, then modification value changes
@@ -56,20 +60,9 @@ class AncillaryRepAmountModifier(BasePythonModifier):
             return True
         return False
 
-    def __revise_on_attr_changed(self, msg, carrier_item, _):
-        # If armor rep multiplier changes, then result of modification also
-        # should change
-        if (
-            msg.item is carrier_item and
-            msg.attr_id == AttrId.charged_armor_dmg_multiplier
-        ):
-            return True
-        return False
-
     __revision_map = {
         ItemAdded: __revise_on_item_added_removed,
-        ItemRemoved: __revise_on_item_added_removed,
-        AttrValueChanged: __revise_on_attr_changed}
+        ItemRemoved: __revise_on_item_added_removed}
 
     @property
     def revise_msg_types(self):
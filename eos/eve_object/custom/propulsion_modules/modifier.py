@@ -23,7 +23,6 @@ from logging import getLogger
 
 from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
 from eos.const.eve import AttrId
-from eos.fit.message import AttrValueChanged
 from ...modifier.exception import ModificationCalculationError
 from ...modifier.python import BasePythonModifier
 
@@ -58,31 +57,19 @@ class PropulsionModuleVelocityBoostModifier(BasePythonModifier):
         else:
             return ModOperator.post_percent, value
 
-    def __revise_on_attr_changed(self, msg, carrier_item, ship):
-        """
-        If any of the attribute values this modifier relies on is changed, then
-        modification value can be changed as well.
-        """
-        if (
-            (msg.item is ship and msg.attr_id == AttrId.mass) or
-            (
-                msg.item is carrier_item and
-                msg.attr_id == AttrId.speed_factor
-            ) or (
-                msg.item is carrier_item and
-                msg.attr_id == AttrId.speed_boost_factor
-            )
-        ):
-            return True
-        return False
-
-    __revision_map = {
-        AttrValueChanged: __revise_on_attr_changed}
+    def get_src_attrs(self, carrier_item, ship):
+        # Modification value relies only on attribute values, and calculator
+        # revises modification when any of them changes
+        src_attrs = [
+            (carrier_item, AttrId.speed_factor),
+            (carrier_item, AttrId.speed_boost_factor)]
+        if ship is not None:
+            src_attrs.append((ship, AttrId.mass))
+        return src_attrs
 
     @property
     def revise_msg_types(self):
-        return set(self.__revision_map)
+        return set()
 
     def revise_modification(self, msg, carrier_item, ship):
-        revision_func = self.__revision_map[type(msg)]
-        return revision_func(self, msg, carrier_item, ship)
+        return False
@@ -19,7 +19,7 @@
 # ==============================================================================
 
 
-from eos.const.eos import State
+from eos.const.eos import ModDomain, State
 from eos.const.eve import EffectCategoryId
 from eos.data.cachable import BaseCachable
 from eos.util.cached_property import cached_property
@@ -102,6 +102,26 @@ class Effect(BaseCachable):
         """
         return self.__effect_state_map[self.category_id]
 
+    # Modifiers targeting other domains are not applied within fit
+    __local_domains = set(
+        domain for domain in ModDomain if domain != ModDomain.target)
+
+    @cached_property
+    def _local_modifiers(self):
+        """Returns modifiers which are applied within fit.
+
+        Modifiers which target other fits, or have unknown target domain, are
+        skipped.
+
+        Returns:
+            Tuple with (position, modifier) tuples, where position is index of
+            modifier in the full modifier sequence.
+        """
+        return tuple(
+            (position, modifier)
+            for position, modifier in enumerate(self.modifiers)
+            if modifier.tgt_domain in self.__local_domains)
+
     # Getters for effect-referenced attributes
     def get_duration(self, item):
         raw_time = self.__safe_get_attr_value(item, self.duration_attr_id)
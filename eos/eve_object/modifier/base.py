@@ -32,6 +32,9 @@ class BaseModifier(metaclass=ABCMeta):
     when it should be applied, on which items, how to apply it, and so on.
     """
 
+    __slots__ = (
+        'tgt_filter', 'tgt_domain', 'tgt_filter_extra_arg', 'tgt_attr_id')
+
     def __init__(
             self, tgt_filter, tgt_domain, tgt_filter_extra_arg, tgt_attr_id):
         self.tgt_filter = tgt_filter
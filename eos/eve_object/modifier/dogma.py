@@ -20,6 +20,7 @@
 
 
 from numbers import Integral
+from weakref import WeakValueDictionary
 
 from eos.const.eos import ModOperator
 from eos.data.cachable import BaseCachable
@@ -35,17 +36,52 @@ class DogmaModifier(BaseModifier, BaseCachable):
     attribute value which describes modification strength from item which
     carries modifier - it makes them less flexible, but they can be processed
     efficiently.
+
+    Dogma modifiers are immutable, and modifiers with the same parameters are
+    equal. Modifiers loaded from cache are interned, thus identical modifiers
+    of all effects are represented by single object.
     """
 
+    __slots__ = ('operator', 'src_attr_id', '_hash', '__weakref__')
+
+    # Format: {compressed modifier: modifier}
+    __interned = WeakValueDictionary()
+
     def __init__(
             self, tgt_filter=None, tgt_domain=None, tgt_filter_extra_arg=None,
             tgt_attr_id=None, operator=None, src_attr_id=None):
-        BaseModifier.__init__(
-            self, tgt_filter=tgt_filter, tgt_domain=tgt_domain,
-            tgt_filter_extra_arg=tgt_filter_extra_arg, tgt_attr_id=tgt_attr_id)
+        set_attr = object.__setattr__
+        set_attr(self, 'tgt_filter', tgt_filter)
+        set_attr(self, 'tgt_domain', tgt_domain)
+        set_attr(self, 'tgt_filter_extra_arg', tgt_filter_extra_arg)
+        set_attr(self, 'tgt_attr_id', tgt_attr_id)
         # Dogma modifier-specific attributes
-        self.operator = operator
-        self.src_attr_id = src_attr_id
+        set_attr(self, 'operator', operator)
+        set_attr(self, 'src_attr_id', src_attr_id)
+        # Hash is calculated once, as modifiers are used in hashed containers
+        # during attribute calculation
+        set_attr(self, '_hash', hash(self.compress()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('dogma modifier cannot be modified')
+
+    def __delattr__(self, name):
+        raise AttributeError('dogma modifier cannot be modified')
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        return (
+            self._hash == other._hash and
+            self.compress() == other.compress())
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return type(self), self.compress()
 
     def get_modification(self, carrier_item, _):
         try:
@@ -77,13 +113,20 @@ class DogmaModifier(BaseModifier, BaseCachable):
 
     @classmethod
     def decompress(cls, cache_handler, compressed):
-        return cls(
+        compressed = tuple(compressed)
+        try:
+            return cls.__interned[compressed]
+        except KeyError:
+            pass
+        modifier = cls(
             tgt_filter=compressed[0],
             tgt_domain=compressed[1],
             tgt_filter_extra_arg=compressed[2],
             tgt_attr_id=compressed[3],
             operator=compressed[4],
             src_attr_id=compressed[5])
+        cls.__interned[compressed] = modifier
+        return modifier
 
     # Auxiliary methods
     def __repr__(self):
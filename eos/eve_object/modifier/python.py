@@ -66,6 +66,18 @@ class BasePythonModifier(BaseModifier, metaclass=ABCMeta):
         """
         ...
 
+    def get_src_attrs(self, carrier_item, ship):
+        """Get attributes which modification value is calculated from.
+
+        Calculated value of target attribute is removed when value of any of
+        those attributes changes, thus modifiers do not need to revise such
+        changes themselves.
+
+        Returns:
+            Iterable with (item, attribute ID) tuples.
+        """
+        return ()
+
     # Auxiliary methods
     def __repr__(self):
         return make_repr_str(self)
@@ -34,6 +34,62 @@ FighterAbility = namedtuple(
     'FighterAbility', ('cooldown_time', 'charge_quantity', 'rearm_time'))
 
 
+# Facts which are derived from item type data. Eve object builder calculates
+# them once, and they are stored in cache along with the item type
+TypeDerivedData = namedtuple('TypeDerivedData', (
+    'required_skills', 'max_state', 'item_class_names',
+    'fit_ship_type_ids', 'fit_ship_group_ids'))
+
+
+# Define attributes which describe item type skill requirement details
+# Format: {skill type attribute ID: skill level attribute ID}
+SKILLRQ_ATTRS = {
+    AttrId.required_skill_1: AttrId.required_skill_1_level,
+    AttrId.required_skill_2: AttrId.required_skill_2_level,
+    AttrId.required_skill_3: AttrId.required_skill_3_level,
+    AttrId.required_skill_4: AttrId.required_skill_4_level,
+    AttrId.required_skill_5: AttrId.required_skill_5_level,
+    AttrId.required_skill_6: AttrId.required_skill_6_level}
+
+
+def get_required_skills(attrs):
+    """Get skill requirements out of item type attributes.
+
+    Returns:
+        Map between skill type IDs and corresponding skill levels.
+    """
+    required_skills = {}
+    for skill_attr_id, skill_lvl_attr_id in SKILLRQ_ATTRS.items():
+        # Skip skill requirement attribute pair if any of them is not
+        # available
+        try:
+            skill_type_id = attrs[skill_attr_id]
+        except KeyError:
+            continue
+        try:
+            skill_lvl = attrs[skill_lvl_attr_id]
+        except KeyError:
+            continue
+        required_skills[int(skill_type_id)] = int(skill_lvl)
+    return required_skills
+
+
+def get_max_state(effect_states):
+    """Get highest state item type is allowed to take.
+
+    Args:
+        effect_states: Iterable with states of item type's effects.
+
+    Returns:
+        State in the form of ID, as defined in State enum.
+    """
+    # All types can be at least offline, even when they have no effects
+    max_state = State.offline
+    for effect_state in effect_states:
+        max_state = max(max_state, effect_state)
+    return max_state
+
+
 class Type(BaseCachable):
     """Represents item type with all its metadata.
 
@@ -53,12 +109,14 @@ class Type(BaseCachable):
             gets run.
         fighter_abilities: Map with fighter abilities in {ability ID: (cooldown
             time, charge quantity, rearm time) format.
+        derived: Facts derived from item type data by eve object builder, or
+            None if they were not calculated.
     """
 
     def __init__(
             self, type_id, group_id=None, category_id=None, attrs=DEFAULT,
             effects=(), default_effect=None, fighter_abilities=DEFAULT,
-            customize=True):
+            derived=None, customize=True):
         self.id = type_id
         self.group_id = group_id
         self.category_id = category_id
@@ -72,19 +130,15 @@ class Type(BaseCachable):
             self.fighter_abilities = {}
         else:
             self.fighter_abilities = fighter_abilities
+        self.derived = derived
+        # Precalculated values replace values of cached properties
+        if derived is not None:
+            self.required_skills = derived.required_skills
+            if derived.max_state is not None:
+                self.max_state = derived.max_state
         if customize:
             customize_type(self)
 
-    # Define attributes which describe item type skill requirement details
-    # Format: {skill type attribute ID: skill level attribute ID}
-    __skillrq_attrs = {
-        AttrId.required_skill_1: AttrId.required_skill_1_level,
-        AttrId.required_skill_2: AttrId.required_skill_2_level,
-        AttrId.required_skill_3: AttrId.required_skill_3_level,
-        AttrId.required_skill_4: AttrId.required_skill_4_level,
-        AttrId.required_skill_5: AttrId.required_skill_5_level,
-        AttrId.required_skill_6: AttrId.required_skill_6_level}
-
     @cached_property
     def required_skills(self):
         """Get skill requirements.
@@ -93,20 +147,7 @@ class Type(BaseCachable):
             Map between skill type IDs and corresponding skill levels, which are
             required to use this item type.
         """
-        required_skills = {}
-        for skill_attr_id in self.__skillrq_attrs:
-            # Skip skill requirement attribute pair if any of them is not
-            # available
-            try:
-                skill_type_id = self.attrs[skill_attr_id]
-            except KeyError:
-                continue
-            try:
-                skill_lvl = self.attrs[self.__skillrq_attrs[skill_attr_id]]
-            except KeyError:
-                continue
-            required_skills[int(skill_type_id)] = int(skill_lvl)
-        return required_skills
+        return get_required_skills(self.attrs)
 
     @cached_property
     def max_state(self):
@@ -115,11 +156,7 @@ class Type(BaseCachable):
         Returns:
             State in the form of ID, as defined in State enum.
         """
-        # All types can be at least offline, even when they have no effects
-        max_state = State.offline
-        for effect in self.effects.values():
-            max_state = max(max_state, effect._state)
-        return max_state
+        return get_max_state(e._state for e in self.effects.values())
 
     # Cache-related methods
     def compress(self):
@@ -130,7 +167,19 @@ class Type(BaseCachable):
             tuple(self.attrs.items()),
             tuple(self.effects.keys()),
             None if self.default_effect is None else self.default_effect.id,
-            tuple(self.fighter_abilities.items()))
+            tuple(self.fighter_abilities.items()),
+            self.__compress_derived())
+
+    def __compress_derived(self):
+        derived = self.derived
+        if derived is None:
+            return None
+        return (
+            tuple(derived.required_skills.items()),
+            derived.max_state,
+            derived.item_class_names,
+            derived.fit_ship_type_ids,
+            derived.fit_ship_group_ids)
 
     @classmethod
     def decompress(cls, cache_handler, compressed):
@@ -148,7 +197,24 @@ class Type(BaseCachable):
                 cache_handler.get_effect(eid)
                 for eid in compressed[4]),
             default_effect=default_effect,
-            fighter_abilities={k: v for k, v in compressed[6]})
+            fighter_abilities={k: v for k, v in compressed[6]},
+            derived=cls.__decompress_derived(compressed))
+
+    @staticmethod
+    def __decompress_derived(compressed):
+        # Data cached without derived facts is still accepted
+        if len(compressed) < 8 or compressed[7] is None:
+            return None
+        (
+            required_skills, max_state, item_class_names,
+            fit_ship_type_ids, fit_ship_group_ids
+        ) = compressed[7]
+        return TypeDerivedData(
+            required_skills={k: v for k, v in required_skills},
+            max_state=None if max_state is None else State(max_state),
+            item_class_names=tuple(item_class_names),
+            fit_ship_type_ids=tuple(fit_ship_type_ids),
+            fit_ship_group_ids=tuple(fit_ship_group_ids))
 
     # Auxiliary methods
     def __repr__(self):
@@ -24,5 +24,9 @@ from collections import namedtuple
 
 # Affector is calculator-specific entity. Each affector must have 2 components -
 # modifier (which describes whom and how to modify), and carrier item (item
-# which carries modifier and serves as part of context for its application)
-Affector = namedtuple('Affector', ('modifier', 'carrier_item'))
+# which carries modifier and serves as part of context for its application).
+# Equal modifiers can be represented by the same object, thus ID of effect which
+# carries modifier and position of modifier within the effect are used to tell
+# affectors apart
+Affector = namedtuple(
+    'Affector', ('modifier', 'carrier_item', 'effect_id', 'position'))
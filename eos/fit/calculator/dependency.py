@@ -0,0 +1,123 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.util.keyed_storage import KeyedStorage
+
+
+class DependencyGraph:
+    """Keeps track of which attribute values are calculated from which.
+
+    Nodes of the graph are (item, attribute ID) tuples. Edges are recorded when
+    attribute values are calculated, and are dropped when calculated values are
+    removed, thus graph describes only values which are currently calculated.
+    """
+
+    def __init__(self):
+        # Format: {source item: {source attribute ID: set((target item,
+        # target attribute ID))}}
+        self.__dependents = {}
+        # Format: {target item: {target attribute ID: set((source item,
+        # source attribute ID))}}
+        self.__dependencies = {}
+
+    def add_dependency(self, src_item, src_attr_id, tgt_item, tgt_attr_id):
+        """Record that target attribute value is calculated using source."""
+        # Called for every modification of every calculated value, thus
+        # storage access is inlined
+        try:
+            item_dependents = self.__dependents[src_item]
+        except KeyError:
+            item_dependents = self.__dependents[src_item] = KeyedStorage()
+        item_dependents.add_data_entry(src_attr_id, (tgt_item, tgt_attr_id))
+        try:
+            item_dependencies = self.__dependencies[tgt_item]
+        except KeyError:
+            item_dependencies = self.__dependencies[tgt_item] = KeyedStorage()
+        item_dependencies.add_data_entry(tgt_attr_id, (src_item, src_attr_id))
+
+    def pop_dependents(self, nodes):
+        """Find everything which depends on passed nodes, directly or not.
+
+        Found nodes are expected to be recalculated, thus all the edges which
+        lead to them are removed from the graph.
+
+        Args:
+            nodes: Iterable with (item, attribute ID) tuples.
+
+        Returns:
+            List with dependent nodes.
+        """
+        dependents = []
+        visited = set()
+        worklist = list(nodes)
+        while worklist:
+            src_item, src_attr_id = worklist.pop()
+            item_dependents = self.__dependents.get(src_item)
+            if item_dependents is None:
+                continue
+            tgt_nodes = item_dependents.pop(src_attr_id, None)
+            if tgt_nodes is None:
+                continue
+            if not item_dependents:
+                del self.__dependents[src_item]
+            for tgt_node in tgt_nodes:
+                if tgt_node in visited:
+                    continue
+                visited.add(tgt_node)
+                dependents.append(tgt_node)
+                worklist.append(tgt_node)
+                self.rm_dependencies(tgt_node)
+        return dependents
+
+    def get_item_nodes(self, item):
+        """Get nodes of passed item which other nodes depend on."""
+        return [
+            (item, attr_id) for attr_id in self.__dependents.get(item, ())]
+
+    def rm_item(self, item):
+        """Remove all edges which lead to or from passed item."""
+        for attr_id in list(self.__dependencies.get(item, ())):
+            self.rm_dependencies((item, attr_id))
+        for attr_id, tgt_nodes in self.__dependents.pop(item, {}).items():
+            for tgt_item, tgt_attr_id in tgt_nodes:
+                item_dependencies = self.__dependencies.get(tgt_item)
+                if item_dependencies is None:
+                    continue
+                item_dependencies.rm_data_entry(tgt_attr_id, (item, attr_id))
+                if not item_dependencies:
+                    del self.__dependencies[tgt_item]
+
+    def rm_dependencies(self, tgt_node):
+        """Remove edges which lead to passed node."""
+        tgt_item, tgt_attr_id = tgt_node
+        item_dependencies = self.__dependencies.get(tgt_item)
+        if item_dependencies is None:
+            return
+        src_nodes = item_dependencies.pop(tgt_attr_id, ())
+        if not item_dependencies:
+            del self.__dependencies[tgt_item]
+        for src_item, src_attr_id in src_nodes:
+            item_dependents = self.__dependents.get(src_item)
+            if item_dependents is None:
+                continue
+            item_dependents.rm_data_entry(src_attr_id, tgt_node)
+            if not item_dependents:
+                del self.__dependents[src_item]
@@ -27,8 +27,6 @@ from math import exp
 from eos.const.eos import ModOperator
 from eos.const.eve import AttrId, TypeCategoryId
 from eos.data.cache_handler.exception import AttrFetchError
-from eos.fit.message import AttrValueChanged, AttrValueChangedMasked
-from eos.util.keyed_storage import KeyedStorage
 from .exception import AttrMetadataError, BaseValueError
 
 
@@ -40,51 +38,52 @@ logger = getLogger(__name__)
 
 # Stacking penalty base constant, used in attribute calculations
 PENALTY_BASE = 1 / exp((1 / 2.67) ** 2)
+# Coefficients of stacking penalty by position of modification in penalization
+# chain. Modifications beyond 11th are ignored as non-significant
+PENALTY_COEFFICIENTS = tuple(PENALTY_BASE ** (pos ** 2) for pos in range(11))
 
 # Items belonging to these categories never have their effects stacking
 # penalized
-PENALTY_IMMUNE_CATEGORY_IDS = (
+PENALTY_IMMUNE_CATEGORY_IDS = frozenset((
     TypeCategoryId.ship,
     TypeCategoryId.charge,
     TypeCategoryId.skill,
     TypeCategoryId.implant,
-    TypeCategoryId.subsystem)
+    TypeCategoryId.subsystem))
 
-# Tuple with penalizable operators
-PENALIZABLE_OPERATORS = (
+# Operators which can be stacking penalized
+PENALIZABLE_OPERATORS = frozenset((
     ModOperator.pre_mul,
     ModOperator.post_mul,
     ModOperator.post_percent,
     ModOperator.pre_div,
-    ModOperator.post_div)
-
-# Map which helps to normalize modifications
-NORMALIZATION_MAP = {
-    ModOperator.pre_assign: lambda value: value,
-    ModOperator.pre_mul: lambda value: value,
-    ModOperator.pre_div: lambda value: 1 / value,
-    ModOperator.mod_add: lambda value: value,
-    ModOperator.mod_sub: lambda value: -value,
-    ModOperator.post_mul: lambda value: value,
-    ModOperator.post_mul_immune: lambda value: value,
-    ModOperator.post_div: lambda value: 1 / value,
-    ModOperator.post_percent: lambda value: value / 100 + 1,
-    ModOperator.post_assign: lambda value: value}
-
-# List operator types, according to their already normalized values
-ASSIGNMENT_OPERATORS = (
-    ModOperator.pre_assign,
-    ModOperator.post_assign)
-ADDITION_OPERATORS = (
+    ModOperator.post_div))
+
+# Operators which values are added to attribute value
+ADDITION_OPERATORS = frozenset((
     ModOperator.mod_add,
-    ModOperator.mod_sub)
-MULTIPLICATION_OPERATORS = (
-    ModOperator.pre_mul,
-    ModOperator.pre_div,
-    ModOperator.post_mul,
-    ModOperator.post_mul_immune,
-    ModOperator.post_div,
-    ModOperator.post_percent)
+    ModOperator.mod_sub))
+
+# Kinds of operators, which define how modification value is normalized and
+# where it is accumulated
+OPKIND_PRE_ASSIGN = 1
+OPKIND_POST_ASSIGN = 2
+OPKIND_ADD = 3
+OPKIND_SUB = 4
+OPKIND_MUL = 5
+OPKIND_DIV = 6
+OPKIND_PERCENT = 7
+OPERATOR_KINDS = {
+    ModOperator.pre_assign: OPKIND_PRE_ASSIGN,
+    ModOperator.pre_mul: OPKIND_MUL,
+    ModOperator.pre_div: OPKIND_DIV,
+    ModOperator.mod_add: OPKIND_ADD,
+    ModOperator.mod_sub: OPKIND_SUB,
+    ModOperator.post_mul: OPKIND_MUL,
+    ModOperator.post_mul_immune: OPKIND_MUL,
+    ModOperator.post_div: OPKIND_DIV,
+    ModOperator.post_percent: OPKIND_PERCENT,
+    ModOperator.post_assign: OPKIND_POST_ASSIGN}
 
 # Following attributes have limited precision - only to second digit after
 # decimal separator
@@ -97,6 +96,24 @@ LIMITED_PRECISION_ATTR_IDS = (
 # List of exceptions calculate method may throw
 CALCULATE_RAISABLE_EXCEPTIONS = (AttrMetadataError, BaseValueError)
 
+def _get_attr_metadata(source, attr_id):
+    """Get metadata of attribute necessary to calculate its value.
+
+    Metadata is stored on source, thus it is shared by all fits which use it.
+
+    Raises:
+        AttrFetchError: If attribute cannot be fetched from cache handler.
+    """
+    source_metadata = source.attr_metadata
+    try:
+        return source_metadata[attr_id]
+    except KeyError:
+        attr = source.cache_handler.get_attr(attr_id)
+        metadata = source_metadata[attr_id] = (
+            attr.max_attr_id, attr.default_value, attr.high_is_good,
+            attr.stackable)
+        return metadata
+
 
 class MutableAttrMap:
     """Map which contains modified attribute values.
@@ -110,10 +127,22 @@ class MutableAttrMap:
         # Actual container of calculated attributes.
         # Format: {attribute ID: value}
         self.__modified_attrs = {}
-        # Override and cap maps are initialized as None to save memory, as they
-        # are not needed most of the time
+        # Override map is initialized as None to save memory, as it is not
+        # needed most of the time
         self.__override_callbacks = None
-        self.__cap_map = None
+        # Containers below are used only when fit calculates attributes
+        # lazily, and are initialized as None for the same reason.
+        # Generations of attribute values; generation changes each time
+        # value changes, or may change.
+        # Format: {attribute ID: (generation, value)}
+        self.__gens = None
+        # Generations which calculated values rely on.
+        # Format: {attribute ID: (affector generation, ((source map, source
+        # attribute ID, source generation), ...))}
+        self.__stamps = None
+        # Attributes which values being calculated are based on.
+        # Format: {attribute ID: [(source map, source attribute ID)]}
+        self.__pending_srcs = None
 
     def __getitem__(self, attr_id):
         # Overridden values are priority. Access 'private' override callbacks
@@ -125,9 +154,12 @@ class MutableAttrMap:
             callback, args, kwargs = self.__override_callbacks[attr_id]
             return callback(*args, **kwargs)
         # If no override is set, use modified value. If value is stored in
-        # modified map, it's considered valid
+        # modified map, it's considered valid, unless it was calculated lazily
+        # and things it relies on changed since then
         try:
             value = self.__modified_attrs[attr_id]
+            if self.__stamps is not None and not self.__revalidate(attr_id):
+                raise KeyError(attr_id)
         # Else, we have to run full calculation process
         except KeyError:
             try:
@@ -135,7 +167,7 @@ class MutableAttrMap:
             except CALCULATE_RAISABLE_EXCEPTIONS as e:
                 raise KeyError(attr_id) from e
             else:
-                self.__modified_attrs[attr_id] = value
+                self.__store(attr_id, value)
         return value
 
     def __len__(self):
@@ -149,25 +181,14 @@ class MutableAttrMap:
             yield k
 
     def __delitem__(self, attr_id):
-        # Clear the value in our calculated attributes dictionary
-        try:
-            del self.__modified_attrs[attr_id]
-        # Do nothing if it wasn't calculated
-        except KeyError:
+        calculator = self.__get_calculator()
+        # Without calculator, nothing can depend on the value
+        if calculator is None:
+            self.__modified_attrs.pop(attr_id, None)
             return
-        # Launch message which notifies that attribute value may change
-        # (normally calculated values are removed if their dependencies change)
-        else:
-            # Special message type if modified attribute is masked by override.
-            # While exposed value cannot change in this case, underlying
-            # modified value can
-            if (
-                self.__override_callbacks is not None and
-                attr_id in self.__override_callbacks
-            ):
-                self.__publish(AttrValueChangedMasked(self.__item, attr_id))
-            else:
-                self.__publish(AttrValueChanged(self.__item, attr_id))
+        # Calculator removes the value along with values which depend on it,
+        # and notifies everyone about it
+        calculator.invalidate_attrs(((self.__item, attr_id),))
 
     def get(self, attr_id, default=None):
         # Almost copy-paste of __getitem__ due to performance reasons -
@@ -181,13 +202,15 @@ class MutableAttrMap:
             return callback(*args, **kwargs)
         try:
             value = self.__modified_attrs[attr_id]
+            if self.__stamps is not None and not self.__revalidate(attr_id):
+                raise KeyError(attr_id)
         except KeyError:
             try:
                 value = self.__calculate(attr_id)
             except CALCULATE_RAISABLE_EXCEPTIONS:
                 return default
             else:
-                self.__modified_attrs[attr_id] = value
+                self.__store(attr_id, value)
         return value
 
     def keys(self):
@@ -201,9 +224,14 @@ class MutableAttrMap:
 
     def clear(self):
         """Reset map to its initial state"""
-        for attr_id in set(self.__modified_attrs):
-            del self[attr_id]
-        self.__cap_map = None
+        calculator = self.__get_calculator()
+        if calculator is None:
+            self.__modified_attrs.clear()
+            self.__stamps = None
+            self.__pending_srcs = None
+            return
+        calculator.invalidate_attrs(
+            [(self.__item, attr_id) for attr_id in self.__modified_attrs])
 
     def __calculate(self, attr_id):
         """Run calculations to find the actual value of attribute.
@@ -221,9 +249,12 @@ class MutableAttrMap:
                 be found.
         """
         item = self.__item
-        # Attribute object for attribute being calculated
+        if self.__pending_srcs is not None:
+            self.__pending_srcs.pop(attr_id, None)
+        # Metadata of attribute being calculated
         try:
-            attr = item._fit.source.cache_handler.get_attr(attr_id)
+            max_attr_id, value, high_is_good, stackable = _get_attr_metadata(
+                item._fit.source, attr_id)
         # Raise error if we can't get metadata for requested attribute
         except (AttributeError, AttrFetchError) as e:
             msg = (
@@ -232,86 +263,113 @@ class MutableAttrMap:
             ).format(attr_id, item._type_id)
             logger.warning(msg)
             raise AttrMetadataError(attr_id) from e
-        # Base attribute value which we'll use for modification
-        try:
-            value = item._type_attrs[attr_id]
-        # If attribute isn't available on item type, base off its default value
-        except KeyError:
-            value = attr.default_value
-            # If item type attribute is not specified and default value isn't
-            # available, raise error - without valid base we can't keep going
-            if value is None:
-                msg = (
-                    'unable to find base value for attribute {} on item type {}'
-                ).format(attr_id, item._type_id)
-                logger.info(msg)
-                raise BaseValueError(attr_id)
-        # Container for non-penalized modifications
+        # Base attribute value which we'll use for modification. If attribute
+        # isn't available on item type, base off its default value
+        value = item._type_attrs.get(attr_id, value)
+        # If item type attribute is not specified and default value isn't
+        # available, raise error - without valid base we can't keep going
+        if value is None:
+            msg = (
+                'unable to find base value for attribute {} on item type {}'
+            ).format(attr_id, item._type_id)
+            logger.info(msg)
+            raise BaseValueError(attr_id)
+        # Best values for assignments are picked as modifications come
+        pre_assign = None
+        post_assign = None
+        # Container for non-penalized modifications of other operators. Values
+        # are applied one by one afterwards, in the same order as they came, to
+        # keep results independent from how modifications are grouped
         # Format: {operator: [values]}
         normal_mods = {}
-        # Container for penalized modifications
+        # Container for penalized modifications, initialized only when needed
         # Format: {operator: [values]}
-        penalized_mods = {}
+        penalized_mods = None
         # Now, go through all affectors affecting our item
-        for mod_data in item._fit._calculator.get_modifications(item, attr_id):
-            operator, mod_value, carrier_item = mod_data
-            # Normalize operations to just three types: assignments, additions,
-            # multiplications
-            try:
-                normalization_func = NORMALIZATION_MAP[operator]
+        for operator, mod_value, carrier_item in (
+            item._fit._calculator.get_modifications(item, attr_id)
+        ):
+            opkind = OPERATOR_KINDS.get(operator)
+            # Pick best modification for assignments, based on high_is_good
+            # value
+            if opkind == OPKIND_PRE_ASSIGN:
+                if pre_assign is None or (
+                    mod_value > pre_assign if high_is_good
+                    else mod_value < pre_assign
+                ):
+                    pre_assign = mod_value
+                continue
+            elif opkind == OPKIND_POST_ASSIGN:
+                if post_assign is None or (
+                    mod_value > post_assign if high_is_good
+                    else mod_value < post_assign
+                ):
+                    post_assign = mod_value
+                continue
+            # Normalize the rest to the form of addend or multiplier
+            elif opkind == OPKIND_SUB:
+                mod_value = -mod_value
+            elif opkind == OPKIND_DIV:
+                mod_value = 1 / mod_value
+            elif opkind == OPKIND_PERCENT:
+                mod_value = mod_value / 100 + 1
             # Log error on any unknown operator types
-            except KeyError:
+            elif opkind is None:
                 msg = (
                     'malformed modifier on item type {}: unknown operator {}'
                 ).format(carrier_item._type_id, operator)
                 logger.warning(msg)
                 continue
-            mod_value = normalization_func(mod_value)
             # Decide if modification should be stacking penalized or not
-            penalize = (
-                not attr.stackable and
+            if (
+                not stackable and
                 carrier_item._type.category_id not in
                 PENALTY_IMMUNE_CATEGORY_IDS and
-                operator in PENALIZABLE_OPERATORS)
-            if penalize:
-                mod_values = penalized_mods.setdefault(operator, [])
+                operator in PENALIZABLE_OPERATORS
+            ):
+                if penalized_mods is None:
+                    penalized_mods = {}
+                mods = penalized_mods
             else:
-                mod_values = normal_mods.setdefault(operator, [])
-            mod_values.append(mod_value)
-        # When data gathering is complete, process penalized modifications. They
-        # are penalized on per-operator basis
-        for operator, mod_values in penalized_mods.items():
-            penalized_value = self.__penalize_values(mod_values)
-            normal_mods.setdefault(operator, []).append(penalized_value)
-        # Calculate value of non-penalized modifications, according to operator
-        # order
+                mods = normal_mods
+            try:
+                mods[operator].append(mod_value)
+            except KeyError:
+                mods[operator] = [mod_value]
+        # When data gathering is complete, process penalized modifications.
+        # They are penalized on per-operator basis
+        if penalized_mods is not None:
+            for operator, mod_values in penalized_mods.items():
+                penalized_value = self.__penalize_values(mod_values)
+                try:
+                    normal_mods[operator].append(penalized_value)
+                except KeyError:
+                    normal_mods[operator] = [penalized_value]
+        # Apply modifications according to operator order
+        if pre_assign is not None:
+            value = pre_assign
         for operator in sorted(normal_mods):
-            mod_values = normal_mods[operator]
-            # Pick best modification for assignments, based on high_is_good
-            # value
-            if operator in ASSIGNMENT_OPERATORS:
-                if attr.high_is_good:
-                    value = max(mod_values)
-                else:
-                    value = min(mod_values)
-            elif operator in ADDITION_OPERATORS:
-                for mod_val in mod_values:
-                    value += mod_val
-            elif operator in MULTIPLICATION_OPERATORS:
-                for mod_val in mod_values:
-                    value *= mod_val
+            if operator in ADDITION_OPERATORS:
+                for mod_value in normal_mods[operator]:
+                    value += mod_value
+            else:
+                for mod_value in normal_mods[operator]:
+                    value *= mod_value
+        if post_assign is not None:
+            value = post_assign
         # If attribute has upper cap, do not let its value to grow above it
-        if attr.max_attr_id is not None:
+        if max_attr_id is not None:
             try:
-                max_value = self[attr.max_attr_id]
+                max_value = self[max_attr_id]
             # If max value isn't available, don't cap anything
             except KeyError:
                 pass
             else:
                 value = min(value, max_value)
-                # Let map know that capping attribute restricts current
+                # Let calculator know that capping attribute restricts current
                 # attribute
-                self._cap_set(attr.max_attr_id, attr_id)
+                item._fit._calculator.add_dependency(
+                    item, max_attr_id, item, attr_id)
         # Some of attributes are rounded for whatever reason, deal with it after
         # all the calculations
         if attr_id in LIMITED_PRECISION_ATTR_IDS:
@@ -349,12 +407,13 @@ class MutableAttrMap:
         for penalization_chain in (chain_positive, chain_negative):
             # Same for intermediate per-chain value
             chain_value = 1
-            for pos, mod_value in enumerate(penalization_chain):
-                # Ignore 12th modification and further as non-significant
-                if pos > 10:
-                    break
-                # Apply stacking penalty based on modification position
-                chain_value *= 1 + mod_value * PENALTY_BASE ** (pos ** 2)
+            # Apply stacking penalty based on modification position. Zip stops
+            # at the end of coefficient table, ignoring the rest of
+            # modifications
+            for mod_value, coefficient in zip(
+                penalization_chain, PENALTY_COEFFICIENTS
+            ):
+                chain_value *= 1 + mod_value * coefficient
             value *= chain_value
         return value
 
@@ -368,7 +427,7 @@ class MutableAttrMap:
             return
         self.__override_callbacks[attr_id] = callback
         # Exposed attribute value may change after setting/resetting override
-        self.__publish(AttrValueChanged(self.__item, attr_id))
+        self.__invalidate_exposed(attr_id)
 
     def _del_override_callback(self, attr_id):
         """Remove override callback from attribute."""
@@ -380,7 +439,7 @@ class MutableAttrMap:
         if not overrides:
             self.__override_callbacks = None
         # Exposed attribute value may change after removing override
-        self.__publish(AttrValueChanged(self.__item, attr_id))
+        self.__invalidate_exposed(attr_id)
 
     def _override_value_may_change(self, attr_id):
         """Notify everyone that callback value may change.
@@ -388,45 +447,136 @@ class MutableAttrMap:
         When originator of callback knows that callback return value may (or
         will) change for an attribute, it should invoke this method.
         """
-        self.__publish(AttrValueChanged(self.__item, attr_id))
+        self.__invalidate_exposed(attr_id)
 
     def _get_without_overrides(self, attr_id, default=None):
         """Get attribute value without using overrides."""
         # Partially borrowed from get() method
         try:
             value = self.__modified_attrs[attr_id]
+            if self.__stamps is not None and not self.__revalidate(attr_id):
+                raise KeyError(attr_id)
         except KeyError:
             try:
                 value = self.__calculate(attr_id)
             except CALCULATE_RAISABLE_EXCEPTIONS:
                 return default
             else:
-                self.__modified_attrs[attr_id] = value
+                self.__store(attr_id, value)
         return value
 
-    # Cap-related methods
-    @property
-    def _cap_map(self):
-        # Returns map of attributes which cap something, and attributes capped
-        # by them
-        # Format {capping attribute ID: {capped attribute IDs}}
-        return self.__cap_map or {}
+    # Methods used by calculator
+    def _drop(self, attr_id):
+        """Remove calculated value without notifying anyone.
 
-    def _cap_set(self, capping_attr_id, capped_attr_id):
-        if self.__cap_map is None:
-            self.__cap_map = KeyedStorage()
-        self.__cap_map.add_data_entry(capping_attr_id, capped_attr_id)
+        Returns:
+            True if value was calculated, False otherwise.
+        """
+        try:
+            del self.__modified_attrs[attr_id]
+        except KeyError:
+            return False
+        return True
+
+    def _has_override(self, attr_id):
+        return (
+            self.__override_callbacks is not None and
+            attr_id in self.__override_callbacks)
 
-    def _cap_del(self, capping_attr_id, capped_attr_id):
-        self.__cap_map.rm_data_entry(capping_attr_id, capped_attr_id)
-        if not self.__cap_map:
-            self.__cap_map = None
+    # Methods used by lazy calculation
+    def _add_src(self, attr_id, src_item, src_attr_id):
+        """Record that attribute being calculated relies on source one."""
+        if self.__pending_srcs is None:
+            self.__pending_srcs = {}
+        self.__pending_srcs.setdefault(attr_id, []).append(
+            (src_item.attrs, src_attr_id))
+
+    def _bump_gen(self, attr_id, calculator):
+        """Mark value of the attribute as changed."""
+        if self.__gens is None:
+            self.__gens = {}
+        self.__gens[attr_id] = (calculator.get_next_gen(), None)
+
+    def _get_gen(self, attr_id):
+        """Get generation of up-to-date attribute value.
+
+        If stored value is stale, it is recalculated first.
+
+        Returns:
+            Generation of the value, or None if value is not available.
+        """
+        self._get_without_overrides(attr_id)
+        return self.__peek_gen(attr_id)
 
     # Auxiliary methods
-    def __publish(self, msg):
+    def __peek_gen(self, attr_id):
+        """Get generation of attribute value as it is now."""
+        if self.__gens is None:
+            return None
+        if attr_id in self.__modified_attrs or self._has_override(attr_id):
+            return self.__gens.get(attr_id, (None, None))[0]
+        return None
+
+    def __revalidate(self, attr_id):
+        """Check if lazily calculated value is still valid.
+
+        Stale value is removed from the map.
+        """
+        try:
+            affector_gen, src_stamps = self.__stamps[attr_id]
+        # Value was calculated by non-lazy calculator
+        except KeyError:
+            return True
+        item = self.__item
+        calculator = self.__get_calculator()
+        fresh = (
+            calculator is not None and
+            affector_gen is not None and
+            calculator.get_affector_gen(item, attr_id) == affector_gen and
+            all(
+                src_map._get_gen(src_attr_id) == src_gen
+                for src_map, src_attr_id, src_gen in src_stamps))
+        if not fresh:
+            del self.__modified_attrs[attr_id]
+            del self.__stamps[attr_id]
+        return fresh
+
+    def __store(self, attr_id, value):
+        """Store calculated value, stamping it when calculation is lazy."""
+        modified_attrs = self.__modified_attrs
+        calculator = self.__item._fit._calculator
+        if not calculator.lazy:
+            modified_attrs[attr_id] = value
+            return
+        try:
+            srcs = self.__pending_srcs.pop(attr_id)
+        except (AttributeError, KeyError):
+            srcs = ()
+        if self.__stamps is None:
+            self.__stamps = {}
+        self.__stamps[attr_id] = (
+            calculator.get_affector_gen(self.__item, attr_id),
+            tuple(
+                (src_map, src_attr_id, src_map.__peek_gen(src_attr_id))
+                for src_map, src_attr_id in srcs))
+        # Values which rely on this one need to be recalculated only when it
+        # actually changes
+        if self.__gens is None:
+            self.__gens = {}
+        gen, old_value = self.__gens.get(attr_id, (None, None))
+        if gen is None or old_value != value:
+            self.__gens[attr_id] = (calculator.get_next_gen(), value)
+        modified_attrs[attr_id] = value
+
+    def __get_calculator(self):
         try:
-            publish_func = self.__item._fit._publish
+            return self.__item._fit._calculator
         except AttributeError:
-            pass
-        else:
-            publish_func(msg)
+            return None
+
+    def __invalidate_exposed(self, attr_id):
+        """Remove everything which depends on exposed value of attribute."""
+        calculator = self.__get_calculator()
+        if calculator is not None:
+            calculator.invalidate_attrs(
+                (), exposed_nodes=((self.__item, attr_id),))
@@ -88,6 +88,12 @@ class AffectionRegister:
         # Format: {skill type ID: set(affectors)}
         self.__affector_owner_skillrq = KeyedStorage()
 
+        # All affectors which influence items, indexed by target item and
+        # target attribute. Kept in sync with maps above, to avoid scanning
+        # all affectors of an item when single attribute is calculated
+        # Format: {target item: {target attribute ID: set(affectors)}}
+        self.__affector_index = {}
+
     # Helpers for affectee getter - they find map and get data from it according
     # to passed affector
     def __affectee_getter_item_self(self, affector):
@@ -187,6 +193,10 @@ class AffectionRegister:
         # which target their own carrier are always enabled, because when they
         # are turned on - their target is always available
         self.__find_and_enable_awaitable_affectors(tgt_item)
+        # Index everything which influences new affectee
+        item_index = self.__affector_index[tgt_item] = KeyedStorage()
+        for affector in self.__collect_affectors(tgt_item):
+            item_index.add_data_entry(affector.modifier.tgt_attr_id, affector)
 
     def unregister_affectee(self, tgt_item):
         """Remove passed target item from register's affectee containers."""
@@ -195,6 +205,7 @@ class AffectionRegister:
             affectee_map.rm_data_entry(key, tgt_item)
         # Special handling for awaitable direct item affectors
         self.__disable_awaitable_affectors(tgt_item)
+        self.__affector_index.pop(tgt_item, None)
 
     def __get_affectee_maps(self, tgt_item):
         """Return all places where passed affectee should be stored.
@@ -245,6 +256,7 @@ class AffectionRegister:
         for affector in affectors_to_enable:
             self.__affector_item_awaiting.rm_data_entry(
                 affector.carrier_item, affector)
+            self.__index_affector(affector, (tgt_item,))
 
     def __disable_awaitable_affectors(self, tgt_item):
         """Disable awaitable affectors which influence passed item."""
@@ -260,6 +272,7 @@ class AffectionRegister:
         for affector in affectors_to_disable:
             self.__affector_item_awaiting.add_data_entry(
                 affector.carrier_item, affector)
+            self.__unindex_affector(affector, (tgt_item,))
 
     def __find_affectors_for_tgt_domain(self, affectors, tgt_domain):
         """Find affectors with specified domain.
@@ -303,8 +316,20 @@ class AffectionRegister:
         return results
 
     # Affector processing
-    def get_affectors(self, tgt_item):
-        """Get all affectors, which influence passed item."""
+    def get_affectors(self, tgt_item, tgt_attr_id):
+        """Get affectors which influence passed attribute of passed item.
+
+        Returns:
+            Iterable with affectors. It is owned by the register, and should not
+            be modified.
+        """
+        try:
+            return self.__affector_index[tgt_item][tgt_attr_id]
+        except KeyError:
+            return ()
+
+    def __collect_affectors(self, tgt_item):
+        """Find all affectors which influence passed item using maps."""
         affectors = set()
         # Item
         affectors.update(self.__affector_item_active.get(tgt_item, ()))
@@ -332,10 +357,13 @@ class AffectionRegister:
         It makes it possible for the affector to modify other items.
         """
         try:
-            key, affector_map = self.__get_affector_map(affector)
+            key, affector_map, affectee_map = self.__get_affector_map(affector)
             affector_map.add_data_entry(key, affector)
         except Exception as e:
             self.__handle_affector_errors(e, affector)
+        else:
+            self.__index_affector(affector, self.__get_indexed_affectees(
+                key, affector_map, affectee_map))
 
     def unregister_affector(self, affector):
         """Remove the affector from register.
@@ -343,36 +371,65 @@ class AffectionRegister:
         It makes it impossible for the affector to modify any other items.
         """
         try:
-            key, affector_map = self.__get_affector_map(affector)
+            key, affector_map, affectee_map = self.__get_affector_map(affector)
             affector_map.rm_data_entry(key, affector)
         except Exception as e:
             self.__handle_affector_errors(e, affector)
+        else:
+            self.__unindex_affector(affector, self.__get_indexed_affectees(
+                key, affector_map, affectee_map))
+
+    def __get_indexed_affectees(self, key, affector_map, affectee_map):
+        """Get items under which affector stored in passed place is indexed."""
+        # Direct item affectors influence their key item, but only when they
+        # are active
+        if affectee_map is None:
+            if affector_map is self.__affector_item_active:
+                return (key,)
+            return ()
+        return affectee_map.get(key, ())
+
+    def __index_affector(self, affector, tgt_items):
+        tgt_attr_id = affector.modifier.tgt_attr_id
+        for tgt_item in tgt_items:
+            try:
+                item_index = self.__affector_index[tgt_item]
+            except KeyError:
+                item_index = self.__affector_index[tgt_item] = KeyedStorage()
+            item_index.add_data_entry(tgt_attr_id, affector)
+
+    def __unindex_affector(self, affector, tgt_items):
+        tgt_attr_id = affector.modifier.tgt_attr_id
+        for tgt_item in tgt_items:
+            item_index = self.__affector_index.get(tgt_item)
+            if item_index is not None:
+                item_index.rm_data_entry(tgt_attr_id, affector)
 
     # Helpers for affector registering/unregistering, they find affector map and
     # key to it
     def __affector_map_getter_item_self(self, affector):
-        return affector.carrier_item, self.__affector_item_active
+        return affector.carrier_item, self.__affector_item_active, None
 
     def __affector_map_getter_item_character(self, affector):
         character = self.__calc_svc._current_char
         if character is not None:
-            return character, self.__affector_item_active
+            return character, self.__affector_item_active, None
         else:
-            return affector.carrier_item, self.__affector_item_awaiting
+            return affector.carrier_item, self.__affector_item_awaiting, None
 
     def __affector_map_getter_item_ship(self, affector):
         ship = self.__calc_svc._current_ship
         if ship is not None:
-            return ship, self.__affector_item_active
+            return ship, self.__affector_item_active, None
         else:
-            return affector.carrier_item, self.__affector_item_awaiting
+            return affector.carrier_item, self.__affector_item_awaiting, None
 
     def __affector_map_getter_item_other(self, affector):
         other_item = affector.carrier_item._other
         if other_item is not None and other_item in self.__affectee:
-            return other_item, self.__affector_item_active
+            return other_item, self.__affector_item_active, None
         else:
-            return affector.carrier_item, self.__affector_item_awaiting
+            return affector.carrier_item, self.__affector_item_awaiting, None
 
     __affector_map_getters_item = {
         ModDomain.self: __affector_map_getter_item_self,
@@ -391,25 +448,31 @@ class AffectionRegister:
 
     def __affector_map_getter_domain(self, affector):
         domain = self.__contextize_tgt_filter_domain(affector)
-        return domain, self.__affector_domain
+        return domain, self.__affector_domain, self.__affectee_domain
 
     def __affector_map_getter_domain_group(self, affector):
         domain = self.__contextize_tgt_filter_domain(affector)
         group_id = affector.modifier.tgt_filter_extra_arg
-        return (domain, group_id), self.__affector_domain_group
+        return (
+            (domain, group_id), self.__affector_domain_group,
+            self.__affectee_domain_group)
 
     def __affector_map_getter_domain_skillrq(self, affector):
         domain = self.__contextize_tgt_filter_domain(affector)
         skill_type_id = affector.modifier.tgt_filter_extra_arg
         if skill_type_id == EosTypeId.current_self:
             skill_type_id = affector.carrier_item._type_id
-        return (domain, skill_type_id), self.__affector_domain_skillrq
+        return (
+            (domain, skill_type_id), self.__affector_domain_skillrq,
+            self.__affectee_domain_skillrq)
 
     def __affector_map_getter_owner_skillrq(self, affector):
         skill_type_id = affector.modifier.tgt_filter_extra_arg
         if skill_type_id == EosTypeId.current_self:
             skill_type_id = affector.carrier_item._type_id
-        return skill_type_id, self.__affector_owner_skillrq
+        return (
+            skill_type_id, self.__affector_owner_skillrq,
+            self.__affectee_owner_skillrq)
 
     __affector_map_getters = {
         ModTgtFilter.item: __affector_map_getter_item,
@@ -425,8 +488,11 @@ class AffectionRegister:
             affector: Affector, for which map is looked up.
 
         Returns:
-            Tuple in (key, affector map) format, which defines where affector
-            should be located.
+            Tuple in (key, affector map, affectee map) format. Key and affector
+            map define where affector should be located. Items which are stored
+            in affectee map under the same key are influenced by the affector;
+            for affectors which influence single item directly, affectee map is
+            None.
 
         Raises:
             UnexpectedDomainError: If affector's modifier target domain is not
@@ -19,15 +19,19 @@
 # ==============================================================================
 
 
-from eos.const.eos import ModDomain
+from itertools import chain
+
 from eos.eve_object.modifier import DogmaModifier, ModificationCalculationError
 from eos.eve_object.modifier.python import BasePythonModifier
 from eos.fit.item import Character, Ship
 from eos.fit.message import (
-    AttrValueChanged, EffectsStarted, EffectsStopped, ItemAdded, ItemRemoved)
+    AttrValueChanged, AttrValueChangedMasked, AttrsValueChanged,
+    AttrsValueChangedMasked, EffectsStarted, EffectsStopped, ItemAdded,
+    ItemRemoved)
 from eos.util.keyed_storage import KeyedStorage
 from eos.util.pubsub.subscriber import BaseSubscriber
 from .affector import Affector
+from .dependency import DependencyGraph
 from .register import AffectionRegister
 
 
@@ -37,12 +41,40 @@ class CalculationService(BaseSubscriber):
     This class collects data about fit items and relations between them, and via
     exposed methods which provice data about these connections helps attribute
     map to calculate modified attribute values.
+
+    Args:
+        msg_broker: Object which handles message publication and subscriptions.
+        lazy (optional): When False (default), calculated attribute values are
+            removed as soon as anything they rely on changes, and messages
+            about changed values are published. When True, calculated values
+            are not touched on changes; instead, affector sets and attribute
+            values carry generation counters, and calculated values are
+            checked against generations they were calculated from when they
+            are accessed. No messages about changed attribute values are
+            published in this mode.
     """
 
-    def __init__(self, msg_broker):
+    def __init__(self, msg_broker, lazy=False):
         self._current_char = None
         self._current_ship = None
         self.__affections = AffectionRegister(self)
+        self.__lazy = lazy
+        if lazy:
+            self.__add_dependency = self.__add_src
+        else:
+            self.__dependencies = DependencyGraph()
+            self.__add_dependency = self.__dependencies.add_dependency
+        self.__last_gen = 0
+        # Generations of affector sets, which change each time set of affectors
+        # which influence attribute changes, or modification of any of them may
+        # change. Used only by lazy calculation.
+        # Format: {target item: (item generation, {attribute ID:
+        # generation})}
+        self.__affector_gens = {}
+        # Affectors spawned by running and previously running effects, kept
+        # to avoid building them each time effect is started or stopped.
+        # Format: {carrier item: {effect ID: (affectors)}}
+        self.__affector_cache = {}
         # Container with affectors which will receive messages
         # Format: {message type: set(affectors)}
         self.__subscribed_affectors = KeyedStorage()
@@ -62,18 +94,123 @@ class CalculationService(BaseSubscriber):
             format.
         """
         modifications = set()
-        for affector in self.__affections.get_affectors(tgt_item):
-            modifier, carrier_item = affector
-            if modifier.tgt_attr_id == tgt_attr_id:
+        for affector in self.__affections.get_affectors(tgt_item, tgt_attr_id):
+            modifier, carrier_item, _, _ = affector
+            # Record attributes modification is calculated from, to remove
+            # target value when any of them changes
+            if isinstance(modifier, DogmaModifier):
+                self.__add_dependency(
+                    carrier_item, modifier.src_attr_id, tgt_item, tgt_attr_id)
+            else:
+                for src_item, src_attr_id in modifier.get_src_attrs(
+                        carrier_item, self._current_ship):
+                    self.__add_dependency(
+                        src_item, src_attr_id, tgt_item, tgt_attr_id)
+            try:
+                mod_op, mod_value = modifier.get_modification(
+                    carrier_item, self._current_ship)
+            # Do nothing here - errors should be logged in modification getter
+            # or even earlier
+            except ModificationCalculationError:
+                continue
+            modifications.add((mod_op, mod_value, carrier_item))
+        return modifications
+
+    @property
+    def lazy(self):
+        return self.__lazy
+
+    def add_dependency(self, src_item, src_attr_id, tgt_item, tgt_attr_id):
+        """Record that target attribute value is calculated using source."""
+        self.__add_dependency(src_item, src_attr_id, tgt_item, tgt_attr_id)
+
+    def get_next_gen(self):
+        """Get new generation number, greater than any issued before."""
+        self.__last_gen += 1
+        return self.__last_gen
+
+    def get_affector_gen(self, tgt_item, tgt_attr_id):
+        """Get generation of affectors which influence target attribute.
+
+        Returns:
+            Object which compares equal to value returned earlier only if
+            neither set of affectors, nor modification of any of them could
+            change since then.
+        """
+        try:
+            item_gen, attr_gens = self.__affector_gens[tgt_item]
+        except KeyError:
+            return None
+        return item_gen, attr_gens.get(tgt_attr_id, 0)
+
+    def invalidate_attrs(self, nodes, exposed_nodes=()):
+        """Remove calculated attribute values and everything relying on them.
+
+        Values which depend on passed attributes are found in single traversal
+        of dependency graph, and single message is published about all of
+        them.
+
+        Args:
+            nodes: Iterable with (item, attribute ID) tuples, whose calculated
+                values should be removed.
+            exposed_nodes (optional): Iterable with (item, attribute ID) tuples,
+                whose exposed values might change while calculated values stay
+                valid, e.g. due to overrides.
+        """
+        # In lazy mode, only generations are updated; values are checked
+        # against them when requested
+        if self.__lazy:
+            affector_gens = self.__affector_gens
+            for item, attr_id in nodes:
                 try:
-                    mod_op, mod_value = modifier.get_modification(
-                        carrier_item, self._current_ship)
-                # Do nothing here - errors should be logged in modification
-                # getter or even earlier
-                except ModificationCalculationError:
+                    attr_gens = affector_gens[item][1]
+                except KeyError:
                     continue
-                modifications.add((mod_op, mod_value, carrier_item))
-        return modifications
+                attr_gens[attr_id] = self.get_next_gen()
+            for item, attr_id in exposed_nodes:
+                item.attrs._bump_gen(attr_id, self)
+            return
+        nodes = list(nodes)
+        dependencies = self.__dependencies
+        # Values being removed will be recalculated, and their dependencies
+        # will be recorded again
+        for node in nodes:
+            dependencies.rm_dependencies(node)
+        dependent_nodes = dependencies.pop_dependents(
+            chain(nodes, exposed_nodes))
+        # Format: {item: {attribute IDs}}
+        attr_changes = KeyedStorage()
+        masked_attr_changes = KeyedStorage()
+        for item, attr_id in exposed_nodes:
+            attr_changes.add_data_entry(item, attr_id)
+        for item, attr_id in chain(nodes, dependent_nodes):
+            attr_map = item.attrs
+            if not attr_map._drop(attr_id):
+                continue
+            # While exposed value of overridden attribute cannot change,
+            # underlying modified value can
+            if attr_map._has_override(attr_id):
+                masked_attr_changes.add_data_entry(item, attr_id)
+            else:
+                attr_changes.add_data_entry(item, attr_id)
+        msg_broker = self.__msg_broker
+        if attr_changes:
+            msg_broker._publish(AttrsValueChanged(attr_changes))
+            self.__publish_deprecated(AttrValueChanged, attr_changes)
+        if masked_attr_changes:
+            msg_broker._publish(AttrsValueChangedMasked(masked_attr_changes))
+            self.__publish_deprecated(
+                AttrValueChangedMasked, masked_attr_changes)
+
+    def __publish_deprecated(self, msg_type, attr_changes):
+        """Publish per-attribute messages, if anyone is subscribed to them."""
+        msg_broker = self.__msg_broker
+        if not msg_broker._has_subscribers(msg_type):
+            return
+        msg_broker._publish_bulk(
+            msg_type(item, attr_id)
+            for item, attr_ids in attr_changes.items()
+            for attr_id in attr_ids)
 
     # Handle item changes which are significant for calculator
     def _handle_item_added(self, msg):
@@ -82,6 +219,10 @@ class CalculationService(BaseSubscriber):
         elif isinstance(msg.item, Ship):
             self._current_ship = msg.item
         self.__affections.register_affectee(msg.item)
+        if self.__lazy:
+            # Affectors of the item might have changed while it was not
+            # tracked
+            self.__affector_gens[msg.item] = (self.get_next_gen(), {})
 
     def _handle_item_removed(self, msg):
         if msg.item is self._current_char:
@@ -89,52 +230,34 @@ class CalculationService(BaseSubscriber):
         elif msg.item is self._current_ship:
             self._current_ship = None
         self.__affections.unregister_affectee(msg.item)
+        item = msg.item
+        self.__affector_cache.pop(item, None)
+        if self.__lazy:
+            self.__affector_gens.pop(item, None)
+            return
+        # Values which rely on attributes of removed item are not valid anymore
+        self.invalidate_attrs(self.__dependencies.get_item_nodes(item))
+        self.__dependencies.rm_item(item)
 
     def _handle_effects_started(self, msg):
         affectors = self.__generate_affectors(msg.item, msg.effect_ids)
+        nodes = []
         for affector in affectors:
             self.__subscribe_affector(affector)
             self.__affections.register_affector(affector)
-            for tgt_item in self.__affections.get_affectees(affector):
-                del tgt_item.attrs[affector.modifier.tgt_attr_id]
+            nodes.extend(self.__get_tgt_nodes(affector))
+        self.invalidate_attrs(nodes)
 
     def _handle_effects_stopped(self, msg):
         affectors = self.__generate_affectors(msg.item, msg.effect_ids)
+        nodes = []
         for affector in affectors:
-            for tgt_item in self.__affections.get_affectees(affector):
-                del tgt_item.attrs[affector.modifier.tgt_attr_id]
+            nodes.extend(self.__get_tgt_nodes(affector))
             self.__affections.unregister_affector(affector)
             self.__unsubscribe_affector(affector)
+        self.invalidate_attrs(nodes)
 
     # Methods to clear calculated child nodes when parent nodes change
-    def _revise_regular_attr_dependents(self, msg):
-        """Remove calculated attribute values which rely on passed attribute.
-
-        Removing them allows to recalculate updated value. Here we process all
-        regular dependents, which include dependencies specified via capped
-        attribute map and via affectors with dogma modifiers. Affectors with
-        python modifiers are processed separately.
-        """
-        # Remove values of target attributes capped by changing attribute
-        item = msg.item
-        attr_id = msg.attr_id
-        for capped_attr_id in item.attrs._cap_map.get(attr_id, ()):
-            del item.attrs[capped_attr_id]
-        # Remove values of target attributes which are using changing attribute
-        # as modification source
-        for affector in self.__generate_affectors(
-                item, item._running_effect_ids):
-            modifier = affector.modifier
-            # Only dogma modifiers have source attribute specified, python
-            # modifiers are processed separately
-            if (
-                not isinstance(modifier, DogmaModifier) or
-                modifier.src_attr_id != attr_id
-            ):
-                continue
-            for tgt_item in self.__affections.get_affectees(affector):
-                del tgt_item.attrs[modifier.tgt_attr_id]
-
     def _revise_python_attr_dependents(self, msg):
         """Remove calculated attribute values when necessary.
 
@@ -149,21 +272,22 @@ class CalculationService(BaseSubscriber):
             return
         # Otherwise, ask affector if target value should change, and remove it
         # if it should
+        nodes = []
         for affector in self.__subscribed_affectors[msg_type]:
             if not affector.modifier.revise_modification(
                 msg, affector.carrier_item, self._current_ship
             ):
                 continue
-            for tgt_item in self.__affections.get_affectees(affector):
-                del tgt_item.attrs[affector.modifier.tgt_attr_id]
+            nodes.extend(self.__get_tgt_nodes(affector))
+        if nodes:
+            self.invalidate_attrs(nodes)
 
     # Message routing
     _handler_map = {
         ItemAdded: _handle_item_added,
         ItemRemoved: _handle_item_removed,
         EffectsStarted: _handle_effects_started,
-        EffectsStopped: _handle_effects_stopped,
-        AttrValueChanged: _revise_regular_attr_dependents}
+        EffectsStopped: _handle_effects_stopped}
 
     def _notify(self, msg):
         BaseSubscriber._notify(self, msg)
@@ -171,10 +295,6 @@ class CalculationService(BaseSubscriber):
         # any message may result in deleting dependent attributes
         self._revise_python_attr_dependents(msg)
 
-    # Do not process here just target domain
-    _supported_domains = set(
-        domain for domain in ModDomain if domain != ModDomain.target)
-
     # Affector generation and manipulation
     def __generate_affectors(self, item, effect_ids):
         """Get all affectors spawned by the item.
@@ -186,19 +306,34 @@ class CalculationService(BaseSubscriber):
                 this iterable, it's filtered out.
 
         Return value:
-            Set with Affector objects.
+            List with Affector objects.
         """
-        affectors = set()
-        for effect_id, effect in item._type_effects.items():
-            if effect_id not in effect_ids:
-                continue
-            for modifier in effect.modifiers:
-                if modifier.tgt_domain not in self._supported_domains:
+        affectors = []
+        item_affectors = self.__affector_cache.setdefault(item, {})
+        for effect_id in effect_ids:
+            try:
+                effect_affectors = item_affectors[effect_id]
+            except KeyError:
+                try:
+                    effect = item._type_effects[effect_id]
+                except KeyError:
                     continue
-                affector = Affector(modifier, item)
-                affectors.add(affector)
+                effect_affectors = item_affectors[effect_id] = tuple(
+                    Affector(modifier, item, effect_id, position)
+                    for position, modifier in effect._local_modifiers)
+            affectors.extend(effect_affectors)
         return affectors
 
+    def __add_src(self, src_item, src_attr_id, tgt_item, tgt_attr_id):
+        tgt_item.attrs._add_src(tgt_attr_id, src_item, src_attr_id)
+
+    def __get_tgt_nodes(self, affector):
+        """Get (item, attribute ID) tuples influenced by the affector."""
+        tgt_attr_id = affector.modifier.tgt_attr_id
+        return [
+            (tgt_item, tgt_attr_id)
+            for tgt_item in self.__affections.get_affectees(affector)]
+
     # Python affector subscription/unsubscription
     def __subscribe_affector(self, affector):
         """Subscribe python affector to message types it wants."""
@@ -48,6 +48,11 @@ class Fit(MsgBroker):
     Args:
         source (optional): Source to use with this fit. When not specified,
             source which is set as default in source manager will be used.
+        lazy_attrs (optional): When True, calculated attribute values are
+            checked for staleness when they are requested, instead of being
+            removed on every change which may influence them. Useful when fit
+            is changed much more often than its attributes are read. By
+            default, values are removed on changes.
 
     Attributes:
         ship: Access point for ship.
@@ -68,7 +73,7 @@ class Fit(MsgBroker):
             point.
     """
 
-    def __init__(self, source=DEFAULT):
+    def __init__(self, source=DEFAULT, lazy_attrs=False):
         MsgBroker.__init__(self)
         self.__source = None
         self.__default_incoming_dmg = DmgProfile(25, 25, 25, 25)
@@ -86,7 +91,7 @@ class Fit(MsgBroker):
         self.drones = ItemSet(self, Drone)
         self.fighters = ItemSet(self, FighterSquad)
         # Initialize services
-        self._calculator = CalculationService(self)
+        self._calculator = CalculationService(self, lazy=lazy_attrs)
         self.stats = StatService(self)
         self._restriction = RestrictionService(self, self.stats)
         self._volatile_mgr = VolatileMgr(self, volatiles=(self.stats,))
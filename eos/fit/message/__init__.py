@@ -20,6 +20,6 @@
 
 
 from .message import (
-    AttrValueChanged, AttrValueChangedMasked, DefaultIncomingDmgChanged,
-    EffectsStarted, EffectsStopped, ItemAdded, ItemRemoved, StatesActivated,
-    StatesDeactivated)
+    AttrValueChanged, AttrValueChangedMasked, AttrsValueChanged,
+    AttrsValueChangedMasked, DefaultIncomingDmgChanged, EffectsStarted,
+    EffectsStopped, ItemAdded, ItemRemoved, StatesActivated, StatesDeactivated)
@@ -90,7 +90,34 @@ class EffectsStopped:
         return make_repr_str(self, spec)
 
 
+class AttrsValueChanged:
+
+    def __init__(self, attr_changes):
+        # Format: {item: {attribute IDs}}
+        self.attr_changes = attr_changes
+
+    def __repr__(self):
+        spec = ['attr_changes']
+        return make_repr_str(self, spec)
+
+
+class AttrsValueChangedMasked:
+
+    def __init__(self, attr_changes):
+        # Format: {item: {attribute IDs}}
+        self.attr_changes = attr_changes
+
+    def __repr__(self):
+        spec = ['attr_changes']
+        return make_repr_str(self, spec)
+
+
 class AttrValueChanged:
+    """Deprecated, subscribe to AttrsValueChanged instead.
+
+    Published for each attribute from AttrsValueChanged message, if there're
+    subscribers.
+    """
 
     def __init__(self, item, attr_id):
         self.item = item
@@ -102,6 +129,11 @@ class AttrValueChanged:
 
 
 class AttrValueChangedMasked:
+    """Deprecated, subscribe to AttrsValueChangedMasked instead.
+
+    Published for each attribute from AttrsValueChangedMasked message, if
+    there're subscribers.
+    """
 
     def __init__(self, item, attr_id):
         self.item = item
@@ -104,6 +104,13 @@ class ItemClassRestrictionRegister(BaseRestrictionRegister):
     def validate(self):
         tainted_items = {}
         for item in self.__items:
+            # Use item classes precalculated by eve object builder, if they are
+            # available
+            item_class_names = self.__get_item_class_names(item)
+            if item_class_names is not None:
+                if type(item).__name__ not in item_class_names:
+                    tainted_items[item] = self.__get_error_data(item)
+                continue
             # Get validator function for class of passed item. If it is not
             # found or fails, seek for 'right' item class for the item type
             try:
@@ -116,12 +123,23 @@ class ItemClassRestrictionRegister(BaseRestrictionRegister):
         if tainted_items:
             raise RestrictionValidationError(tainted_items)
 
+    @staticmethod
+    def __get_item_class_names(item):
+        derived = getattr(item._type, 'derived', None)
+        if derived is None:
+            return None
+        return derived.item_class_names
+
     def __get_error_data(self, item):
         allowed_classes = []
+        item_class_names = self.__get_item_class_names(item)
         # Cycle through our class validator dictionary and seek for acceptable
         # classes for this item type
         for item_class, validator_func in CLASS_VALIDATORS.items():
-            if validator_func(item._type) is True:
+            if item_class_names is not None:
+                if item_class.__name__ in item_class_names:
+                    allowed_classes.append(item_class)
+            elif validator_func(item._type) is True:
                 allowed_classes.append(item_class)
         error_data = ItemClassErrorData(
             item_class=type(item),
@@ -103,6 +103,24 @@ class ShipTypeGroupRestrictionRegister(BaseRestrictionRegister):
             self.__current_ship = msg.item
         elif not isinstance(msg.item, TRACKED_ITEM_CLASSES):
             return
+        derived = getattr(msg.item._type, 'derived', None)
+        # Use data precalculated by eve object builder, if it is available
+        if derived is not None:
+            allowed_type_ids = derived.fit_ship_type_ids
+            allowed_group_ids = derived.fit_ship_group_ids
+        else:
+            allowed_type_ids, allowed_group_ids = self.__get_allowed_ids(
+                msg.item)
+        # Ignore non-restricted items
+        if not allowed_type_ids and not allowed_group_ids:
+            return
+        # Finally, register items which made it into here
+        self.__restricted_items[msg.item] = AllowedData(
+            type_ids=allowed_type_ids,
+            group_ids=allowed_group_ids)
+
+    @staticmethod
+    def __get_allowed_ids(item):
         # Containers for type IDs and group IDs of ships, to which item is
         # allowed to fit
         allowed_type_ids = set()
@@ -114,18 +132,12 @@ class ShipTypeGroupRestrictionRegister(BaseRestrictionRegister):
             # Cycle through IDs of known restriction attributes
             for allowed_attr_id in allowed_attr_ids:
                 try:
-                    allowed_value = msg.item._type_attrs[allowed_attr_id]
+                    allowed_value = item._type_attrs[allowed_attr_id]
                 except KeyError:
                     continue
                 else:
                     allowed_container.add(allowed_value)
-        # Ignore non-restricted items
-        if not allowed_type_ids and not allowed_group_ids:
-            return
-        # Finally, register items which made it into here
-        self.__restricted_items[msg.item] = AllowedData(
-            type_ids=tuple(allowed_type_ids),
-            group_ids=tuple(allowed_group_ids))
+        return tuple(allowed_type_ids), tuple(allowed_group_ids)
 
     def _handle_item_removed(self, msg):
         if msg.item is self.__current_ship:
@@ -20,7 +20,6 @@
 
 
 from .exception import RestrictionValidationError, ValidationError
-from .restriction import *
 
 
 class RestrictionService:
@@ -37,6 +36,25 @@ class RestrictionService:
     """
 
     def __init__(self, msg_broker, stats):
+        # Registers are imported when first fit is created, to keep import of
+        # eos cheap
+        from .restriction import (
+            BoosterIndexRestrictionRegister, CalibrationRestriction,
+            CapitalItemRestrictionRegister, ChargeGroupRestrictionRegister,
+            ChargeSizeRestrictionRegister, ChargeVolumeRestrictionRegister,
+            CpuRestriction, DroneBandwidthRestriction,
+            DroneBayVolumeRestriction, DroneGroupRestrictionRegister,
+            HighSlotRestriction, ImplantIndexRestrictionRegister,
+            ItemClassRestrictionRegister, LaunchedDroneRestriction,
+            LauncherSlotRestriction, LowSlotRestriction,
+            MaxGroupActiveRestrictionRegister,
+            MaxGroupFittedRestrictionRegister,
+            MaxGroupOnlineRestrictionRegister, MediumSlotRestriction,
+            PowergridRestriction, RigSizeRestrictionRegister,
+            RigSlotRestriction, ShipTypeGroupRestrictionRegister,
+            SkillRequirementRestrictionRegister, StateRestrictionRegister,
+            SubsystemIndexRestrictionRegister, SubsystemSlotRestriction,
+            TurretSlotRestriction)
         # Container for all restrictions
         self.__restrictions = {
             BoosterIndexRestrictionRegister(msg_broker),
@@ -25,7 +25,7 @@ from math import ceil, floor
 
 from eos.const.eve import AttrId, EffectId
 from eos.fit.message import (
-    AttrValueChanged, AttrValueChangedMasked, DefaultIncomingDmgChanged,
+    AttrsValueChanged, AttrsValueChangedMasked, DefaultIncomingDmgChanged,
     EffectsStarted, EffectsStopped)
 from eos.util.pubsub.subscriber import BaseSubscriber
 from eos.util.repr import make_repr_str
@@ -109,10 +109,21 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
         self.__data = {}
         self.__fit = fit
         self.__running = False
+        # Generations of attributes simulation results are based on, used
+        # when fit calculates attributes lazily
+        self.__input_stamps = None
         fit._subscribe(self, self._handler_map.keys())
 
     def get_reso(self, item, attr_id):
         """Get specified resonance for specified RAH item."""
+        # Lazy calculator does not notify about changed attribute values, thus
+        # check if simulation inputs have changed
+        if (
+            self.__input_stamps is not None and
+            self.__running is False and
+            self.__get_input_stamps() != self.__input_stamps
+        ):
+            self.__clear_results()
         # Try fetching already simulated results
         resos = self.__data[item]
         try:
@@ -141,6 +152,8 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
                 for item in self.__data:
                     for attr_id in res_attr_ids:
                         item.attrs._override_value_may_change(attr_id)
+                if self.__fit._calculator.lazy:
+                    self.__input_stamps = self.__get_input_stamps()
                 self.__running = False
         return reso
 
@@ -435,30 +448,21 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
                 pass
             self.__clear_results()
 
-    def _handle_attr_changed(self, msg):
-        item = msg.item
-        # Ship resistances
-        if item is self.__fit.ship and msg.attr_id in res_attr_ids:
-            self.__clear_results()
-        # RAH resistance shift or cycle time
-        elif item in self.__data and (
-            msg.attr_id == AttrId.resist_shift_amount or
-            # Cycle time change invalidates results only when there're more than
-            # 1 RAHs
-            (
-                len(self.__data) > 1 and
-                msg.attr_id == self.__get_rah_effect(item).duration_attr_id
-            )
-        ):
-            self.__clear_results()
+    def _handle_attrs_changed(self, msg):
+        for item, attr_ids in msg.attr_changes.items():
+            if self.__attrs_invalidate_results(item, attr_ids):
+                self.__clear_results()
+                return
 
-    def _handle_attr_changed_masked(self, msg):
+    def _handle_attrs_changed_masked(self, msg):
         # We've set up overrides on RAHs' resonance attributes, but when base
         # (not modified by simulator) values of these attributes change, we
         # should re-run simulator - as now we have different resonance value to
         # base sim results off
-        if msg.item in self.__data and msg.attr_id in res_attr_ids:
-            self.__clear_results()
+        for item, attr_ids in msg.attr_changes.items():
+            if item in self.__data and not attr_ids.isdisjoint(res_attr_ids):
+                self.__clear_results()
+                return
 
     def _handle_changed_dmg_profile(self, _):
         self.__clear_results()
@@ -466,8 +470,8 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
     _handler_map = {
         EffectsStarted: _handle_effects_started,
         EffectsStopped: _handle_effects_stopped,
-        AttrValueChanged: _handle_attr_changed,
-        AttrValueChangedMasked: _handle_attr_changed_masked,
+        AttrsValueChanged: _handle_attrs_changed,
+        AttrsValueChangedMasked: _handle_attrs_changed_masked,
         DefaultIncomingDmgChanged: _handle_changed_dmg_profile}
 
     def _notify(self, msg):
@@ -484,6 +488,22 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
         except KeyError:
             return None
 
+    def __attrs_invalidate_results(self, item, attr_ids):
+        """Check if changes of passed attributes invalidate sim results."""
+        # Ship resistances
+        if item is self.__fit.ship:
+            return not attr_ids.isdisjoint(res_attr_ids)
+        if item not in self.__data:
+            return False
+        # RAH resistance shift
+        if AttrId.resist_shift_amount in attr_ids:
+            return True
+        # Cycle time change invalidates results only when there're more than 1
+        # RAHs
+        return (
+            len(self.__data) > 1 and
+            self.__get_rah_effect(item).duration_attr_id in attr_ids)
+
     def __get_rah_duration(self, item):
         """Get time it takes for RAH effect to complete one cycle."""
         effect = self.__get_rah_effect(item)
@@ -491,8 +511,34 @@ class ReactiveArmorHardenerSimulator(BaseSubscriber):
             return None
         return effect.get_duration(item)
 
+    def __get_input_stamps(self):
+        """Get generations of attributes simulation results are based on."""
+        running = self.__running
+        # Getting generations might trigger recalculation of ship resonances,
+        # which are modified by RAH resonances - do not re-run simulation
+        # while doing it
+        self.__running = True
+        try:
+            ship = self.__fit.ship
+            stamps = [ship]
+            if ship is not None:
+                stamps.extend(
+                    ship.attrs._get_gen(attr_id) for attr_id in res_attr_ids)
+            for item in self.__data:
+                attr_ids = [AttrId.resist_shift_amount, *res_attr_ids]
+                if len(self.__data) > 1:
+                    attr_ids.append(
+                        self.__get_rah_effect(item).duration_attr_id)
+                stamps.append(item)
+                stamps.extend(
+                    item.attrs._get_gen(attr_id) for attr_id in attr_ids)
+        finally:
+            self.__running = running
+        return stamps
+
     def __clear_results(self):
         """Remove simulation results, if there're any."""
+        self.__input_stamps = None
         for item, resos in self.__data.items():
             resos.clear()
             for attr_id in res_attr_ids:
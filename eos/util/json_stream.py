@@ -0,0 +1,134 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from json import JSONDecodeError, JSONDecoder
+
+
+WHITESPACE = ' \t\n\r'
+
+
+def iter_json_container(file, chunk_size=65536):
+    """Iterate over elements of top-level JSON container.
+
+    File is read in chunks, and elements are decoded one by one, thus only
+    single element and single chunk of text are kept in memory at any given
+    moment.
+
+    Args:
+        file: Text file object with JSON document, whose top-level element is
+            an array or an object.
+        chunk_size (optional): Quantity of characters to read at once.
+
+    Yields:
+        Values of array elements, or (key, value) tuples for object members.
+    """
+    return _ContainerReader(file, chunk_size).iter_elements()
+
+
+class _ContainerReader:
+
+    def __init__(self, file, chunk_size):
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__decoder = JSONDecoder()
+        self.__buffer = ''
+        self.__pos = 0
+        self.__eof = False
+
+    def iter_elements(self):
+        opening = self.__next_char()
+        if opening == '[':
+            closing = ']'
+        elif opening == '{':
+            closing = '}'
+        else:
+            raise self.__error('expected array or object')
+        self.__pos += 1
+        if self.__next_char() == closing:
+            self.__pos += 1
+            return
+        while True:
+            if opening == '{':
+                key = self.__decode_value()
+                if not isinstance(key, str):
+                    raise self.__error('expected object key')
+                if self.__next_char() != ':':
+                    raise self.__error('expected colon')
+                self.__pos += 1
+                yield key, self.__decode_value()
+            else:
+                yield self.__decode_value()
+            char = self.__next_char()
+            self.__pos += 1
+            if char == closing:
+                return
+            if char != ',':
+                raise self.__error('expected comma or container end')
+
+    def __next_char(self):
+        """Skip whitespace and return next significant character."""
+        while True:
+            buffer = self.__buffer
+            pos = self.__pos
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            self.__pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self.__read_chunk():
+                raise self.__error('unexpected end of data')
+
+    def __decode_value(self):
+        self.__next_char()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(
+                    self.__buffer, self.__pos)
+            except JSONDecodeError:
+                if not self.__read_chunk():
+                    raise
+                continue
+            # Value which ends right at the end of buffer might be incomplete,
+            # e.g. number whose digits are split between chunks
+            if end == len(self.__buffer) and self.__read_chunk():
+                continue
+            self.__pos = end
+            return value
+
+    def __read_chunk(self):
+        """Append next chunk of data to buffer.
+
+        Returns:
+            False if there is no more data, True otherwise.
+        """
+        if self.__eof:
+            return False
+        chunk = self.__file.read(self.__chunk_size)
+        if not chunk:
+            self.__eof = True
+            return False
+        # Drop data which has already been processed
+        self.__buffer = self.__buffer[self.__pos:] + chunk
+        self.__pos = 0
+        return True
+
+    def __error(self, msg):
+        return JSONDecodeError(msg, self.__buffer, self.__pos)
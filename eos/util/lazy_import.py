@@ -0,0 +1,54 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from importlib import import_module
+
+
+def make_lazy_attrs(module_globals, lazy_names):
+    """Make module attributes which are imported on first access.
+
+    Args:
+        module_globals: Globals of module which should get lazy attributes.
+        lazy_names: Map in {attribute name: module name} format, where module
+            name is relative to package of the module.
+
+    Returns:
+        Tuple with __getattr__ and __dir__ functions, which should be assigned
+        to module globals.
+    """
+    module_name = module_globals['__name__']
+    package_name = module_globals['__package__']
+
+    def __getattr__(name):
+        try:
+            source_name = lazy_names[name]
+        except KeyError:
+            msg = 'module {!r} has no attribute {!r}'.format(module_name, name)
+            raise AttributeError(msg) from None
+        value = getattr(import_module(source_name, package_name), name)
+        # Store fetched attribute, so that next access doesn't get here
+        module_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(module_globals).union(lazy_names))
+
+    return __getattr__, __dir__
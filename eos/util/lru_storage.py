@@ -0,0 +1,51 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from collections import OrderedDict
+
+
+class LruStorage(OrderedDict):
+    """Dictionary which evicts least recently used entries.
+
+    Each successful key lookup marks entry as most recently used. When quantity
+    of entries exceeds capacity, least recently used entries are removed.
+
+    Args:
+        capacity (optional): Max quantity of entries to keep. If not specified,
+            nothing is evicted.
+    """
+
+    def __init__(self, capacity=None):
+        OrderedDict.__init__(self)
+        self.capacity = capacity
+
+    def __getitem__(self, key):
+        value = OrderedDict.__getitem__(self, key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        OrderedDict.__setitem__(self, key, value)
+        self.move_to_end(key)
+        capacity = self.capacity
+        if capacity is not None:
+            while len(self) > capacity:
+                self.popitem(last=False)
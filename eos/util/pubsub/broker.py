@@ -45,6 +45,10 @@ class MsgBroker:
         for msg_type in msgtypes_to_remove:
             del self.__subscribers[msg_type]
 
+    def _has_subscribers(self, msg_type):
+        """Check if anyone is subscribed to passed message type."""
+        return msg_type in self.__subscribers
+
     def _publish(self, msg):
         """Publish single message."""
         for subscriber in self.__subscribers.get(type(msg), ()):
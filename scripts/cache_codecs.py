@@ -0,0 +1,91 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+"""
+Compare codecs available for JSON cache: time it takes to write and to load
+cache compressed with each of them, and size of cache file.
+"""
+
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.realpath(os.path.join(script_dir, '..')))
+
+from eos import JsonCacheHandler, JsonDataHandler
+from eos.data.cache_handler.stream_writer import CODEC_MODULES
+from eos.data.eve_obj_builder import EveObjBuilder
+
+
+def measure_codec(eve_objects, cache_path, codec, runs):
+    """Write and load cache with passed codec.
+
+    Returns:
+        Tuple with write time in seconds, best load time in seconds out of
+        passed quantity of runs, and file size in bytes.
+    """
+    started = time.perf_counter()
+    JsonCacheHandler(cache_path, codec=codec).update_cache(eve_objects, 'fp')
+    write_time = time.perf_counter() - started
+    load_times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cache_handler = JsonCacheHandler(cache_path)
+        # Loading is triggered by first request
+        cache_handler.preload()
+        load_times.append(time.perf_counter() - started)
+    return write_time, min(load_times), os.path.getsize(cache_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare load time and size of JSON cache per codec.')
+    parser.add_argument(
+        '-j', '--json', required=True, type=str,
+        help='path to folder with Phobos JSON dump')
+    parser.add_argument(
+        '-r', '--runs', default=3, type=int,
+        help='quantity of load runs per codec, best one is reported')
+    parser.add_argument(
+        '-c', '--codec', action='append', choices=sorted(CODEC_MODULES),
+        help='codec to measure, can be passed multiple times; by default, '
+        'all codecs are measured')
+    args = parser.parse_args()
+
+    eve_objects = EveObjBuilder.run(JsonDataHandler(args.json))
+    codecs = args.codec or list(CODEC_MODULES)
+    print('{:<6} {:>10} {:>10} {:>12}'.format(
+        'codec', 'write, s', 'load, s', 'size, KiB'))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for codec in codecs:
+            cache_path = os.path.join(tmp_dir, 'eos_{}.json'.format(codec))
+            write_time, load_time, size = measure_codec(
+                eve_objects, cache_path, codec, args.runs)
+            print('{:<6} {:>10.3f} {:>10.3f} {:>12.0f}'.format(
+                codec, write_time, load_time, size / 1024))
+
+
+if __name__ == '__main__':
+    main()
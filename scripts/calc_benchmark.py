@@ -0,0 +1,379 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+"""
+Measure per-attribute cost of attribute calculation on skill-complete
+battleship fit.
+
+Fit is built either out of Phobos JSON dump, or, when it is not passed, out of
+synthetic data which mimics structure of eve data: every skill modifies ship
+and module attributes, and low-slot modules apply stacking-penalized bonuses
+to the ship.
+
+Unless disabled, the same fit is also measured with reference implementation
+of calculation, which uses generic per-operator loop, and values calculated by
+both implementations are compared.
+"""
+
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.realpath(os.path.join(script_dir, '..')))
+
+from eos import *
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.const.eve import EffectCategoryId, TypeCategoryId, TypeId
+from eos.data.cache_handler.exception import (
+    AttrFetchError, EffectFetchError, TypeFetchError)
+from eos.data.source import Source
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.modifier import DogmaModifier
+from eos.eve_object.type import Type
+from eos.fit.calculator import map as attr_map
+from eos.fit.calculator.exception import AttrMetadataError, BaseValueError
+
+
+SYNTHETIC_SHIP_ATTRS = 150
+SYNTHETIC_MODULE_ATTRS = 40
+SYNTHETIC_SKILLS = 400
+SYNTHETIC_MODULES = 24
+
+# Normalization functions used by reference calculation implementation
+REFERENCE_NORMALIZATION_MAP = {
+    ModOperator.pre_assign: lambda value: value,
+    ModOperator.pre_mul: lambda value: value,
+    ModOperator.pre_div: lambda value: 1 / value,
+    ModOperator.mod_add: lambda value: value,
+    ModOperator.mod_sub: lambda value: -value,
+    ModOperator.post_mul: lambda value: value,
+    ModOperator.post_mul_immune: lambda value: value,
+    ModOperator.post_div: lambda value: 1 / value,
+    ModOperator.post_percent: lambda value: value / 100 + 1,
+    ModOperator.post_assign: lambda value: value}
+
+
+class SyntheticCacheHandler:
+    """Cache handler which provides eve objects generated in memory."""
+
+    def __init__(self):
+        self.types = {}
+        self.attrs = {}
+        self.effects = {}
+
+    def get_type(self, type_id):
+        try:
+            return self.types[type_id]
+        except KeyError:
+            raise TypeFetchError(type_id)
+
+    def get_attr(self, attr_id):
+        try:
+            return self.attrs[attr_id]
+        except KeyError:
+            raise AttrFetchError(attr_id)
+
+    def get_effect(self, effect_id):
+        try:
+            return self.effects[effect_id]
+        except KeyError:
+            raise EffectFetchError(effect_id)
+
+
+def make_synthetic_fit():
+    rnd = random.Random(0)
+    cache_handler = SyntheticCacheHandler()
+
+    def mkattr(**kwargs):
+        attr_id = len(cache_handler.attrs) + 1
+        attr = cache_handler.attrs[attr_id] = Attribute(attr_id, **kwargs)
+        return attr
+
+    def mkeffect(modifiers):
+        effect_id = len(cache_handler.effects) + 1
+        effect = cache_handler.effects[effect_id] = Effect(
+            effect_id, category_id=EffectCategoryId.passive,
+            modifiers=modifiers, customize=False)
+        return effect
+
+    def mktype(category_id, attrs, effects):
+        type_id = len(cache_handler.types) + 1
+        item_type = cache_handler.types[type_id] = Type(
+            type_id, group_id=category_id, category_id=category_id,
+            attrs=attrs, effects=effects, customize=False)
+        return item_type
+
+    def mkmod(tgt_filter, tgt_attr, operator, src_attr):
+        return DogmaModifier(
+            tgt_filter=tgt_filter, tgt_domain=ModDomain.ship,
+            tgt_attr_id=tgt_attr.id, operator=operator, src_attr_id=src_attr.id)
+
+    # Half of the attributes can be stacking penalized
+    ship_attrs = [
+        mkattr(stackable=bool(i % 2)) for i in range(SYNTHETIC_SHIP_ATTRS)]
+    module_attrs = [
+        mkattr(stackable=bool(i % 2)) for i in range(SYNTHETIC_MODULE_ATTRS)]
+    bonus_attr = mkattr()
+    cache_handler.types[TypeId.character_static] = Type(
+        TypeId.character_static, customize=False)
+    ship_type = mktype(
+        TypeCategoryId.ship,
+        {a.id: rnd.uniform(100, 1000) for a in ship_attrs}, ())
+    module_base = {a.id: rnd.uniform(10, 100) for a in module_attrs}
+    module_base[bonus_attr.id] = 10
+    skill_types = []
+    for _ in range(SYNTHETIC_SKILLS):
+        effect = mkeffect((
+            mkmod(
+                ModTgtFilter.item, rnd.choice(ship_attrs),
+                ModOperator.post_percent, bonus_attr),
+            mkmod(
+                ModTgtFilter.domain, rnd.choice(module_attrs),
+                rnd.choice((ModOperator.post_percent, ModOperator.mod_add)),
+                bonus_attr)))
+        skill_types.append(mktype(
+            TypeCategoryId.skill, {bonus_attr.id: rnd.uniform(1, 5)},
+            (effect,)))
+    module_types = []
+    for _ in range(SYNTHETIC_MODULES):
+        effect = mkeffect(tuple(
+            mkmod(
+                ModTgtFilter.item, rnd.choice(ship_attrs),
+                ModOperator.post_percent, bonus_attr)
+            for _ in range(3)))
+        module_types.append(mktype(
+            TypeCategoryId.module, module_base, (effect,)))
+    fit = Fit(Source('synthetic', cache_handler))
+    fit.ship = Ship(ship_type.id)
+    for skill_type in skill_types:
+        fit.skills.add(Skill(skill_type.id, level=5))
+    for module_type in module_types:
+        fit.modules.low.append(ModuleLow(module_type.id))
+    return fit
+
+
+def make_data_fit(json_path, ship_type_id, module_type_ids):
+    data_handler = JsonDataHandler(json_path)
+    skill_group_ids = set(
+        row['groupID'] for row in data_handler.get_evegroups()
+        if row.get('categoryID') == TypeCategoryId.skill)
+    skill_type_ids = [
+        row['typeID'] for row in data_handler.get_evetypes()
+        if row.get('groupID') in skill_group_ids]
+    cache_path = os.path.join(tempfile.mkdtemp(), 'eos.json.bz2')
+    SourceManager.add('bench', data_handler, JsonCacheHandler(cache_path))
+    fit = Fit('bench')
+    fit.ship = Ship(ship_type_id)
+    for skill_type_id in skill_type_ids:
+        fit.skills.add(Skill(skill_type_id, level=5))
+    for module_type_id in module_type_ids:
+        fit.modules.low.append(ModuleLow(module_type_id))
+    return fit
+
+
+def reference_calculate(attr_map_obj, attr_id):
+    """Calculate attribute value using generic per-operator loop.
+
+    This is how attributes were calculated before calculation kernel was
+    specialized: attribute metadata is requested from cache handler on every
+    calculation, and all modifications are normalized via map of functions and
+    grouped per operator.
+    """
+    item = attr_map_obj._MutableAttrMap__item
+    pending_srcs = attr_map_obj._MutableAttrMap__pending_srcs
+    if pending_srcs is not None:
+        pending_srcs.pop(attr_id, None)
+    try:
+        attr = item._fit.source.cache_handler.get_attr(attr_id)
+    except (AttributeError, AttrFetchError) as e:
+        raise AttrMetadataError(attr_id) from e
+    try:
+        value = item._type_attrs[attr_id]
+    except KeyError:
+        value = attr.default_value
+        if value is None:
+            raise BaseValueError(attr_id)
+    normal_mods = {}
+    penalized_mods = {}
+    for mod_data in item._fit._calculator.get_modifications(item, attr_id):
+        operator, mod_value, carrier_item = mod_data
+        try:
+            normalization_func = REFERENCE_NORMALIZATION_MAP[operator]
+        except KeyError:
+            continue
+        mod_value = normalization_func(mod_value)
+        penalize = (
+            not attr.stackable and
+            carrier_item._type.category_id not in
+            attr_map.PENALTY_IMMUNE_CATEGORY_IDS and
+            operator in attr_map.PENALIZABLE_OPERATORS)
+        if penalize:
+            mod_values = penalized_mods.setdefault(operator, [])
+        else:
+            mod_values = normal_mods.setdefault(operator, [])
+        mod_values.append(mod_value)
+    for operator, mod_values in penalized_mods.items():
+        penalized_value = reference_penalize_values(mod_values)
+        normal_mods.setdefault(operator, []).append(penalized_value)
+    for operator in sorted(normal_mods):
+        mod_values = normal_mods[operator]
+        if operator in (ModOperator.pre_assign, ModOperator.post_assign):
+            if attr.high_is_good:
+                value = max(mod_values)
+            else:
+                value = min(mod_values)
+        elif operator in (ModOperator.mod_add, ModOperator.mod_sub):
+            for mod_val in mod_values:
+                value += mod_val
+        else:
+            for mod_val in mod_values:
+                value *= mod_val
+    if attr.max_attr_id is not None:
+        try:
+            max_value = attr_map_obj[attr.max_attr_id]
+        except KeyError:
+            pass
+        else:
+            value = min(value, max_value)
+            item._fit._calculator.add_dependency(
+                item, attr.max_attr_id, item, attr_id)
+    if attr_id in attr_map.LIMITED_PRECISION_ATTR_IDS:
+        value = round(value, 2)
+    return value
+
+
+def reference_penalize_values(mod_values):
+    chain_positive = []
+    chain_negative = []
+    for mod_value in mod_values:
+        mod_value -= 1
+        if mod_value >= 0:
+            chain_positive.append(mod_value)
+        else:
+            chain_negative.append(mod_value)
+    chain_positive.sort(reverse=True)
+    chain_negative.sort()
+    value = 1
+    for penalization_chain in (chain_positive, chain_negative):
+        chain_value = 1
+        for pos, mod_value in enumerate(penalization_chain):
+            if pos > 10:
+                break
+            chain_value *= 1 + mod_value * attr_map.PENALTY_BASE ** (pos ** 2)
+        value *= chain_value
+    return value
+
+
+def measure(fit, runs, reference=False):
+    """Calculate all attributes of all fit items from scratch.
+
+    Args:
+        fit: Fit to run calculations on.
+        runs: Quantity of runs.
+        reference (optional): If True, reference calculation implementation is
+            used instead of actual one.
+
+    Returns:
+        Tuple with map of calculated values, and best time in seconds out of
+        passed quantity of runs.
+    """
+    items = list(fit._item_iter())
+    attr_ids = [(item, list(item.attrs.keys())) for item in items]
+    calculate_name = '_MutableAttrMap__calculate'
+    calculate = getattr(attr_map.MutableAttrMap, calculate_name)
+    if reference:
+        setattr(attr_map.MutableAttrMap, calculate_name, reference_calculate)
+    try:
+        times = []
+        for _ in range(runs):
+            for item in items:
+                item.attrs.clear()
+            started = time.perf_counter()
+            for item, item_attr_ids in attr_ids:
+                attrs = item.attrs
+                for attr_id in item_attr_ids:
+                    attrs.get(attr_id)
+            times.append(time.perf_counter() - started)
+        # Format: {(item, attribute ID): value}
+        values = {
+            (item, attr_id): item.attrs.get(attr_id)
+            for item, item_attr_ids in attr_ids
+            for attr_id in item_attr_ids}
+    finally:
+        setattr(attr_map.MutableAttrMap, calculate_name, calculate)
+        # Do not leave values calculated by reference implementation around
+        for item in items:
+            item.attrs.clear()
+    return values, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure attribute calculation cost.')
+    parser.add_argument(
+        '-j', '--json', type=str,
+        help='path to folder with Phobos JSON dump; synthetic data is used '
+        'when not specified')
+    parser.add_argument(
+        '-s', '--ship', default=24688, type=int,
+        help='type ID of ship, used with Phobos data')
+    parser.add_argument(
+        '-m', '--module', action='append', type=int, default=[],
+        help='type ID of low-slot module, used with Phobos data; can be passed '
+        'multiple times')
+    parser.add_argument(
+        '-r', '--runs', default=5, type=int,
+        help='quantity of runs, best one is reported')
+    parser.add_argument(
+        '--no-reference', action='store_true',
+        help='do not measure reference calculation implementation')
+    args = parser.parse_args()
+
+    if args.json is None:
+        fit = make_synthetic_fit()
+    else:
+        fit = make_data_fit(args.json, args.ship, args.module)
+    values, best_time = measure(fit, args.runs)
+    attr_count = len(values)
+    print('items: {}'.format(len(list(fit._item_iter()))))
+    print('attributes: {}'.format(attr_count))
+    print('total: {:.1f} ms'.format(best_time * 1000))
+    print('per attribute: {:.2f} us'.format(best_time / attr_count * 1e6))
+    if args.no_reference:
+        return
+    ref_values, ref_best_time = measure(fit, args.runs, reference=True)
+    mismatches = sum(
+        1 for key, value in values.items() if ref_values[key] != value)
+    print('reference total: {:.1f} ms'.format(ref_best_time * 1000))
+    print('reference per attribute: {:.2f} us'.format(
+        ref_best_time / attr_count * 1e6))
+    print('speedup: {:.2f}x'.format(ref_best_time / best_time))
+    print('mismatching values: {}'.format(mismatches))
+
+
+if __name__ == '__main__':
+    main()
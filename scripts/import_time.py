@@ -0,0 +1,118 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+"""
+Measure cold-start cost of importing eos, using import time reports of python
+interpreter (python -X importtime).
+"""
+
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+eos_dir = os.path.realpath(os.path.join(script_dir, '..'))
+
+# Modules which are expected to be imported only when they are needed
+DEFERRED_MODULES = (
+    'yaml',
+    'sqlite3',
+    'asyncio',
+    'eos.data.eve_obj_builder',
+    'eos.data.cache_handler.sqlite_cache_handler',
+    'eos.data.data_handler.sqlite_data_handler',
+    'eos.fit.restriction.restriction')
+
+
+def measure(statement):
+    """Run statement in fresh interpreter and collect import times.
+
+    Returns:
+        Dictionary in {module name: (self time, cumulative time)} format, where
+        times are in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=eos_dir, stderr=subprocess.PIPE, universal_newlines=True,
+        check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_time = int(fields[0])
+            cumulative_time = int(fields[1])
+        except ValueError:
+            # Header line
+            continue
+        times[fields[2].strip()] = (self_time, cumulative_time)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure time it takes to import eos.')
+    parser.add_argument(
+        '-s', '--statement', default='from eos import *', type=str,
+        help='statement to measure')
+    parser.add_argument(
+        '-r', '--runs', default=5, type=int,
+        help='quantity of runs, median of them is reported')
+    parser.add_argument(
+        '-t', '--top', default=15, type=int,
+        help='quantity of slowest modules to print')
+    parser.add_argument(
+        '--max-ms', type=float,
+        help='exit with error if import takes longer than this')
+    args = parser.parse_args()
+
+    runs = [measure(args.statement) for _ in range(args.runs)]
+    totals = [times['eos'][1] for times in runs]
+    total = statistics.median(totals) / 1000
+    print('statement: {}'.format(args.statement))
+    print('eos import time: {:.1f} ms (median of {} runs)'.format(
+        total, args.runs))
+
+    print('slowest modules by self time:')
+    last_run = runs[-1]
+    slowest = sorted(
+        last_run.items(), key=lambda i: i[1][0], reverse=True)[:args.top]
+    for module_name, (self_time, cumulative_time) in slowest:
+        print('  {:>8.1f} ms self {:>8.1f} ms cumulative  {}'.format(
+            self_time / 1000, cumulative_time / 1000, module_name))
+
+    failed = False
+    loaded = [m for m in DEFERRED_MODULES if m in last_run]
+    if loaded:
+        print('modules which should be deferred: {}'.format(', '.join(loaded)))
+        failed = True
+    if args.max_ms is not None and total > args.max_ms:
+        print('import takes longer than {} ms'.format(args.max_ms))
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
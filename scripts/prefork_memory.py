@@ -0,0 +1,119 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+"""
+Measure how much unique memory forked worker processes use after source has
+been loaded, with and without preparing sources for forking.
+
+Works only on Linux, as memory usage is read from /proc.
+"""
+
+
+import argparse
+import gc
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.realpath(os.path.join(script_dir, '..')))
+
+from eos import JsonCacheHandler, JsonDataHandler, SourceManager
+from eos.data.cache_handler.exception import TypeFetchError
+
+
+def get_unique_memory():
+    """Get quantity of memory in KiB which is not shared with other processes.
+    """
+    unique = 0
+    with open('/proc/self/smaps_rollup') as file:
+        for line in file:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                unique += int(line.split()[1])
+    return unique
+
+
+def run_child(cache_handler, type_ids, pipe_w):
+    """Emulate worker which accesses all item types, and report its memory."""
+    gc.enable()
+    baseline = get_unique_memory()
+    for type_id in type_ids:
+        try:
+            cache_handler.get_type(type_id)
+        except TypeFetchError:
+            pass
+    gc.collect()
+    os.write(pipe_w, '{}\n'.format(get_unique_memory() - baseline).encode())
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure per-child unique memory of forked workers.')
+    parser.add_argument(
+        '-j', '--json', required=True, type=str,
+        help='path to folder with Phobos JSON dump')
+    parser.add_argument(
+        '-c', '--cache', required=True, type=str,
+        help='path to cache file (.json.bz2)')
+    parser.add_argument(
+        '-w', '--workers', default=4, type=int,
+        help='quantity of worker processes to fork')
+    parser.add_argument(
+        '--no-prefork', action='store_true',
+        help='fork without preparing sources for it')
+    args = parser.parse_args()
+
+    # Keep collector away from loaded objects until they are frozen
+    gc.disable()
+    data_handler = JsonDataHandler(args.json)
+    cache_handler = JsonCacheHandler(args.cache)
+    SourceManager.add('tq', data_handler, cache_handler, make_default=True)
+    type_ids = [row['typeID'] for row in data_handler.get_evetypes()]
+    if args.no_prefork:
+        cache_handler.preload()
+        gc.enable()
+    else:
+        SourceManager.prefork()
+
+    pipe_r, pipe_w = os.pipe()
+    pids = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(pipe_r)
+            run_child(cache_handler, type_ids, pipe_w)
+        pids.append(pid)
+    os.close(pipe_w)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    with os.fdopen(pipe_r) as file:
+        results = [int(line) for line in file]
+
+    print('mode: {}'.format('plain' if args.no_prefork else 'prefork'))
+    print('parent unique memory: {} KiB'.format(get_unique_memory()))
+    for i, result in enumerate(results):
+        print('child {} unique memory growth: {} KiB'.format(i, result))
+    print('average child unique memory growth: {:.0f} KiB'.format(
+        sum(results) / len(results)))
+
+
+if __name__ == '__main__':
+    main()
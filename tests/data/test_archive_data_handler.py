@@ -0,0 +1,96 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import json
+import os
+import tarfile
+import zipfile
+from types import GeneratorType
+from unittest.mock import patch
+
+import pytest
+
+from eos.data.data_handler import ArchiveDataHandler, JsonDataHandler
+from .test_json_stream_data_handler import DATA, GETTER_NAMES
+
+
+@pytest.fixture
+def basepath(tmpdir):
+    folder = tmpdir.mkdir('phobos')
+    for filename, data in DATA.items():
+        folder.join('{}.json'.format(filename)).write_text(
+            json.dumps(data, indent=2), encoding='utf8')
+    return str(folder)
+
+
+def make_zip(basepath, archive_path):
+    with zipfile.ZipFile(
+            archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename in sorted(os.listdir(basepath)):
+            archive.write(
+                os.path.join(basepath, filename),
+                arcname='phobos/{}'.format(filename))
+
+
+def make_tar(basepath, archive_path):
+    with tarfile.open(archive_path, 'w:xz') as archive:
+        archive.add(basepath, arcname='phobos')
+
+
+@pytest.mark.parametrize('archive_name, make_archive', (
+    ('phobos.zip', make_zip),
+    ('phobos.tar.xz', make_tar)))
+def test_rows_match_json_data_handler(
+        tmpdir, basepath, archive_name, make_archive):
+    archive_path = str(tmpdir.join(archive_name))
+    make_archive(basepath, archive_path)
+    data_handler = JsonDataHandler(basepath)
+    archive_data_handler = ArchiveDataHandler(archive_path, chunk_size=7)
+
+    for getter_name in GETTER_NAMES:
+        rows = getattr(data_handler, getter_name)()
+        archive_rows = getattr(archive_data_handler, getter_name)()
+        assert isinstance(archive_rows, GeneratorType)
+        assert list(archive_rows) == list(rows)
+    assert archive_data_handler.get_version() == 1234567
+
+
+def test_missing_file(tmpdir, basepath):
+    os.remove(os.path.join(basepath, 'dgmexpressions.json'))
+    archive_path = str(tmpdir.join('phobos.zip'))
+    make_zip(basepath, archive_path)
+    data_handler = ArchiveDataHandler(archive_path)
+
+    with pytest.raises(FileNotFoundError):
+        list(data_handler.get_dgmexpressions())
+
+
+def test_tar_read_once(tmpdir, basepath):
+    archive_path = str(tmpdir.join('phobos.tar.xz'))
+    make_tar(basepath, archive_path)
+    data_handler = ArchiveDataHandler(archive_path)
+
+    with patch('tarfile.open', wraps=tarfile.open) as mock:
+        for getter_name in GETTER_NAMES:
+            list(getattr(data_handler, getter_name)())
+        data_handler.get_version()
+
+    assert mock.call_count == 1
@@ -0,0 +1,159 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import os
+import threading
+
+import pytest
+
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.data.cache_handler import BinaryCacheHandler
+from eos.data.cache_handler.exception import (
+    AttrFetchError, EffectFetchError, TypeFetchError)
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.modifier import DogmaModifier
+from eos.eve_object.type import Type
+
+
+@pytest.fixture
+def eve_objects():
+    modifier = DogmaModifier(
+        tgt_filter=ModTgtFilter.item, tgt_domain=ModDomain.ship,
+        tgt_attr_id=5, operator=ModOperator.post_percent, src_attr_id=6)
+    effect = Effect(
+        effect_id=10, category_id=0, modifiers=(modifier,), customize=False)
+    item_type = Type(
+        type_id=1, group_id=2, category_id=3, attrs={5: 100.0, 6: 20.0},
+        effects=(effect,), default_effect=effect, customize=False)
+    attrs = (
+        Attribute(attr_id=5, default_value=0.0),
+        Attribute(attr_id=6, max_attr_id=5, stackable=False))
+    return (item_type,), attrs, (effect,)
+
+
+@pytest.fixture
+def cache_path(tmpdir):
+    return str(tmpdir.join('cache', 'eos_tq.bin'))
+
+
+def test_fingerprint_absent(cache_path):
+    cache_handler = BinaryCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() is None
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(1)
+
+
+def test_update_cache(cache_path, eve_objects):
+    cache_handler = BinaryCacheHandler(cache_path)
+    cache_handler.update_cache(eve_objects, 'fp')
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    assert cache_handler.get_type(1).attrs == {5: 100.0, 6: 20.0}
+
+
+def test_reopen(cache_path, eve_objects):
+    BinaryCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = BinaryCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    item_type = cache_handler.get_type(1)
+    assert item_type.group_id == 2
+    assert item_type.category_id == 3
+    assert item_type.attrs == {5: 100.0, 6: 20.0}
+    assert item_type.default_effect is cache_handler.get_effect(10)
+    assert item_type.effects == {10: cache_handler.get_effect(10)}
+    modifier = cache_handler.get_effect(10).modifiers[0]
+    assert modifier.tgt_attr_id == 5
+    assert modifier.operator == ModOperator.post_percent
+    attr = cache_handler.get_attr(6)
+    assert attr.max_attr_id == 5
+    assert attr.stackable is False
+    assert cache_handler.get_attr(5).default_value == 0.0
+
+
+def test_objects_are_reused(cache_path, eve_objects):
+    BinaryCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = BinaryCacheHandler(cache_path)
+
+    assert cache_handler.get_type(1) is cache_handler.get_type(1)
+
+
+def test_preload(cache_path, eve_objects):
+    BinaryCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = BinaryCacheHandler(cache_path)
+    cache_handler.preload()
+    item_type = cache_handler.get_type(1)
+
+    # Preloaded objects should be reused, and unmapping the file should not
+    # affect them
+    cache_handler._BinaryCacheHandler__mmap.close()
+    assert cache_handler.get_type(1) is item_type
+    assert cache_handler.get_attr(6).max_attr_id == 5
+    assert cache_handler.get_effect(10) is item_type.default_effect
+
+
+def test_missing_entries(cache_path, eve_objects):
+    BinaryCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = BinaryCacheHandler(cache_path)
+
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(2)
+    with pytest.raises(AttrFetchError):
+        cache_handler.get_attr(7)
+    with pytest.raises(EffectFetchError):
+        cache_handler.get_effect(None)
+
+
+def test_corrupted_file(cache_path, caplog):
+    BinaryCacheHandler(cache_path).update_cache(((), (), ()), 'fp')
+    with open(cache_path, 'wb') as file:
+        file.write(b'garbage')
+    cache_handler = BinaryCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() is None
+    assert 'error during reading cache' in caplog.text
+
+
+def test_concurrent_updates(cache_path, eve_objects):
+    errors = []
+
+    def update(fingerprint):
+        try:
+            BinaryCacheHandler(cache_path).update_cache(
+                eve_objects, fingerprint)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=update, args=('fp{}'.format(i),))
+        for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache_handler = BinaryCacheHandler(cache_path)
+
+    assert errors == []
+    assert cache_handler.get_fingerprint().startswith('fp')
+    assert cache_handler.get_type(1).id == 1
+    assert os.listdir(os.path.dirname(cache_path)) == ['eos_tq.bin']
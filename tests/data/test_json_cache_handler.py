@@ -0,0 +1,293 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import bz2
+import json
+import os
+import threading
+
+import pytest
+
+from eos.data.cache_handler import JsonCacheHandler
+from eos.data.cache_handler.stream_writer import AtomicStreamWriter
+from eos.data.cache_handler.exception import (
+    AttrFetchError, EffectFetchError, TypeFetchError)
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.const.eos import State
+from eos.eve_object.type import Type, TypeDerivedData
+
+
+@pytest.fixture
+def eve_objects():
+    effect = Effect(effect_id=10, category_id=0, customize=False)
+    types = tuple(
+        Type(
+            type_id=type_id, group_id=2, attrs={5: 100.0},
+            effects=(effect,), customize=False)
+        for type_id in (1, 2, 3))
+    attrs = (Attribute(attr_id=5),)
+    return types, attrs, (effect,)
+
+
+@pytest.fixture
+def cache_path(tmpdir):
+    return str(tmpdir.join('cache', 'eos_tq.json.bz2'))
+
+
+def test_eager(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    assert cache_handler.get_materialized_count() == (3, 1, 1)
+    assert cache_handler.get_type(1).attrs == {5: 100.0}
+
+
+def test_lazy_materialization(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path, lazy=True)
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    assert cache_handler.get_materialized_count() == (0, 0, 0)
+    item_type = cache_handler.get_type(2)
+    assert item_type.attrs == {5: 100.0}
+    assert item_type.effects == {10: cache_handler.get_effect(10)}
+    assert cache_handler.get_type(2) is item_type
+    assert cache_handler.get_materialized_count() == (1, 0, 1)
+    assert cache_handler.get_attr(5).id == 5
+    assert cache_handler.get_materialized_count() == (1, 1, 1)
+
+
+def test_lazy_update(cache_path, eve_objects):
+    cache_handler = JsonCacheHandler(cache_path, lazy=True)
+    cache_handler.update_cache(eve_objects, 'fp')
+
+    assert cache_handler.get_materialized_count() == (0, 0, 0)
+    assert cache_handler.get_type(3).id == 3
+
+
+def test_lazy_eviction(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path, lazy=True, max_types=2)
+
+    item_type1 = cache_handler.get_type(1)
+    cache_handler.get_type(2)
+    # Make type 2 least recently used
+    cache_handler.get_type(1)
+    cache_handler.get_type(3)
+
+    assert cache_handler.get_materialized_count().types == 2
+    assert cache_handler.get_type(1) is item_type1
+    assert cache_handler.get_type(2).id == 2
+
+
+def test_lazy_eviction_identity(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path, lazy=True, max_types=1)
+
+    item_type1 = cache_handler.get_type(1)
+    cache_handler.get_type(2)
+    cache_handler.get_type(3)
+
+    assert cache_handler.get_materialized_count().types == 1
+    # Evicted item type which is still referenced is not composed again
+    assert cache_handler.get_type(1) is item_type1
+
+
+def test_lazy_missing_entries(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path, lazy=True)
+
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(4)
+    with pytest.raises(AttrFetchError):
+        cache_handler.get_attr(6)
+    with pytest.raises(EffectFetchError):
+        cache_handler.get_effect(11)
+
+
+def test_build_snapshot(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(
+        eve_objects, 'fp', build_snapshot={'a': 1})
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_build_snapshot() == {'a': 1}
+
+
+def test_partial_update(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp1')
+    cache_handler = JsonCacheHandler(cache_path)
+    new_type = Type(
+        type_id=2, group_id=4, effects=(cache_handler.get_effect(10),),
+        customize=False)
+    cache_handler.update_cache_partial(
+        ((new_type,), (), ()), ((3,), (), ()), 'fp2', {'a': 2})
+
+    for handler in (cache_handler, JsonCacheHandler(cache_path)):
+        assert handler.get_fingerprint() == 'fp2'
+        assert handler.get_build_snapshot() == {'a': 2}
+        assert handler.get_type(1).group_id == 2
+        assert handler.get_type(2).group_id == 4
+        assert 10 in handler.get_type(2).effects
+        with pytest.raises(TypeFetchError):
+            handler.get_type(3)
+
+
+def test_fingerprint_without_payload(cache_path, eve_objects, caplog):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    # Damage payload, leaving header and payload size intact
+    with open(cache_path, 'rb') as file:
+        header = file.readline()
+        payload = file.read()
+    with open(cache_path, 'wb') as file:
+        file.write(header + b'x' * len(payload))
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    assert 'error during reading cache' not in caplog.text
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(1)
+    assert 'error during reading cache' in caplog.text
+    # Fingerprint is dropped to get data rebuilt on next update
+    assert cache_handler.get_fingerprint() is None
+
+
+def test_truncated_payload(cache_path, eve_objects, caplog):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    with open(cache_path, 'rb') as file:
+        header = file.readline()
+        payload = file.read()
+    with open(cache_path, 'wb') as file:
+        file.write(header + payload[:len(payload) // 2])
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() is None
+    assert 'cache payload size mismatch' in caplog.text
+
+
+def test_unknown_format(cache_path, eve_objects, caplog):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    with open(cache_path, 'rb') as file:
+        file.readline()
+        payload = file.read()
+    # Cache written with previous format version has no header
+    with open(cache_path, 'wb') as file:
+        file.write(payload)
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() is None
+    assert 'error during reading cache' in caplog.text
+
+
+def test_lazy_preload(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path, lazy=True)
+    cache_handler.preload()
+
+    assert cache_handler.get_materialized_count() == (3, 1, 1)
+    assert cache_handler.get_type(3).id == 3
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(4)
+
+
+def test_derived_data(cache_path):
+    derived = TypeDerivedData(
+        required_skills={3300: 2}, max_state=State.active,
+        item_class_names=('ModuleHigh',), fit_ship_type_ids=(),
+        fit_ship_group_ids=(25,))
+    item_type = Type(type_id=1, derived=derived, customize=False)
+    JsonCacheHandler(cache_path).update_cache(((item_type,), (), ()), 'fp')
+    cache_handler = JsonCacheHandler(cache_path)
+
+    loaded_type = cache_handler.get_type(1)
+    assert loaded_type.derived == derived
+    assert loaded_type.required_skills == {3300: 2}
+    assert loaded_type.max_state is State.active
+
+
+@pytest.mark.parametrize('codec', ['none', 'zlib', 'lzma', 'bz2'])
+def test_codec(cache_path, eve_objects, codec):
+    JsonCacheHandler(cache_path, codec=codec).update_cache(
+        eve_objects, 'fp', build_snapshot={'a': 1})
+    # Cache is read with codec it was written with
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    assert cache_handler.get_build_snapshot() == {'a': 1}
+    assert cache_handler.get_type(3).attrs == {5: 100.0}
+    with open(cache_path, 'rb') as file:
+        assert json.loads(file.readline().decode('utf-8'))['codec'] == codec
+
+
+def test_codec_unknown(cache_path):
+    with pytest.raises(ValueError):
+        JsonCacheHandler(cache_path, codec='gzip')
+
+
+def test_header_without_codec(cache_path, eve_objects):
+    types, attrs, effects = eve_objects
+    header = {'format_version': 2, 'fingerprint': 'fp'}
+    payload = {
+        'types': [t.compress() for t in types],
+        'attrs': [a.compress() for a in attrs],
+        'effects': [e.compress() for e in effects]}
+    os.makedirs(os.path.dirname(cache_path))
+    with open(cache_path, 'wb') as file:
+        file.write(json.dumps(header).encode('utf-8') + b'\n')
+        file.write(bz2.compress(json.dumps(payload).encode('utf-8')))
+    cache_handler = JsonCacheHandler(cache_path)
+
+    assert cache_handler.get_type(1).attrs == {5: 100.0}
+
+
+def test_failed_write_keeps_cache(cache_path, eve_objects):
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+
+    with pytest.raises(RuntimeError):
+        with AtomicStreamWriter(cache_path, 'zlib') as writer:
+            writer.write(b'partial data')
+            raise RuntimeError
+
+    assert os.listdir(os.path.dirname(cache_path)) == ['eos_tq.json.bz2']
+    assert JsonCacheHandler(cache_path).get_type(1).id == 1
+
+
+def test_concurrent_writes(cache_path, eve_objects):
+    errors = []
+
+    def update(fingerprint):
+        try:
+            JsonCacheHandler(cache_path).update_cache(eve_objects, fingerprint)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=update, args=('fp{}'.format(i),))
+        for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(os.path.dirname(cache_path)) == ['eos_tq.json.bz2']
+    assert JsonCacheHandler(cache_path).get_type(1).id == 1
@@ -0,0 +1,90 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import json
+from types import GeneratorType
+
+import pytest
+
+from eos.data.data_handler import JsonDataHandler, JsonStreamDataHandler
+
+
+DATA = {
+    'evetypes': {
+        '1': {'typeID': 1, 'groupID': 6, 'typeName': 'Some ☃ "type"'},
+        '2': {'typeID': 2, 'groupID': 6, 'typeName': 'Other, ]type}'}},
+    'evegroups': {'6': {'groupID': 6, 'categoryID': 16}},
+    'dgmattribs': [{'attributeID': 5, 'defaultValue': 123456789.125}],
+    'dgmtypeattribs': [
+        {'typeID': 1, 'attributeID': 5, 'value': 10},
+        {'typeID': 2, 'attributeID': 5, 'value': -1.5e-05}],
+    'dgmeffects': [{'effectID': 11, 'preExpression': None}],
+    'dgmtypeeffects': [{'typeID': 1, 'effectID': 11, 'isDefault': True}],
+    'dgmexpressions': [],
+    'fighterabilitiesbytype': {
+        '1': {'0': {'abilityID': 5, 'cooldownSeconds': {'value': 60}}}},
+    'phbmetadata': [
+        {'field_name': 'dump_time', 'field_value': 1},
+        {'field_name': 'client_build', 'field_value': 1234567}]}
+
+GETTER_NAMES = (
+    'get_evetypes', 'get_evegroups', 'get_dgmattribs', 'get_dgmtypeattribs',
+    'get_dgmeffects', 'get_dgmtypeeffects', 'get_dgmexpressions',
+    'get_typefighterabils')
+
+
+@pytest.fixture
+def basepath(tmpdir):
+    for filename, data in DATA.items():
+        tmpdir.join('{}.json'.format(filename)).write_text(
+            json.dumps(data, indent=2), encoding='utf8')
+    return str(tmpdir)
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 65536))
+def test_rows_match_json_data_handler(basepath, chunk_size):
+    data_handler = JsonDataHandler(basepath)
+    stream_data_handler = JsonStreamDataHandler(basepath, chunk_size)
+
+    for getter_name in GETTER_NAMES:
+        rows = getattr(data_handler, getter_name)()
+        stream_rows = getattr(stream_data_handler, getter_name)()
+        assert isinstance(stream_rows, GeneratorType)
+        assert list(stream_rows) == list(rows)
+    assert stream_data_handler.get_version() == 1234567
+
+
+def test_empty_containers(tmpdir):
+    tmpdir.join('dgmexpressions.json').write_text(' [ ] ', encoding='utf8')
+    tmpdir.join('evegroups.json').write_text('{}', encoding='utf8')
+    data_handler = JsonStreamDataHandler(str(tmpdir))
+
+    assert list(data_handler.get_dgmexpressions()) == []
+    assert list(data_handler.get_evegroups()) == []
+
+
+def test_truncated_file(tmpdir):
+    tmpdir.join('dgmattribs.json').write_text(
+        '[{"attributeID": 5}, {"attributeID"', encoding='utf8')
+    data_handler = JsonStreamDataHandler(str(tmpdir), chunk_size=4)
+
+    with pytest.raises(ValueError):
+        list(data_handler.get_dgmattribs())
@@ -0,0 +1,53 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import subprocess
+import sys
+
+import pytest
+
+import eos
+from eos.data.cache_handler.json_cache_handler import JsonCacheHandler
+
+
+def test_heavy_modules_deferred():
+    code = (
+        'import sys\n'
+        'from eos import *\n'
+        'print(",".join(sorted(sys.modules)))')
+    output = subprocess.check_output(
+        [sys.executable, '-c', code], universal_newlines=True)
+    modules = set(output.strip().split(','))
+
+    assert 'yaml' not in modules
+    assert 'sqlite3' not in modules
+    assert 'eos.data.eve_obj_builder' not in modules
+    assert 'eos.fit.restriction.restriction' not in modules
+
+
+def test_lazy_attr():
+    assert eos.JsonCacheHandler is JsonCacheHandler
+    assert 'SQLiteDataHandler' in dir(eos)
+
+
+def test_lazy_attr_unknown():
+    with pytest.raises(AttributeError):
+        eos.UnknownHandler
@@ -0,0 +1,137 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import gc
+from unittest.mock import patch
+
+import pytest
+
+from eos.data.cache_handler import (
+    JsonCacheHandler, ObjectPool, SQLiteCacheHandler)
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.type import Type
+
+
+def make_eve_objects(effect_category_id=0):
+    effect = Effect(
+        effect_id=10, category_id=effect_category_id, customize=False)
+    types = tuple(
+        Type(
+            type_id=type_id, group_id=2, attrs={5: 100.0},
+            effects=(effect,), customize=False)
+        for type_id in (1, 2))
+    attrs = (Attribute(attr_id=5),)
+    return types, attrs, (effect,)
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    return tmpdir.join('cache')
+
+
+def test_identical_objects_shared(cache_dir):
+    pool = ObjectPool()
+    cache_handler1 = JsonCacheHandler(
+        str(cache_dir.join('tq.json.bz2')), object_pool=pool)
+    cache_handler2 = JsonCacheHandler(
+        str(cache_dir.join('sisi.json.bz2')), object_pool=pool)
+    cache_handler1.update_cache(make_eve_objects(), 'fp1')
+    cache_handler2.update_cache(make_eve_objects(), 'fp2')
+
+    assert cache_handler1.get_type(1) is cache_handler2.get_type(1)
+    assert cache_handler1.get_effect(10) is cache_handler2.get_effect(10)
+    assert cache_handler1.get_attr(5) is cache_handler2.get_attr(5)
+    stats = pool.get_stats()
+    assert stats.objects == 4
+    assert stats.references == 8
+    assert stats.saved_bytes > 0
+
+
+def test_changed_reference_not_shared(cache_dir):
+    pool = ObjectPool()
+    cache_handler1 = JsonCacheHandler(
+        str(cache_dir.join('tq.json.bz2')), object_pool=pool)
+    cache_handler2 = JsonCacheHandler(
+        str(cache_dir.join('sisi.json.bz2')), object_pool=pool)
+    cache_handler1.update_cache(make_eve_objects(), 'fp1')
+    cache_handler2.update_cache(make_eve_objects(effect_category_id=1), 'fp2')
+
+    # Compressed item types are identical, but they refer to different effects
+    assert cache_handler1.get_type(1) is not cache_handler2.get_type(1)
+    assert cache_handler2.get_type(1).effects[10].category_id == 1
+    assert cache_handler1.get_attr(5) is cache_handler2.get_attr(5)
+    assert pool.get_stats().objects == 7
+
+
+def test_shared_between_handler_kinds(cache_dir):
+    pool = ObjectPool()
+    cache_handler1 = JsonCacheHandler(
+        str(cache_dir.join('tq.json.bz2')), lazy=True, object_pool=pool)
+    cache_handler2 = SQLiteCacheHandler(
+        str(cache_dir.join('sisi.db')), object_pool=pool)
+    cache_handler1.update_cache(make_eve_objects(), 'fp1')
+    cache_handler2.update_cache(make_eve_objects(), 'fp2')
+
+    assert cache_handler1.get_type(2) is cache_handler2.get_type(2)
+
+
+def test_unused_objects_forgotten(cache_dir):
+    pool = ObjectPool()
+    cache_handler = JsonCacheHandler(
+        str(cache_dir.join('tq.json.bz2')), object_pool=pool)
+    cache_handler.update_cache(make_eve_objects(), 'fp1')
+    cache_handler.update_cache(((), (), ()), 'fp2')
+    gc.collect()
+
+    assert pool.get_stats() == (0, 0, 0)
+
+
+def test_shared_object_not_composed_again(cache_dir):
+    pool = ObjectPool()
+    cache_handler1 = JsonCacheHandler(
+        str(cache_dir.join('tq.json.bz2')), object_pool=pool)
+    cache_handler2 = JsonCacheHandler(
+        str(cache_dir.join('sisi.json.bz2')), object_pool=pool)
+    cache_handler1.update_cache(make_eve_objects(), 'fp1')
+
+    with patch.object(Type, 'decompress', wraps=Type.decompress) as mock:
+        cache_handler2.update_cache(make_eve_objects(), 'fp2')
+
+    assert mock.call_count == 0
+    assert cache_handler1.get_type(1) is cache_handler2.get_type(1)
+
+
+def test_released_handler_forgotten(cache_dir):
+    pool = ObjectPool()
+    cache_handler1 = JsonCacheHandler(
+        str(cache_dir.join('tq.json.bz2')), object_pool=pool)
+    cache_handler2 = JsonCacheHandler(
+        str(cache_dir.join('sisi.json.bz2')), object_pool=pool)
+    cache_handler1.update_cache(make_eve_objects(), 'fp1')
+    cache_handler2.update_cache(make_eve_objects(), 'fp2')
+    del cache_handler2
+    gc.collect()
+
+    stats = pool.get_stats()
+    assert stats.objects == 4
+    assert stats.references == 4
+    assert stats.saved_bytes == 0
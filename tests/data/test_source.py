@@ -19,12 +19,16 @@
 # ==============================================================================
 
 
+import asyncio
+import threading
+
 import pytest
 
 from eos import SourceManager
+from eos import __version__ as eos_version
 from eos.data.source import Source
 from eos.data.exception import ExistingSourceError, UnknownSourceError
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, Mock, patch
 
 
 @pytest.fixture
@@ -66,6 +70,15 @@ def test_add_sets_sources(mock_data_handler, mock_cache_handler):
     assert SourceManager.default == source
 
 
+def test_add_resets_attr_metadata(mock_data_handler, mock_cache_handler):
+    source = SourceManager.add('test', mock_data_handler, mock_cache_handler)
+    source.attr_metadata[5] = (None, 0.0, True, True)
+
+    SourceManager.add('test2', mock_data_handler, mock_cache_handler)
+
+    assert source.attr_metadata == {}
+
+
 def test_add_does_not_set_default(mock_data_handler, mock_cache_handler):
     SourceManager.add('test', mock_data_handler, mock_cache_handler)
 
@@ -94,6 +107,127 @@ def test_add_fingerprint_mismatch(
     assert log_msg in caplog.text
 
 
+def test_add_incremental_without_snapshot(
+        mock_data_handler, mock_cache_handler):
+    mock_cache_handler.get_fingerprint = Mock(return_value=None)
+    mock_data_handler.get_version = Mock(return_value='dh_version')
+    SourceManager.add(
+        'test', mock_data_handler, mock_cache_handler, incremental=True)
+
+    assert mock_cache_handler.update_cache.called
+    assert 'build_snapshot' in mock_cache_handler.update_cache.call_args[1]
+    assert not mock_cache_handler.update_cache_partial.called
+
+
+def test_add_incremental_with_snapshot(mock_data_handler, mock_cache_handler):
+    mock_cache_handler.supports_partial_update = True
+    mock_cache_handler.get_fingerprint = Mock(
+        return_value='old_version_0.0.0.dev10')
+    mock_cache_handler.get_build_snapshot = Mock(return_value={
+        'digests': {}, 'type_ids': [], 'attr_ids': [], 'effect_ids': []})
+    mock_data_handler.get_version = Mock(return_value='dh_version')
+    SourceManager.add(
+        'test', mock_data_handler, mock_cache_handler, incremental=True)
+
+    assert not mock_cache_handler.update_cache.called
+    assert mock_cache_handler.update_cache_partial.called
+
+
+def test_add_incremental_partial_unsupported(
+        mock_data_handler, mock_cache_handler):
+    mock_cache_handler.get_fingerprint = Mock(
+        return_value='old_version_0.0.0.dev10')
+    mock_cache_handler.get_build_snapshot = Mock(return_value={
+        'digests': {}, 'type_ids': [], 'attr_ids': [], 'effect_ids': []})
+    mock_cache_handler.supports_partial_update = False
+    mock_data_handler.get_version = Mock(return_value='dh_version')
+    SourceManager.add(
+        'test', mock_data_handler, mock_cache_handler, incremental=True)
+
+    assert mock_cache_handler.update_cache.called
+    assert not mock_cache_handler.get_build_snapshot.called
+
+
+def test_add_type_filter(mock_data_handler, mock_cache_handler):
+    type_filter = Mock()
+
+    SourceManager.add(
+        'test', mock_data_handler, mock_cache_handler, type_filter=type_filter)
+
+    mock_cache_handler.set_type_filter.assert_called_once_with(type_filter)
+
+
+def test_add_without_type_filter(mock_data_handler, mock_cache_handler):
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+
+    assert not mock_cache_handler.set_type_filter.called
+
+
+def test_prefork(mock_data_handler, mock_cache_handler):
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+
+    with patch('eos.data.source.gc') as gc:
+        SourceManager.prefork()
+
+    assert mock_cache_handler.preload.called
+    assert gc.collect.called
+    assert gc.freeze.called
+
+
+def test_add_in_background(mock_data_handler, mock_cache_handler):
+    old_source = Source(alias='old', cache_handler=Mock())
+    SourceManager.default = old_source
+    building = threading.Event()
+    release = threading.Event()
+
+    def get_version():
+        building.set()
+        release.wait(5)
+        return 'dh_version'
+
+    mock_data_handler.get_version = Mock(side_effect=get_version)
+    mock_cache_handler.get_fingerprint = Mock(
+        return_value='dh_version_{}'.format(eos_version))
+    future = SourceManager.add_in_background(
+        'test', mock_data_handler, mock_cache_handler, make_default=True)
+    building.wait(5)
+
+    # Source is not available until it is ready
+    assert SourceManager.default is old_source
+    with pytest.raises(ExistingSourceError):
+        SourceManager.add('test', mock_data_handler, mock_cache_handler)
+    release.set()
+    source = future.result(5)
+    assert source.cache_handler is mock_cache_handler
+    assert SourceManager.get('test') is source
+    assert SourceManager.default is source
+
+
+def test_add_in_background_error(mock_data_handler, mock_cache_handler):
+    mock_data_handler.get_version = Mock(side_effect=ValueError)
+    future = SourceManager.add_in_background(
+        'test', mock_data_handler, mock_cache_handler, make_default=True)
+
+    with pytest.raises(ValueError):
+        future.result(5)
+    assert SourceManager.list() == []
+    assert SourceManager.default is None
+    # Alias is released after failure
+    mock_data_handler.get_version = Mock(return_value='dh_version')
+    SourceManager.add('test', mock_data_handler, mock_cache_handler)
+
+
+def test_add_async(mock_data_handler, mock_cache_handler):
+    mock_data_handler.get_version = Mock(return_value='dh_version')
+    mock_cache_handler.get_fingerprint = Mock(
+        return_value='dh_version_{}'.format(eos_version))
+    source = asyncio.run(SourceManager.add_async(
+        'test', mock_data_handler, mock_cache_handler, make_default=True))
+
+    assert SourceManager.get('test') is source
+    assert SourceManager.default is source
+
+
 def test_removing_known_source(mock_data_handler, mock_cache_handler):
     SourceManager.add('test', mock_data_handler, mock_cache_handler)
     SourceManager.remove('test')
@@ -0,0 +1,190 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import threading
+
+import pytest
+
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.data.cache_handler import SQLiteCacheHandler
+from eos.data.cache_handler.exception import (
+    AttrFetchError, EffectFetchError, TypeFetchError)
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.modifier import DogmaModifier
+from eos.eve_object.type import Type
+
+
+@pytest.fixture
+def eve_objects():
+    modifier = DogmaModifier(
+        tgt_filter=ModTgtFilter.item, tgt_domain=ModDomain.ship,
+        tgt_attr_id=5, operator=ModOperator.post_percent, src_attr_id=6)
+    effect = Effect(
+        effect_id=10, category_id=0, modifiers=(modifier,), customize=False)
+    item_type = Type(
+        type_id=1, group_id=2, category_id=3, attrs={5: 100.0, 6: 20.0},
+        effects=(effect,), default_effect=effect, customize=False)
+    attrs = (
+        Attribute(attr_id=5, default_value=0.0),
+        Attribute(attr_id=6, max_attr_id=5, stackable=False))
+    return (item_type,), attrs, (effect,)
+
+
+@pytest.fixture
+def cache_path(tmpdir):
+    return str(tmpdir.join('cache', 'eos_tq.db'))
+
+
+def test_fingerprint_absent(cache_path):
+    cache_handler = SQLiteCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() is None
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(1)
+
+
+def test_update_cache(cache_path, eve_objects):
+    cache_handler = SQLiteCacheHandler(cache_path)
+    cache_handler.update_cache(eve_objects, 'fp')
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    assert cache_handler.get_type(1).attrs == {5: 100.0, 6: 20.0}
+
+
+def test_reopen(cache_path, eve_objects):
+    SQLiteCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = SQLiteCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() == 'fp'
+    item_type = cache_handler.get_type(1)
+    assert item_type.group_id == 2
+    assert item_type.category_id == 3
+    assert item_type.attrs == {5: 100.0, 6: 20.0}
+    assert item_type.default_effect is cache_handler.get_effect(10)
+    assert item_type.effects == {10: cache_handler.get_effect(10)}
+    modifier = cache_handler.get_effect(10).modifiers[0]
+    assert modifier.tgt_attr_id == 5
+    assert modifier.operator == ModOperator.post_percent
+    attr = cache_handler.get_attr(6)
+    assert attr.max_attr_id == 5
+    assert attr.stackable is False
+    assert cache_handler.get_attr(5).default_value == 0.0
+
+
+def test_objects_are_reused(cache_path, eve_objects):
+    SQLiteCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = SQLiteCacheHandler(cache_path)
+
+    assert cache_handler.get_type(1) is cache_handler.get_type(1)
+
+
+def test_modifiers_interned(cache_path, eve_objects):
+    types, attrs, effects = eve_objects
+    modifier = effects[0].modifiers[0]
+    effect = Effect(
+        effect_id=11, category_id=0,
+        modifiers=(DogmaModifier(*modifier.compress()),), customize=False)
+    SQLiteCacheHandler(cache_path).update_cache(
+        (types, attrs, effects + (effect,)), 'fp')
+    cache_handler = SQLiteCacheHandler(cache_path)
+
+    loaded_modifier = cache_handler.get_effect(10).modifiers[0]
+    assert loaded_modifier is cache_handler.get_effect(11).modifiers[0]
+    assert loaded_modifier == modifier
+    assert hash(loaded_modifier) == hash(modifier)
+    with pytest.raises(AttributeError):
+        loaded_modifier.tgt_attr_id = 6
+
+
+def test_missing_entries(cache_path, eve_objects):
+    SQLiteCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = SQLiteCacheHandler(cache_path)
+
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(2)
+    with pytest.raises(AttrFetchError):
+        cache_handler.get_attr(7)
+    with pytest.raises(EffectFetchError):
+        cache_handler.get_effect(None)
+
+
+def test_update_replaces_objects(cache_path, eve_objects):
+    cache_handler = SQLiteCacheHandler(cache_path)
+    cache_handler.update_cache(eve_objects, 'fp1')
+    item_type = cache_handler.get_type(1)
+    cache_handler.update_cache(((), (), ()), 'fp2')
+
+    assert cache_handler.get_fingerprint() == 'fp2'
+    assert item_type is not None
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(1)
+
+
+def test_lru_size(cache_path, eve_objects):
+    SQLiteCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = SQLiteCacheHandler(cache_path, lru_size=1)
+
+    attr5 = cache_handler.get_attr(5)
+    cache_handler.get_attr(6)
+
+    assert cache_handler.get_attr(5) is not attr5
+    assert cache_handler.get_attr(5).default_value == 0.0
+
+
+def test_corrupted_file(tmpdir, caplog):
+    cache_path = str(tmpdir.join('eos_tq.db'))
+    with open(cache_path, 'wb') as file:
+        file.write(b'garbage' * 1000)
+    cache_handler = SQLiteCacheHandler(cache_path)
+
+    assert cache_handler.get_fingerprint() is None
+    assert 'error during reading cache' in caplog.text
+
+
+def test_partial_update(cache_path, eve_objects):
+    cache_handler = SQLiteCacheHandler(cache_path)
+    cache_handler.update_cache(eve_objects, 'fp1', build_snapshot={'a': 1})
+    assert cache_handler.get_build_snapshot() == {'a': 1}
+    new_attr = Attribute(attr_id=5, default_value=1.0)
+    cache_handler.update_cache_partial(
+        ((), (new_attr,), ()), ((), (6,), ()), 'fp2', {'a': 2})
+
+    cache_handler = SQLiteCacheHandler(cache_path)
+    assert cache_handler.get_fingerprint() == 'fp2'
+    assert cache_handler.get_build_snapshot() == {'a': 2}
+    assert cache_handler.get_attr(5).default_value == 1.0
+    assert cache_handler.get_type(1).id == 1
+    with pytest.raises(AttrFetchError):
+        cache_handler.get_attr(6)
+
+
+def test_update_in_other_thread(cache_path, eve_objects):
+    cache_handler = SQLiteCacheHandler(cache_path)
+    cache_handler.update_cache(eve_objects, 'fp1')
+    assert cache_handler.get_type(1).id == 1
+    thread = threading.Thread(
+        target=cache_handler.update_cache, args=(eve_objects, 'fp2'))
+    thread.start()
+    thread.join()
+
+    assert cache_handler.get_fingerprint() == 'fp2'
+    assert cache_handler.get_type(1).id == 1
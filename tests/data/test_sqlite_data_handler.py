@@ -0,0 +1,158 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import sqlite3
+from types import GeneratorType
+
+import pytest
+
+from eos.data.data_handler import SQLiteDataHandler
+from eos.data.eve_obj_builder import EveObjBuilder
+
+
+SCHEMA = (
+    'CREATE TABLE evetypes ('
+    'typeID INTEGER, groupID INTEGER, typeName TEXT, radius REAL)',
+    'CREATE TABLE evegroups (groupID INTEGER, categoryID INTEGER)',
+    'CREATE TABLE dgmattribs ('
+    'attributeID INTEGER, maxAttributeID INTEGER, defaultValue REAL, '
+    'highIsGood BOOLEAN, stackable BOOLEAN, attributeName TEXT)',
+    'CREATE TABLE dgmtypeattribs ('
+    'typeID INTEGER, attributeID INTEGER, value REAL)',
+    'CREATE TABLE dgmeffects ('
+    'effectID INTEGER, effectCategory INTEGER, isOffensive BOOLEAN, '
+    'isAssistance BOOLEAN, preExpression INTEGER, postExpression INTEGER, '
+    'modifierInfo TEXT, description TEXT)',
+    'CREATE TABLE dgmtypeeffects ('
+    'typeID INTEGER, effectID INTEGER, isDefault BOOLEAN)',
+    'CREATE TABLE dgmexpressions ('
+    'expressionID INTEGER, operandID INTEGER, arg1 INTEGER, arg2 INTEGER, '
+    'expressionValue TEXT, expressionTypeID INTEGER, '
+    'expressionGroupID INTEGER, expressionAttributeID INTEGER)',
+    'CREATE TABLE phbmetadata (field_name TEXT, field_value TEXT)')
+
+ROWS = {
+    'evetypes': [(1, 6, 'Ship', 50.0), (2, 100, 'Asteroid', 10.0)],
+    'evegroups': [(6, 6), (100, 25)],
+    'dgmattribs': [(5, None, 0.0, 1, 1, 'someAttr')],
+    'dgmtypeattribs': [(1, 5, 10.0), (2, 5, 20.0)],
+    'dgmeffects': [(11, 0, 0, 0, None, None, None, 'text')],
+    'dgmtypeeffects': [(1, 11, 1), (2, 11, 0)],
+    'dgmexpressions': [],
+    'phbmetadata': [('client_build', '1234567')]}
+
+FIGHTER_ABILS_SCHEMA = (
+    'CREATE TABLE fighterabilitiesbytype ('
+    'typeID INTEGER, abilityID INTEGER, cooldownSeconds REAL, '
+    'chargeCount INTEGER, rearmTimeSeconds REAL)')
+
+
+def make_db(db_path, fighter_abils=True):
+    conn = sqlite3.connect(db_path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    for table_name, rows in ROWS.items():
+        for row in rows:
+            conn.execute('INSERT INTO {} VALUES ({})'.format(
+                table_name, ', '.join('?' * len(row))), row)
+    if fighter_abils:
+        conn.execute(FIGHTER_ABILS_SCHEMA)
+        conn.execute(
+            'INSERT INTO fighterabilitiesbytype VALUES (1, 5, 60.0, 3, 4.0)')
+        conn.execute(
+            'INSERT INTO fighterabilitiesbytype VALUES (2, 6, 30.0, 1, 2.0)')
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmpdir):
+    db_path = str(tmpdir.join('phobos.db'))
+    make_db(db_path)
+    return db_path
+
+
+def test_consumed_columns_only(db_path):
+    data_handler = SQLiteDataHandler(db_path)
+
+    rows = data_handler.get_evetypes()
+    assert isinstance(rows, GeneratorType)
+    assert list(rows) == [
+        {'typeID': 1, 'groupID': 6, 'radius': 50.0},
+        {'typeID': 2, 'groupID': 100, 'radius': 10.0}]
+    assert list(data_handler.get_dgmattribs()) == [{
+        'attributeID': 5, 'maxAttributeID': None, 'defaultValue': 0.0,
+        'highIsGood': True, 'stackable': True}]
+    assert list(data_handler.get_dgmeffects()) == [{
+        'effectID': 11, 'effectCategory': 0, 'isOffensive': False,
+        'isAssistance': False, 'preExpression': None,
+        'postExpression': None, 'modifierInfo': None}]
+    assert data_handler.get_version() == '1234567'
+
+
+def test_batches(db_path):
+    data_handler = SQLiteDataHandler(db_path, batch_size=1)
+
+    assert [r['typeID'] for r in data_handler.get_dgmtypeattribs()] == [1, 2]
+
+
+def test_typefighterabils(db_path):
+    data_handler = SQLiteDataHandler(db_path)
+
+    assert list(data_handler.get_typefighterabils()) == [
+        {
+            'typeID': 1, 'abilityID': 5, 'cooldownSeconds': 60.0,
+            'chargeCount': 3, 'rearmTimeSeconds': 4.0},
+        {
+            'typeID': 2, 'abilityID': 6, 'cooldownSeconds': 30.0,
+            'chargeCount': 1, 'rearmTimeSeconds': 2.0}]
+
+
+def test_typefighterabils_absent(tmpdir):
+    db_path = str(tmpdir.join('phobos.db'))
+    make_db(db_path, fighter_abils=False)
+    data_handler = SQLiteDataHandler(db_path)
+
+    assert list(data_handler.get_typefighterabils()) == []
+
+
+def test_prefilter(db_path):
+    data_handler = SQLiteDataHandler(db_path, prefilter=True)
+
+    assert [r['typeID'] for r in data_handler.get_evetypes()] == [1]
+    assert [r['typeID'] for r in data_handler.get_dgmtypeattribs()] == [1]
+    assert [r['typeID'] for r in data_handler.get_dgmtypeeffects()] == [1]
+    assert [r['typeID'] for r in data_handler.get_typefighterabils()] == [1]
+    # Tables which do not belong to item types are not filtered
+    assert len(list(data_handler.get_evegroups())) == 2
+
+
+@pytest.mark.parametrize('prefilter', (False, True))
+def test_build(db_path, prefilter):
+    data_handler = SQLiteDataHandler(db_path, prefilter=prefilter)
+
+    types, attrs, effects = EveObjBuilder.run(data_handler)
+
+    assert {t.id for t in types} == {1}
+    item_type = next(iter(types))
+    assert item_type.attrs[5] == 10.0
+    assert item_type.default_effect.id == 11
+    assert item_type.fighter_abilities[5]['charge_quantity'] == 3
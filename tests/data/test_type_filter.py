@@ -0,0 +1,183 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import pytest
+
+from eos.const.eve import AttrId, TypeGroupId
+from eos.data.cache_handler import (
+    BinaryCacheHandler, JsonCacheHandler, SQLiteCacheHandler, TypeFilter)
+from eos.data.cache_handler.base import BaseCacheHandler
+from eos.data.cache_handler.exception import TypeFetchError
+from eos.eve_object.attribute import Attribute
+from eos.eve_object.effect import Effect
+from eos.eve_object.type import Type
+
+
+@pytest.fixture
+def eve_objects():
+    effect1 = Effect(effect_id=10, category_id=0, customize=False)
+    effect2 = Effect(effect_id=20, category_id=0, customize=False)
+    effect3 = Effect(effect_id=30, category_id=0, customize=False)
+    types = (
+        # Selected by category, loads charge by default
+        Type(
+            type_id=1, group_id=2, category_id=3,
+            attrs={AttrId.ammo_loaded: 4}, effects=(effect1,),
+            customize=False),
+        # Charge, selected via module
+        Type(
+            type_id=4, group_id=5, category_id=8, effects=(effect2,),
+            customize=False),
+        # Character, always selected
+        Type(
+            type_id=6, group_id=TypeGroupId.character, category_id=1,
+            customize=False),
+        # Not selected
+        Type(
+            type_id=7, group_id=5, category_id=9, effects=(effect3,),
+            customize=False))
+    attrs = (Attribute(attr_id=AttrId.ammo_loaded),)
+    return types, attrs, (effect1, effect2, effect3)
+
+
+@pytest.fixture
+def type_filter():
+    return TypeFilter(category_ids=(3,))
+
+
+def test_select(eve_objects, type_filter):
+    types = {t.id: t.compress() for t in eve_objects[0]}
+
+    type_ids, effect_ids = type_filter.select(types)
+
+    assert type_ids == {1, 4, 6}
+    assert effect_ids == {10, 20}
+
+
+def test_select_by_group_and_type(eve_objects):
+    types = {t.id: t.compress() for t in eve_objects[0]}
+    type_filter = TypeFilter(group_ids=(5,), type_ids=(1,))
+
+    type_ids, _ = type_filter.select(types)
+
+    assert type_ids == {1, 4, 6, 7}
+
+
+def test_select_required_skills():
+    types = {t.id: t.compress() for t in (
+        Type(
+            type_id=1, group_id=2, category_id=3,
+            attrs={
+                AttrId.required_skill_1: 11,
+                AttrId.required_skill_1_level: 1},
+            customize=False),
+        # Required by selected item type
+        Type(
+            type_id=11, group_id=4, category_id=16,
+            attrs={
+                AttrId.required_skill_2: 12,
+                AttrId.required_skill_2_level: 5},
+            customize=False),
+        # Required by required skill
+        Type(type_id=12, group_id=4, category_id=16, customize=False),
+        # Not selected
+        Type(type_id=13, group_id=4, category_id=16, customize=False))}
+    type_filter = TypeFilter(category_ids=(3,))
+
+    type_ids, _ = type_filter.select(types)
+
+    assert type_ids == {1, 11, 12}
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_json(tmpdir, eve_objects, type_filter, lazy):
+    cache_path = str(tmpdir.join('eos_tq.json.bz2'))
+    JsonCacheHandler(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = JsonCacheHandler(cache_path, lazy=lazy)
+    cache_handler.set_type_filter(type_filter)
+
+    assert cache_handler.get_type(1).id == 1
+    assert cache_handler.get_type(4).id == 4
+    assert cache_handler.get_type(6).id == 6
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(7)
+    assert cache_handler.get_attr(AttrId.ammo_loaded).id == AttrId.ammo_loaded
+
+
+def test_json_filter_change(tmpdir, eve_objects, type_filter):
+    cache_path = str(tmpdir.join('eos_tq.json.bz2'))
+    cache_handler = JsonCacheHandler(cache_path)
+    cache_handler.update_cache(eve_objects, 'fp')
+    assert cache_handler.get_type(7).id == 7
+
+    cache_handler.set_type_filter(type_filter)
+
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(7)
+    cache_handler.set_type_filter(None)
+    assert cache_handler.get_type(7).id == 7
+
+
+@pytest.mark.parametrize('handler_class, file_name', [
+    (SQLiteCacheHandler, 'eos_tq.db'),
+    (BinaryCacheHandler, 'eos_tq.bin')])
+def test_on_demand(tmpdir, eve_objects, type_filter, handler_class, file_name):
+    cache_path = str(tmpdir.join(file_name))
+    handler_class(cache_path).update_cache(eve_objects, 'fp')
+    cache_handler = handler_class(cache_path)
+    cache_handler.set_type_filter(type_filter)
+
+    assert cache_handler.get_type(1).id == 1
+    assert cache_handler.get_type(4).id == 4
+    assert cache_handler.get_type(6).id == 6
+    with pytest.raises(TypeFetchError):
+        cache_handler.get_type(7)
+    # Effects are not filtered out by on-demand handlers
+    assert cache_handler.get_effect(30).id == 30
+
+
+def test_unsupported(eve_objects, type_filter, caplog):
+
+    class CacheHandler(BaseCacheHandler):
+
+        def __init__(self, types):
+            self.types = {t.id: t for t in types}
+
+        def get_type(self, type_id):
+            return self.types[type_id]
+
+        def get_attr(self, attr_id):
+            ...
+
+        def get_effect(self, effect_id):
+            ...
+
+        def get_fingerprint(self):
+            ...
+
+        def update_cache(self, eve_objects, fingerprint, build_snapshot=None):
+            ...
+
+    cache_handler = CacheHandler(eve_objects[0])
+    cache_handler.set_type_filter(type_filter)
+
+    assert cache_handler.get_type(7).id == 7
+    assert 'does not support type filtering' in caplog.text
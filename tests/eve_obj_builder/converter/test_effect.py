@@ -21,6 +21,8 @@
 
 from unittest.mock import patch
 
+import yaml
+
 from tests.eve_obj_builder.eve_obj_builder_testcase import EveObjBuilderTestCase
 
 
@@ -62,3 +64,20 @@ class TestConversionEffect(EveObjBuilderTestCase):
         self.assertEqual(effect.build_status, 29)
         self.assertIn(mod, effect.modifiers)
         self.assertEqual(len(self.get_log(name=self.logger_name)), 0)
+
+    @patch(
+        'eos.data.eve_obj_builder.mod_builder.mod_info_cache.yaml.load',
+        wraps=yaml.load)
+    def test_mod_info_parsed_once(self, yaml_load):
+        self.dh.data['evetypes'].append({'typeID': 1, 'groupID': 1})
+        self.dh.data['dgmtypeeffects'].append({'typeID': 1, 'effectID': 112})
+        self.dh.data['dgmeffects'].append({
+            'effectID': 112, 'preExpression': None, 'postExpression': None,
+            'modifierInfo': (
+                '- domain: shipID\n  func: ItemModifier\n'
+                '  modifiedAttributeID: 22\n  modifyingAttributeID: 11\n'
+                '  operator: 6\n')})
+        self.run_builder()
+        self.assertEqual(len(self.effects[112].modifiers), 1)
+        # Cleaner and modifier builder should share parsing results
+        self.assertEqual(yaml_load.call_count, 1)
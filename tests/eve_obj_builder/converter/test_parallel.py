@@ -0,0 +1,84 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.const.eos import EffectBuildStatus
+from eos.const.eve import OperandId, TypeCategoryId
+from tests.eve_obj_builder.eve_obj_builder_testcase import EveObjBuilderTestCase
+
+
+class TestConversionParallel(EveObjBuilderTestCase):
+    """Building modifiers in multiple processes should yield the same data."""
+
+    logger_name = 'eos.data.eve_obj_builder.mod_builder*'
+
+    def setUp(self):
+        EveObjBuilderTestCase.setUp(self)
+        self.dh.data['evegroups'].append(
+            {'groupID': 1, 'categoryID': TypeCategoryId.module})
+        self.dh.data['evetypes'].append({'typeID': 1, 'groupID': 1})
+        mod_info = (
+            '- domain: shipID\n'
+            '  func: ItemModifier\n'
+            '  modifiedAttributeID: 22\n'
+            '  modifyingAttributeID: 11\n'
+            '  operator: 6\n')
+        for effect_id in range(100, 140):
+            self.dh.data['dgmtypeeffects'].append(
+                {'typeID': 1, 'effectID': effect_id})
+            # Mix successfully built effects with effects which produce
+            # errors and skips
+            if effect_id % 3 == 0:
+                self.dh.data['dgmeffects'].append(
+                    {'effectID': effect_id, 'modifierInfo': mod_info})
+            elif effect_id % 3 == 1:
+                self.dh.data['dgmeffects'].append(
+                    {'effectID': effect_id, 'modifierInfo': '{[}'})
+            else:
+                self.dh.data['dgmeffects'].append(
+                    {'effectID': effect_id, 'preExpression': 1})
+        self.dh.data['dgmexpressions'].append(
+            {
+                'expressionID': 1, 'operandID': OperandId.def_int,
+                'arg1': None, 'arg2': None})
+
+    def get_build_data(self):
+        return (
+            {t.id: t.compress() for t in self.types.values()},
+            {e.id: e.compress() for e in self.effects.values()},
+            [r.getMessage() for r in self.get_log(name=self.logger_name)])
+
+    def test_parallel(self):
+        self.run_builder()
+        serial_data = self.get_build_data()
+        self.tearDown()
+        self.setUp()
+        self.run_builder(processes=2)
+        parallel_data = self.get_build_data()
+        self.assertEqual(parallel_data, serial_data)
+        self.assertEqual(len(self.effects), 40)
+        self.assertEqual(
+            self.effects[102].build_status, EffectBuildStatus.success)
+        self.assertEqual(len(self.effects[102].modifiers), 1)
+        self.assertEqual(
+            self.effects[100].build_status, EffectBuildStatus.error)
+        self.assertEqual(
+            self.effects[101].build_status, EffectBuildStatus.skipped)
+        self.assertEqual(len(parallel_data[2]), 27)
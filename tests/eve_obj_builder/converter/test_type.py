@@ -19,6 +19,9 @@
 # ==============================================================================
 
 
+from eos.const.eos import State
+from eos.const.eve import (
+    AttrId, EffectCategoryId, EffectId, TypeCategoryId)
 from tests.eve_obj_builder.eve_obj_builder_testcase import EveObjBuilderTestCase
 
 
@@ -82,3 +85,50 @@ class TestConversionType(EveObjBuilderTestCase):
             'cooldown_time': None, 'charge_quantity': 3,
             'charge_rearm_time': 20})
         self.assertEqual(len(self.get_log(name=self.logger_name)), 0)
+
+    def test_derived(self):
+        self.dh.data['evetypes'].append({'typeID': 1, 'groupID': 6})
+        self.dh.data['evegroups'].append(
+            {'categoryID': TypeCategoryId.module, 'groupID': 6})
+        for attr_id, value in (
+            (AttrId.required_skill_1, 3300),
+            (AttrId.required_skill_1_level, 2),
+            (AttrId.can_fit_ship_group_1, 25),
+            (AttrId.can_fit_ship_group_2, 25)
+        ):
+            self.dh.data['dgmtypeattribs'].append(
+                {'typeID': 1, 'attributeID': attr_id, 'value': value})
+        for effect_id, effect_category in (
+            (EffectId.hi_power, EffectCategoryId.passive),
+            # Category of online effect is replaced during customization
+            (EffectId.online, EffectCategoryId.active)
+        ):
+            self.dh.data['dgmtypeeffects'].append(
+                {'typeID': 1, 'effectID': effect_id, 'isDefault': False})
+            self.dh.data['dgmeffects'].append({
+                'effectID': effect_id, 'effectCategory': effect_category,
+                'preExpression': None, 'postExpression': None})
+        self.run_builder()
+        self.assertEqual(len(self.types), 1)
+        derived = self.types[1].derived
+        self.assertEqual(derived.required_skills, {3300: 2})
+        self.assertIs(derived.max_state, State.online)
+        self.assertEqual(derived.item_class_names, ('ModuleHigh',))
+        self.assertEqual(derived.fit_ship_type_ids, ())
+        self.assertEqual(derived.fit_ship_group_ids, (25,))
+        # Derived facts are exposed as plain attributes
+        self.assertIn('required_skills', self.types[1].__dict__)
+        self.assertIn('max_state', self.types[1].__dict__)
+
+    def test_derived_unknown_state(self):
+        self.dh.data['evetypes'].append({'typeID': 1, 'groupID': 6})
+        self.dh.data['evegroups'].append({'categoryID': 16, 'groupID': 6})
+        self.dh.data['dgmtypeeffects'].append(
+            {'typeID': 1, 'effectID': 111, 'isDefault': False})
+        self.dh.data['dgmeffects'].append({
+            'effectID': 111, 'effectCategory': 85,
+            'preExpression': None, 'postExpression': None})
+        self.run_builder()
+        self.assertEqual(len(self.types), 1)
+        self.assertIsNone(self.types[1].derived.max_state)
+        self.assertNotIn('max_state', self.types[1].__dict__)
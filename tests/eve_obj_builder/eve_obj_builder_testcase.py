@@ -36,7 +36,7 @@ class EveObjBuilderTestCase(EosTestCase):
         EosTestCase.setUp(self)
         self.dh = DataHandler()
 
-    def run_builder(self):
+    def run_builder(self, processes=None):
         """Shortcut to running eve object builder.
 
         Default data handler is passed to builder as data source, and results
@@ -44,8 +44,12 @@ class EveObjBuilderTestCase(EosTestCase):
             types: Map in {type ID: type} format.
             attrs: Map in {attribute ID: attribute} format.
             effects: Map in {effect ID: effect} format.
+
+        Args:
+            processes (optional): Quantity of processes builder should use.
         """
-        types, attrs, effects = EveObjBuilder.run(self.dh)
+        types, attrs, effects = EveObjBuilder.run(
+            self.dh, processes=processes)
         self.types = {t.id: t for t in types}
         self.attrs = {a.id: a for a in attrs}
         self.effects = {e.id: e for e in effects}
@@ -0,0 +1,128 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.const.eos import State
+from eos.data.eve_obj_builder import BuildSnapshot, EveObjBuilder
+from tests.eve_obj_builder.eve_obj_builder_testcase import EveObjBuilderTestCase
+
+
+class TestIncremental(EveObjBuilderTestCase):
+    """Only eve objects affected by data changes should be rebuilt."""
+
+    def setUp(self):
+        EveObjBuilderTestCase.setUp(self)
+        self.dh.data['evegroups'].append({'categoryID': 16, 'groupID': 6})
+        for type_id in (1, 2):
+            self.dh.data['evetypes'].append({'typeID': type_id, 'groupID': 6})
+            self.dh.data['dgmtypeeffects'].append(
+                {'typeID': type_id, 'effectID': 10 + type_id})
+            self.dh.data['dgmeffects'].append({
+                'effectID': 10 + type_id, 'effectCategory': 0,
+                'preExpression': None, 'postExpression': None})
+        self.dh.data['dgmtypeattribs'].append(
+            {'typeID': 1, 'attributeID': 5, 'value': 10.0})
+        self.dh.data['dgmtypeattribs'].append(
+            {'typeID': 2, 'attributeID': 5, 'value': 20.0})
+        self.dh.data['dgmattribs'].append({'attributeID': 5})
+
+    def run_incremental(self, prev_snapshot):
+        (
+            (types, attrs, effects), self.removed_ids, snapshot
+        ) = EveObjBuilder.run_incremental(self.dh, prev_snapshot)
+        self.types = {t.id: t for t in types}
+        self.attrs = {a.id: a for a in attrs}
+        self.effects = {e.id: e for e in effects}
+        # Pass snapshot through compression, as cache handlers do
+        return BuildSnapshot.decompress(snapshot.compress())
+
+    def test_no_snapshot(self):
+        self.run_incremental(None)
+        self.assertCountEqual(self.types, (1, 2))
+        self.assertCountEqual(self.attrs, (5,))
+        self.assertCountEqual(self.effects, (11, 12))
+        self.assertEqual(self.removed_ids, ((), (), ()))
+
+    def test_no_changes(self):
+        snapshot = self.run_incremental(None)
+        self.run_incremental(snapshot)
+        self.assertEqual(len(self.types), 0)
+        self.assertEqual(len(self.attrs), 0)
+        self.assertEqual(len(self.effects), 0)
+        self.assertEqual(self.removed_ids, (set(), set(), set()))
+
+    def test_type_attr_value(self):
+        snapshot = self.run_incremental(None)
+        self.dh.data['dgmtypeattribs'][1]['value'] = 25.0
+        self.run_incremental(snapshot)
+        self.assertCountEqual(self.types, (2,))
+        self.assertEqual(self.types[2].attrs[5], 25.0)
+        self.assertEqual(len(self.attrs), 0)
+        self.assertEqual(len(self.effects), 0)
+
+    def test_group(self):
+        snapshot = self.run_incremental(None)
+        self.dh.data['evegroups'][0]['categoryID'] = 7
+        self.run_incremental(snapshot)
+        self.assertCountEqual(self.types, (1, 2))
+        self.assertEqual(self.types[1].category_id, 7)
+        self.assertEqual(len(self.attrs), 0)
+        self.assertEqual(len(self.effects), 0)
+
+    def test_effect(self):
+        snapshot = self.run_incremental(None)
+        self.dh.data['dgmeffects'][0]['effectCategory'] = 1
+        self.run_incremental(snapshot)
+        # Item type data derived from its effects has to be refreshed
+        self.assertCountEqual(self.types, (1,))
+        self.assertEqual(self.types[1].max_state, State.active)
+        self.assertCountEqual(self.effects, (11,))
+        self.assertEqual(self.effects[11].category_id, 1)
+
+    def test_expression(self):
+        self.dh.data['dgmexpressions'].append({
+            'expressionID': 100, 'operandID': 23, 'arg1': 101, 'arg2': None})
+        self.dh.data['dgmexpressions'].append({
+            'expressionID': 101, 'operandID': 27, 'arg1': None, 'arg2': None,
+            'expressionValue': '1'})
+        self.dh.data['dgmeffects'][1]['preExpression'] = 100
+        snapshot = self.run_incremental(None)
+        self.dh.data['dgmexpressions'][1]['expressionValue'] = '2'
+        self.run_incremental(snapshot)
+        self.assertCountEqual(self.types, (2,))
+        self.assertCountEqual(self.effects, (12,))
+
+    def test_type_removed(self):
+        snapshot = self.run_incremental(None)
+        del self.dh.data['evetypes'][1]
+        del self.dh.data['dgmtypeattribs'][1]
+        del self.dh.data['dgmtypeeffects'][1]
+        self.run_incremental(snapshot)
+        self.assertEqual(len(self.types), 0)
+        # Effect is not referenced by anything anymore, and is cleaned up
+        self.assertEqual(self.removed_ids, ({2}, set(), {12}))
+
+    def test_effect_removed(self):
+        snapshot = self.run_incremental(None)
+        del self.dh.data['dgmeffects'][0]
+        self.run_incremental(snapshot)
+        self.assertCountEqual(self.types, (1,))
+        self.assertEqual(len(self.types[1].effects), 0)
+        self.assertEqual(self.removed_ids, (set(), set(), {11}))
@@ -0,0 +1,74 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos.data.eve_obj_builder.table import (
+    ROW_LIVE, ROW_REMOVED, ROW_TRASHED, Table)
+
+
+def make_table():
+    table = Table()
+    table.add_row({'typeID': 1, 'groupID': 5})
+    table.add_row({'typeID': 2, 'groupID': None, 'mass': 10.0})
+    table.add_row({'typeID': 3, 'groupID': 5})
+    return table
+
+
+def test_absent_values():
+    table = make_table()
+
+    assert table.row(0) == {'typeID': 1, 'groupID': 5}
+    assert table.row(1) == {'typeID': 2, 'groupID': None, 'mass': 10.0}
+    assert table.has(1, 'groupID') is True
+    assert table.has(0, 'mass') is False
+    assert table.has(0, 'volume') is False
+    assert table.get(0, 'mass', 3) == 3
+    assert list(table.iter_values('typeID', 'mass')) == [
+        (0, 1, None), (1, 2, 10.0), (2, 3, None)]
+
+
+def test_states():
+    table = make_table()
+    table.set_state([0], ROW_TRASHED)
+    table.set_state([2], ROW_REMOVED)
+
+    assert len(table) == 1
+    assert table.ids() == [1]
+    assert table.ids(ROW_LIVE, ROW_TRASHED) == [0, 1]
+    assert table.count(ROW_TRASHED) == 1
+    assert list(table.rows(ROW_TRASHED)) == [{'typeID': 1, 'groupID': 5}]
+    assert list(table.iter_values('typeID', state=ROW_TRASHED)) == [(0, 1)]
+
+
+def test_lookup():
+    table = make_table()
+
+    assert table.lookup('groupID', 5) == [0, 2]
+    table.set_state([0], ROW_TRASHED)
+    assert table.lookup('groupID', 5) == [2]
+    assert table.lookup('groupID', 5, ROW_TRASHED) == [0]
+    # Index should be kept up to date after it's built
+    table.set(2, 'groupID', 6)
+    table.set(1, 'volume', 5)
+    table.add_row({'typeID': 4, 'groupID': 6})
+    assert table.lookup('groupID', 5) == []
+    assert table.lookup('groupID', 6) == [2, 3]
+    assert table.lookup('volume', 5) == [1]
+    assert table.lookup('mass', None) == []
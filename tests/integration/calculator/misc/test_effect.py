@@ -104,6 +104,21 @@ class TestEffectToggling(CalculatorTestCase):
         self.assert_fit_buffers_empty(self.fit)
         self.assertEqual(len(self.get_log()), 0)
 
+    def test_effect_reenabling(self):
+        # Setup
+        self.item.state = State.offline
+        self.fit.modules.high.append(self.item)
+        # Action
+        self.item.set_effect_mode(self.effect1.id, EffectMode.force_stop)
+        self.item.set_effect_mode(self.effect1.id, EffectMode.state_compliance)
+        self.item.set_effect_mode(self.effect1.id, EffectMode.force_stop)
+        self.item.set_effect_mode(self.effect1.id, EffectMode.state_compliance)
+        # Verification
+        self.assertAlmostEqual(self.item.attrs[self.tgt_attr.id], 143)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
     def test_effect_enabling_multiple(self):
         # Setup
         self.item.state = State.offline
@@ -120,3 +135,43 @@ class TestEffectToggling(CalculatorTestCase):
         # Cleanup
         self.assert_fit_buffers_empty(self.fit)
         self.assertEqual(len(self.get_log()), 0)
+
+
+class TestEffectEqualModifiers(CalculatorTestCase):
+    """Test effects which carry equal modifiers."""
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr(stackable=1)
+        src_attr = self.mkattr()
+        modifier_kwargs = dict(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.self,
+            tgt_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=src_attr.id)
+        self.effect1 = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[self.mkmod(**modifier_kwargs)])
+        self.effect2 = self.mkeffect(
+            category_id=EffectCategoryId.passive,
+            modifiers=[self.mkmod(**modifier_kwargs)])
+        self.item = ModuleHigh(self.mktype(
+            attrs={self.tgt_attr.id: 100, src_attr.id: 2},
+            effects=(self.effect1, self.effect2)).id)
+
+    def test_effect_disabling(self):
+        # Setup
+        self.item.state = State.offline
+        self.fit.modules.high.append(self.item)
+        # Action
+        self.item.set_effect_mode(self.effect1.id, EffectMode.force_stop)
+        # Verification
+        self.assertAlmostEqual(self.item.attrs[self.tgt_attr.id], 200)
+        # Action
+        self.item.set_effect_mode(self.effect2.id, EffectMode.force_stop)
+        # Verification
+        self.assertAlmostEqual(self.item.attrs[self.tgt_attr.id], 100)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
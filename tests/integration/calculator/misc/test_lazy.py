@@ -0,0 +1,130 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import *
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.const.eve import EffectCategoryId
+from eos.fit.message import AttrsValueChanged
+from tests.integration.calculator.calculator_testcase import CalculatorTestCase
+
+
+class TestLazy(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.fit = Fit(lazy_attrs=True)
+        self.src_attr = self.mkattr()
+        self.mid_attr = self.mkattr()
+        self.tgt_attr = self.mkattr()
+        mid_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.self,
+            tgt_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_percent,
+            src_attr_id=self.mid_attr.id)
+        mid_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[mid_modifier])
+        self.ship = Ship(self.mktype(
+            attrs={self.mid_attr.id: 50, self.tgt_attr.id: 100},
+            effects=[mid_effect]).id)
+        self.fit.ship = self.ship
+        src_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=self.mid_attr.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=self.src_attr.id)
+        self.src_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[src_modifier])
+
+    def test_affector_added_removed(self):
+        rig = Rig(self.mktype(
+            attrs={self.src_attr.id: 2}, effects=[self.src_effect]).id)
+        self.assertAlmostEqual(self.ship.attrs[self.mid_attr.id], 50)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 150)
+        # Action
+        self.fit.rigs.add(rig)
+        # Verification
+        self.assertAlmostEqual(self.ship.attrs[self.mid_attr.id], 100)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        # Action
+        self.fit.rigs.remove(rig)
+        # Verification
+        self.assertAlmostEqual(self.ship.attrs[self.mid_attr.id], 50)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 150)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_src_changed(self):
+        # Source attribute is changed by another affector, and change is
+        # propagated through whole chain when target value is requested
+        rig = Rig(self.mktype(
+            attrs={self.src_attr.id: 2}, effects=[self.src_effect]).id)
+        self.fit.rigs.add(rig)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        src_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.domain,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=self.src_attr.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=self.src_attr.id)
+        src_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[src_modifier])
+        implant = Implant(self.mktype(
+            attrs={self.src_attr.id: 1.5}, effects=[src_effect]).id)
+        # Action
+        self.fit.implants.add(implant)
+        # Verification
+        self.assertAlmostEqual(rig.attrs[self.src_attr.id], 3)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 250)
+        # Action
+        self.fit.implants.remove(implant)
+        # Verification
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_no_messages(self):
+        rig = Rig(self.mktype(
+            attrs={self.src_attr.id: 2}, effects=[self.src_effect]).id)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 150)
+        msgs = []
+
+        class Subscriber:
+
+            def _notify(self, msg):
+                msgs.append(msg)
+
+        subscriber = Subscriber()
+        self.fit._subscribe(subscriber, (AttrsValueChanged,))
+        # Action
+        self.fit.rigs.add(rig)
+        self.fit.rigs.remove(rig)
+        self.fit.rigs.add(rig)
+        # Verification
+        self.assertEqual(len(msgs), 0)
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 200)
+        # Cleanup
+        self.fit._unsubscribe(subscriber, (AttrsValueChanged,))
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
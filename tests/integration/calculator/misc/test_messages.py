@@ -0,0 +1,95 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import *
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.const.eve import EffectCategoryId
+from eos.fit.message import AttrValueChanged, AttrsValueChanged
+from tests.integration.calculator.calculator_testcase import CalculatorTestCase
+
+
+class TestAttrMessages(CalculatorTestCase):
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.src_attr = self.mkattr()
+        self.mid_attr = self.mkattr()
+        self.tgt_attr = self.mkattr()
+        mid_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.self,
+            tgt_attr_id=self.tgt_attr.id,
+            operator=ModOperator.post_percent,
+            src_attr_id=self.mid_attr.id)
+        mid_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[mid_modifier])
+        self.ship = Ship(self.mktype(
+            attrs={self.mid_attr.id: 50, self.tgt_attr.id: 100},
+            effects=[mid_effect]).id)
+        self.fit.ship = self.ship
+        src_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=self.mid_attr.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=self.src_attr.id)
+        src_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[src_modifier])
+        self.rig = Rig(self.mktype(
+            attrs={self.src_attr.id: 2}, effects=[src_effect]).id)
+        self.msgs = []
+        test = self
+
+        class Subscriber:
+
+            def _notify(self, msg):
+                test.msgs.append(msg)
+
+        self.subscriber = Subscriber()
+
+    def test_batched(self):
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 150)
+        self.fit._subscribe(self.subscriber, (AttrsValueChanged,))
+        # Action
+        self.fit.rigs.add(self.rig)
+        # Verification
+        self.assertEqual(len(self.msgs), 1)
+        self.assertEqual(
+            self.msgs[0].attr_changes,
+            {self.ship: {self.mid_attr.id, self.tgt_attr.id}})
+        # Cleanup
+        self.fit._unsubscribe(self.subscriber, (AttrsValueChanged,))
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_deprecated(self):
+        self.assertAlmostEqual(self.ship.attrs[self.tgt_attr.id], 150)
+        self.fit._subscribe(self.subscriber, (AttrValueChanged,))
+        # Action
+        self.fit.rigs.add(self.rig)
+        # Verification
+        self.assertCountEqual(
+            ((msg.item, msg.attr_id) for msg in self.msgs),
+            ((self.ship, self.mid_attr.id), (self.ship, self.tgt_attr.id)))
+        # Cleanup
+        self.fit._unsubscribe(self.subscriber, (AttrValueChanged,))
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
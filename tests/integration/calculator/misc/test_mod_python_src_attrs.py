@@ -0,0 +1,147 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import *
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.const.eve import EffectId, EffectCategoryId
+from eos.eve_object.modifier import ModificationCalculationError
+from eos.eve_object.modifier.python import BasePythonModifier
+from tests.integration.calculator.calculator_testcase import CalculatorTestCase
+
+
+class TestModifierPythonSrcAttrs(CalculatorTestCase):
+    """Check python modifier which declares its source attributes.
+
+    Such modifier does not revise any messages, calculator invalidates its
+    target attribute on its own when any of source attributes changes.
+    """
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.attr1 = attr1 = self.mkattr()
+        self.attr2 = attr2 = self.mkattr()
+        self.attr3 = attr3 = self.mkattr()
+
+        class TestPythonModifier(BasePythonModifier):
+
+            def __init__(self):
+                BasePythonModifier.__init__(
+                    self,
+                    tgt_filter=ModTgtFilter.item,
+                    tgt_domain=ModDomain.self,
+                    tgt_filter_extra_arg=None,
+                    tgt_attr_id=attr1.id)
+
+            def get_modification(self, carrier_item, ship):
+                try:
+                    carrier_mul = carrier_item.attrs[attr2.id]
+                    ship_mul = ship.attrs[attr3.id]
+                except (AttributeError, KeyError) as e:
+                    raise ModificationCalculationError from e
+                return ModOperator.post_mul, carrier_mul * ship_mul
+
+            def get_src_attrs(self, carrier_item, ship):
+                src_attrs = [(carrier_item, attr2.id)]
+                if ship is not None:
+                    src_attrs.append((ship, attr3.id))
+                return src_attrs
+
+            @property
+            def revise_msg_types(self):
+                return set()
+
+            def revise_modification(self, msg, carrier_item, ship):
+                return False
+
+        self.python_effect = self.mkeffect(
+            category_id=EffectCategoryId.online,
+            modifiers=(TestPythonModifier(),))
+        self.online_effect = self.mkeffect(
+            effect_id=EffectId.online, category_id=EffectCategoryId.online)
+        self.fit.ship = Ship(self.mktype(attrs={attr3.id: 3}).id)
+
+    def test_enabling(self):
+        item = ModuleHigh(self.mktype(
+            attrs={self.attr1.id: 100, self.attr2.id: 2},
+            effects=(self.python_effect, self.online_effect)).id)
+        self.fit.modules.high.append(item)
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 100)
+        # Action
+        item.state = State.online
+        # Verification
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        # Cleanup
+        self.fit.ship = None
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_tgt_recalc_carrier_attr_change(self):
+        attr4 = self.mkattr()
+        dogma_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.self,
+            tgt_attr_id=self.attr2.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=attr4.id)
+        dogma_effect = self.mkeffect(
+            category_id=EffectCategoryId.active, modifiers=[dogma_modifier])
+        item = ModuleHigh(self.mktype(
+            attrs={self.attr1.id: 100, self.attr2.id: 2, attr4.id: 5},
+            effects=(self.python_effect, self.online_effect, dogma_effect),
+            default_effect=dogma_effect).id)
+        self.fit.modules.high.append(item)
+        item.state = State.online
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        # Action
+        item.state = State.active
+        # Verification
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 3000)
+        # Cleanup
+        self.fit.ship = None
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_tgt_recalc_ship_attr_change(self):
+        attr4 = self.mkattr()
+        dogma_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=self.attr3.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=attr4.id)
+        dogma_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[dogma_modifier])
+        item = ModuleHigh(self.mktype(
+            attrs={self.attr1.id: 100, self.attr2.id: 2},
+            effects=(self.python_effect, self.online_effect)).id)
+        self.fit.modules.high.append(item)
+        item.state = State.online
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 600)
+        dogma_item = Rig(self.mktype(
+            attrs={attr4.id: 5}, effects=[dogma_effect]).id)
+        # Action
+        self.fit.rigs.add(dogma_item)
+        # Verification
+        self.assertAlmostEqual(item.attrs[self.attr1.id], 3000)
+        # Cleanup
+        self.fit.ship = None
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
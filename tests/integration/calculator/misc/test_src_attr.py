@@ -68,3 +68,44 @@ class TestSrcAttr(CalculatorTestCase):
             'on item type {}'.format(abs_attr.id, item_type.id))
         # Cleanup
         self.assert_fit_buffers_empty(self.fit)
+
+    def test_chain_src_changed(self):
+        # Check that change of source attribute value is propagated through
+        # whole chain of dependent attributes
+        src_attr = self.mkattr()
+        mid_attr = self.mkattr()
+        tgt_attr = self.mkattr()
+        mid_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.self,
+            tgt_attr_id=tgt_attr.id,
+            operator=ModOperator.post_percent,
+            src_attr_id=mid_attr.id)
+        mid_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[mid_modifier])
+        ship = Ship(self.mktype(
+            attrs={mid_attr.id: 50, tgt_attr.id: 100},
+            effects=[mid_effect]).id)
+        self.fit.ship = ship
+        src_modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.item,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=mid_attr.id,
+            operator=ModOperator.post_mul,
+            src_attr_id=src_attr.id)
+        src_effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[src_modifier])
+        rig = Rig(self.mktype(
+            attrs={src_attr.id: 2}, effects=[src_effect]).id)
+        self.assertAlmostEqual(ship.attrs[tgt_attr.id], 150)
+        # Action
+        self.fit.rigs.add(rig)
+        # Verification
+        self.assertAlmostEqual(ship.attrs[tgt_attr.id], 200)
+        # Action
+        self.fit.rigs.remove(rig)
+        # Verification
+        self.assertAlmostEqual(ship.attrs[tgt_attr.id], 150)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
@@ -64,3 +64,39 @@ class TestTgtAttr(CalculatorTestCase):
         # Cleanup
         self.assert_fit_buffers_empty(self.fit)
         self.assertEqual(len(self.get_log()), 0)
+
+    def test_tgt_item_readded(self):
+        tgt_attr1 = self.mkattr()
+        tgt_attr2 = self.mkattr()
+        src_attr = self.mkattr()
+        modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.domain,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=tgt_attr1.id,
+            operator=ModOperator.post_percent,
+            src_attr_id=src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        influence_src = Rig(self.mktype(
+            attrs={src_attr.id: 20}, effects=[effect]).id)
+        influence_tgt = Rig(self.mktype(
+            attrs={tgt_attr1.id: 50, tgt_attr2.id: 80}).id)
+        self.fit.rigs.add(influence_src)
+        self.fit.rigs.add(influence_tgt)
+        self.assertAlmostEqual(influence_tgt.attrs[tgt_attr1.id], 60)
+        # Action
+        self.fit.rigs.remove(influence_tgt)
+        self.fit.rigs.add(influence_tgt)
+        # Verification
+        # Affectors registered before target item was added should keep
+        # influencing only attribute they target
+        self.assertAlmostEqual(influence_tgt.attrs[tgt_attr1.id], 60)
+        self.assertAlmostEqual(influence_tgt.attrs[tgt_attr2.id], 80)
+        # Action
+        self.fit.rigs.remove(influence_src)
+        # Verification
+        self.assertAlmostEqual(influence_tgt.attrs[tgt_attr1.id], 50)
+        # Cleanup
+        self.fit.rigs.remove(influence_tgt)
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
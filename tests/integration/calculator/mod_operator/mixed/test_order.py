@@ -0,0 +1,107 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+from eos import *
+from eos.const.eos import ModDomain, ModOperator, ModTgtFilter
+from eos.const.eve import EffectCategoryId
+from tests.integration.calculator.calculator_testcase import CalculatorTestCase
+
+
+class TestOperatorOrder(CalculatorTestCase):
+    """Check that modifications are applied one by one in operator order.
+
+    Values are compared exactly, as grouping of modifications changes result
+    of floating point calculations.
+    """
+
+    def setUp(self):
+        CalculatorTestCase.setUp(self)
+        self.tgt_attr = self.mkattr()
+        self.src_attr = self.mkattr()
+
+    def add_influence_src(self, operator, value):
+        modifier = self.mkmod(
+            tgt_filter=ModTgtFilter.domain,
+            tgt_domain=ModDomain.ship,
+            tgt_attr_id=self.tgt_attr.id,
+            operator=operator,
+            src_attr_id=self.src_attr.id)
+        effect = self.mkeffect(
+            category_id=EffectCategoryId.passive, modifiers=[modifier])
+        self.fit.implants.add(Implant(self.mktype(
+            attrs={self.src_attr.id: value}, effects=[effect]).id))
+
+    def test_mixed(self):
+        self.tgt_attr.stackable = True
+        self.add_influence_src(ModOperator.pre_mul, 1.1)
+        self.add_influence_src(ModOperator.pre_div, 0.7)
+        self.add_influence_src(ModOperator.mod_add, 0.3)
+        self.add_influence_src(ModOperator.mod_sub, 0.1)
+        self.add_influence_src(ModOperator.post_mul, 1.3)
+        self.add_influence_src(ModOperator.post_div, 2.7)
+        self.add_influence_src(ModOperator.post_percent, 15)
+        influence_tgt = Rig(self.mktype(attrs={self.tgt_attr.id: 0.9}).id)
+        # Action
+        self.fit.rigs.add(influence_tgt)
+        # Verification
+        expected_value = 0.9
+        expected_value *= 1.1
+        expected_value *= 1 / 0.7
+        expected_value += 0.3
+        expected_value += -0.1
+        expected_value *= 1.3
+        expected_value *= 1 / 2.7
+        expected_value *= 15 / 100 + 1
+        self.assertEqual(influence_tgt.attrs[self.tgt_attr.id], expected_value)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_penalized(self):
+        self.tgt_attr.stackable = False
+        self.add_influence_src(ModOperator.pre_mul, 1.1)
+        self.add_influence_src(ModOperator.post_percent, 3)
+        self.add_influence_src(ModOperator.post_percent, 13)
+        self.add_influence_src(ModOperator.post_percent, 7)
+        self.add_influence_src(ModOperator.post_percent, -3)
+        self.add_influence_src(ModOperator.post_percent, -7)
+        influence_tgt = Rig(self.mktype(attrs={self.tgt_attr.id: 0.9}).id)
+        # Action
+        self.fit.rigs.add(influence_tgt)
+        # Verification
+        penalty_base = 0.8691199808003974
+        chain_positive = 1
+        chain_positive *= 1 + (13 / 100 + 1 - 1)
+        chain_positive *= 1 + (7 / 100 + 1 - 1) * penalty_base
+        chain_positive *= 1 + (3 / 100 + 1 - 1) * penalty_base ** 4
+        chain_negative = 1
+        chain_negative *= 1 + (-7 / 100 + 1 - 1)
+        chain_negative *= 1 + (-3 / 100 + 1 - 1) * penalty_base
+        penalized_value = 1
+        penalized_value *= chain_positive
+        penalized_value *= chain_negative
+        expected_value = 0.9
+        expected_value *= 1.1
+        expected_value *= penalized_value
+        self.assertEqual(influence_tgt.attrs[self.tgt_attr.id], expected_value)
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
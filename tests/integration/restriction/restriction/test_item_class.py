@@ -22,6 +22,7 @@
 from eos import *
 from eos.const.eve import (
     AttrId, TypeCategoryId, EffectId, EffectCategoryId, TypeGroupId)
+from eos.eve_object.type import TypeDerivedData
 from tests.integration.restriction.restriction_testcase import (
     RestrictionTestCase)
 
@@ -703,3 +704,23 @@ class TestItemClass(RestrictionTestCase):
         # Cleanup
         self.assert_fit_buffers_empty(self.fit)
         self.assertEqual(len(self.get_log()), 0)
+
+    def test_derived_replacement(self):
+        # Item classes precalculated by eve object builder take precedence
+        # over item type data
+        item = Drone(self.mktype(
+            category_id=TypeCategoryId.drone,
+            derived=TypeDerivedData(
+                required_skills={}, max_state=None,
+                item_class_names=('Implant',), fit_ship_type_ids=(),
+                fit_ship_group_ids=())).id)
+        self.fit.drones.add(item)
+        # Action
+        error = self.get_error(item, Restriction.item_class)
+        # Verification
+        self.assertIsNotNone(error)
+        self.assertEqual(error.item_class, Drone)
+        self.assertCountEqual(error.allowed_classes, [Implant])
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
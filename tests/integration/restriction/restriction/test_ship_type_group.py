@@ -21,6 +21,7 @@
 
 from eos import *
 from eos.const.eve import AttrId
+from eos.eve_object.type import TypeDerivedData
 from tests.integration.restriction.restriction_testcase import (
     RestrictionTestCase)
 
@@ -276,3 +277,22 @@ class TestShipTypeGroup(RestrictionTestCase):
         # Cleanup
         self.assert_fit_buffers_empty(self.fit)
         self.assertEqual(len(self.get_log()), 0)
+
+    def test_fail_derived(self):
+        ship_type = self.mktype(group_id=31)
+        self.fit.ship = Ship(ship_type.id)
+        item = ModuleHigh(self.mktype(
+            attrs={AttrId.can_fit_ship_type_1: ship_type.id},
+            derived=TypeDerivedData(
+                required_skills={}, max_state=None, item_class_names=(),
+                fit_ship_type_ids=(10,), fit_ship_group_ids=(32,))).id)
+        self.fit.modules.high.append(item)
+        # Action
+        error = self.get_error(item, Restriction.ship_type_group)
+        # Verification
+        self.assertIsNotNone(error)
+        self.assertCountEqual(error.allowed_type_ids, [10])
+        self.assertCountEqual(error.allowed_group_ids, [32])
+        # Cleanup
+        self.assert_fit_buffers_empty(self.fit)
+        self.assertEqual(len(self.get_log()), 0)
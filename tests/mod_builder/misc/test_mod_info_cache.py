@@ -0,0 +1,111 @@
+# ==============================================================================
+# Copyright (C) 2011 Diego Duclos
+# Copyright (C) 2011-2017 Anton Vorobyov
+#
+# This file is part of Eos.
+#
+# Eos is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Eos is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Eos. If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import yaml
+
+from eos.const.eos import EffectBuildStatus
+from eos.data.eve_obj_builder.mod_builder import ModBuilder, ModInfoCache
+from tests.mod_builder.modbuilder_testcase import ModBuilderTestCase
+
+
+MOD_INFO = (
+    '- domain: shipID\n  func: ItemModifier\n  modifiedAttributeID: 22\n'
+    '  modifyingAttributeID: 11\n  operator: 6\n')
+
+
+@patch(
+    'eos.data.eve_obj_builder.mod_builder.mod_info_cache.yaml.load',
+    wraps=yaml.load)
+class TestBuilderModInfoCache(ModBuilderTestCase):
+    """Modifier info should be parsed once and reused."""
+
+    def setUp(self):
+        ModBuilderTestCase.setUp(self)
+        self.memo_dir = tempfile.mkdtemp()
+        self.memo_path = os.path.join(self.memo_dir, 'memo.json.bz2')
+
+    def tearDown(self):
+        shutil.rmtree(self.memo_dir)
+        ModBuilderTestCase.tearDown(self)
+
+    def build(self, mod_info_cache, effect_id=1, mod_info=MOD_INFO):
+        effect_row = {
+            'effectID': effect_id, 'preExpression': None,
+            'postExpression': None, 'modifierInfo': mod_info}
+        return ModBuilder(self.ef.data, mod_info_cache).build(effect_row)
+
+    def test_shared(self, yaml_load):
+        mod_info_cache = ModInfoCache()
+        mod_info_cache.get(1, MOD_INFO)
+        modifiers, status = self.build(mod_info_cache)
+        self.assertEqual(status, EffectBuildStatus.success)
+        self.assertEqual(len(modifiers), 1)
+        self.assertEqual(yaml_load.call_count, 1)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_changed_contents(self, yaml_load):
+        mod_info_cache = ModInfoCache()
+        mod_info_cache.get(1, 'random: data')
+        modifiers, status = self.build(mod_info_cache)
+        self.assertEqual(status, EffectBuildStatus.success)
+        self.assertEqual(len(modifiers), 1)
+        self.assertEqual(yaml_load.call_count, 2)
+
+    def test_parsing_failure(self, yaml_load):
+        mod_info_cache = ModInfoCache()
+        self.build(mod_info_cache, mod_info='yap((EWH\x02')
+        modifiers, status = self.build(mod_info_cache, mod_info='yap((EWH\x02')
+        self.assertEqual(status, EffectBuildStatus.error)
+        self.assertEqual(len(modifiers), 0)
+        self.assertEqual(yaml_load.call_count, 1)
+        self.assertEqual(len(self.get_log()), 2)
+
+    def test_memo(self, yaml_load):
+        mod_info_cache = ModInfoCache(self.memo_path)
+        self.build(mod_info_cache)
+        mod_info_cache.save()
+        self.assertEqual(yaml_load.call_count, 1)
+        # Memo is keyed by contents, effect ID doesn't matter
+        mod_info_cache = ModInfoCache(self.memo_path)
+        modifiers, status = self.build(mod_info_cache, effect_id=2)
+        self.assertEqual(status, EffectBuildStatus.success)
+        self.assertEqual(len(modifiers), 1)
+        self.assertEqual(yaml_load.call_count, 1)
+        self.assertEqual(len(self.get_log()), 0)
+
+    def test_memo_corrupted(self, yaml_load):
+        with open(self.memo_path, 'wb') as file:
+            file.write(b'random data')
+        mod_info_cache = ModInfoCache(self.memo_path)
+        modifiers, status = self.build(mod_info_cache)
+        self.assertEqual(status, EffectBuildStatus.success)
+        self.assertEqual(len(modifiers), 1)
+        self.assertEqual(yaml_load.call_count, 1)
+        self.assertEqual(len(self.get_log()), 1)
+        mod_info_cache.save()
+        mod_info_cache = ModInfoCache(self.memo_path)
+        self.build(mod_info_cache)
+        self.assertEqual(yaml_load.call_count, 1)